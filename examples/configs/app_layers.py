@@ -0,0 +1,52 @@
+# App Layers
+# Main layer plus the four layer files from examples/layers, loaded by reference:
+# each app layer is imported and built the first time it is entered, and at most
+# two of them stay in memory at once.
+# Copy the layer files next to keymap.py on CIRCUITPY (media_layer.py, text_layer.py,
+# vscode_layer.py, vs2022_layer.py).
+
+from adafruit_hid.keycode import Keycode
+from constants import ActionType, Key, Color, LayerAction
+
+# Hold the modifier (bottom-left) and press a top-row key to open an app layer;
+# every app layer returns here with its bottom row, second key.
+MAIN = {
+    'name': 'Main',
+    'keys': {
+        Key.R0C0: {'default': {'action_type': ActionType.CONSUMER, 'action': 'play_pause'},
+                   'modifier': {'action_type': ActionType.LAYER, 'action': 1},
+                   'colors': {'default': Color.ORANGE}},
+        Key.R0C1: {'default': {'action_type': ActionType.KEY, 'action': [Keycode.CONTROL, Keycode.C]},
+                   'modifier': {'action_type': ActionType.LAYER, 'action': 2},
+                   'colors': {'default': Color.GREEN}},
+        Key.R0C2: {'default': {'action_type': ActionType.KEY, 'action': [Keycode.CONTROL, Keycode.V]},
+                   'modifier': {'action_type': ActionType.LAYER, 'action': 3},
+                   'colors': {'default': Color.BLUE}},
+        Key.R0C3: {'default': {'action_type': ActionType.KEY, 'action': [Keycode.CONTROL, Keycode.S]},
+                   'modifier': {'action_type': ActionType.LAYER, 'action': 4},
+                   'colors': {'default': Color.PURPLE}},
+
+        Key.R1C0: {'action_type': ActionType.KEY, 'action': Keycode.F13, 'colors': {'default': Color.CYAN}},
+        Key.R1C1: {'action_type': ActionType.KEY, 'action': Keycode.F14, 'colors': {'default': Color.CYAN}},
+        Key.R1C2: {'action_type': ActionType.KEY, 'action': Keycode.F15, 'colors': {'default': Color.CYAN}},
+        Key.R1C3: {'action_type': ActionType.KEY, 'action': Keycode.F16, 'colors': {'default': Color.CYAN}},
+
+        Key.R3C0: {'action_type': ActionType.LAYER, 'action': LayerAction.MODIFIER, 'colors': {'default': Color.WHITE}},
+    }
+}
+
+LAYERS = {
+    0: MAIN,
+    1: 'media_layer.MEDIA_LAYER',
+    2: 'text_layer.TEXT_LAYER',
+    3: 'vscode_layer.VSCODE_LAYER',
+    4: 'vs2022_layer.VS2022_LAYER',
+}
+
+CONFIG = {
+    'name': 'App Layers',
+    'version': '1.0',
+    'default_layer': 0,
+    'pin_layers': False,       # load every app layer on first use
+    'layer_cache_size': 2,     # app layers kept loaded at once
+}
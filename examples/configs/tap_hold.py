@@ -0,0 +1,77 @@
+# Tap-Hold Keys
+# Each key on the bottom row types one key when tapped and does something else when held:
+# three act as Control, Shift and Alt, the bottom-left one opens the navigation layer.
+# Layout: [C][V][X][Z]   [F13][F14][F15][F16]   [ENT][TAB][BSP][DEL]   [SPC/NAV][ESC/CTL][ENT/SFT][TAB/ALT]
+
+from adafruit_hid.keycode import Keycode
+from constants import ActionType, Key, Color
+
+
+def plain(keycode, color):
+    return {'action_type': ActionType.KEY, 'action': keycode, 'colors': {'default': color}}
+
+
+MAIN = {
+    'name': 'Main',
+    'keys': {
+        Key.R0C0: plain(Keycode.C, Color.BLUE),
+        Key.R0C1: plain(Keycode.V, Color.BLUE),
+        Key.R0C2: plain(Keycode.X, Color.BLUE),
+        Key.R0C3: plain(Keycode.Z, Color.BLUE),
+
+        Key.R1C0: plain(Keycode.F13, Color.CYAN),
+        Key.R1C1: plain(Keycode.F14, Color.CYAN),
+        Key.R1C2: plain(Keycode.F15, Color.CYAN),
+        Key.R1C3: plain(Keycode.F16, Color.CYAN),
+
+        Key.R2C0: plain(Keycode.ENTER, Color.WHITE),
+        Key.R2C1: plain(Keycode.TAB, Color.WHITE),
+        Key.R2C2: plain(Keycode.BACKSPACE, Color.WHITE),
+        Key.R2C3: plain(Keycode.DELETE, Color.WHITE),
+
+        # Space when tapped, navigation layer while held
+        Key.R3C0: {'tap': Keycode.SPACE,
+                   'hold': {'action_type': ActionType.LAYER, 'action': 1},
+                   'colors': {'default': Color.ORANGE}},
+        # Escape when tapped, Control while held; any other key pressed meanwhile makes it Control
+        Key.R3C1: {'tap': Keycode.ESCAPE, 'hold': Keycode.CONTROL,
+                   'hold_on_other_key_press': True,
+                   'colors': {'default': Color.RED}},
+        # Shift also counts as held once another key is tapped while it is down
+        Key.R3C2: {'tap': Keycode.ENTER, 'hold': Keycode.SHIFT,
+                   'permissive_hold': True,
+                   'colors': {'default': Color.PURPLE}},
+        # Alt with a longer tapping term
+        Key.R3C3: {'tap': Keycode.TAB, 'hold': Keycode.ALT,
+                   'tapping_term': 300,
+                   'colors': {'default': Color.PURPLE}},
+    }
+}
+
+# Open while the bottom-left key is held
+NAV = {
+    'name': 'Navigation',
+    'keys': {
+        Key.R0C1: plain(Keycode.UP_ARROW, Color.GREEN),
+        Key.R1C0: plain(Keycode.LEFT_ARROW, Color.GREEN),
+        Key.R1C1: plain(Keycode.DOWN_ARROW, Color.GREEN),
+        Key.R1C2: plain(Keycode.RIGHT_ARROW, Color.GREEN),
+        Key.R0C0: plain(Keycode.HOME, Color.CYAN),
+        Key.R0C2: plain(Keycode.END, Color.CYAN),
+        Key.R3C0: {'action_type': ActionType.NONE, 'colors': {'default': Color.ORANGE}},
+    }
+}
+
+LAYERS = {
+    0: MAIN,
+    1: NAV,
+}
+
+CONFIG = {
+    'name': 'Tap-Hold Keys',
+    'version': '1.0',
+    'default_layer': 0,
+    'tapping_term': 200,              # ms before a key still down counts as held
+    'permissive_hold': False,         # per-key settings above override these
+    'hold_on_other_key_press': False,
+}
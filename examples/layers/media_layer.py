@@ -12,7 +12,7 @@ MEDIA_LAYER = {
     'description': 'Audio, video, and streaming controls',
     'color': Color.ORANGE,  # Media orange theme
     'keys': {
-        # Media playback controls (top row)
+        # Media playback controls (right column, C3)
         Key.R3C3: {  # Previous Track
             'action_type': ActionType.CONSUMER,
             'action': ConsumerControlCode.SCAN_PREVIOUS_TRACK,
@@ -50,7 +50,7 @@ MEDIA_LAYER = {
             }
         },
         
-        # Volume controls (second row)
+        # Volume controls (column C2)
         Key.R3C2: {  # Mute
             'action_type': ActionType.CONSUMER,
             'action': ConsumerControlCode.MUTE,
@@ -78,7 +78,7 @@ MEDIA_LAYER = {
                 'held': (255, 240, 100)
             }
         },
-        Key.R1C3: {  # Mic Mute (Windows key + M for Windows)
+        Key.R0C2: {  # Mic Mute (Windows key + M for Windows)
             'action_type': ActionType.KEY,
             'action': [Keycode.WINDOWS, Keycode.M],
             'colors': {
@@ -88,7 +88,7 @@ MEDIA_LAYER = {
             }
         },
         
-        # Streaming shortcuts (third row)
+        # Streaming shortcuts (column C1)
         Key.R3C1: {  # OBS Scene 1
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.ONE],
@@ -107,7 +107,7 @@ MEDIA_LAYER = {
                 'held': (255, 220, 100)
             }
         },
-        Key.R2C2: {  # OBS Start/Stop Recording
+        Key.R1C1: {  # OBS Start/Stop Recording
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.SHIFT, Keycode.R],
             'colors': {
@@ -116,7 +116,7 @@ MEDIA_LAYER = {
                 'held': (255, 240, 100)
             }
         },
-        Key.R2C3: {  # OBS Start/Stop Streaming
+        Key.R0C1: {  # OBS Start/Stop Streaming
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.SHIFT, Keycode.S],
             'colors': {
@@ -126,7 +126,7 @@ MEDIA_LAYER = {
             }
         },
         
-        # Layer navigation (bottom row)
+        # Layer navigation (left column, C0)
         Key.R3C0: {  # Modifier key
             'action_type': ActionType.LAYER,
             'action': LayerAction.MODIFIER,
@@ -136,7 +136,7 @@ MEDIA_LAYER = {
                 'held': (200, 150, 100)
             }
         },
-        Key.R3C1: {  # Back to main layer (adjust target as needed)
+        Key.R2C0: {  # Back to main layer (adjust target as needed)
             'action_type': ActionType.LAYER,
             'action': 0,  # Change this to your main layer index
             'colors': {
@@ -145,7 +145,7 @@ MEDIA_LAYER = {
                 'held': (210, 160, 100)
             }
         },
-        Key.R3C2: {  # Discord Push-to-Talk (customize key as needed)
+        Key.R1C0: {  # Discord Push-to-Talk (customize key as needed)
             'action_type': ActionType.KEY,
             'action': [Keycode.GRAVE_ACCENT],  # Backtick key - change as needed
             'colors': {
@@ -154,7 +154,7 @@ MEDIA_LAYER = {
                 'held': (220, 170, 100)
             }
         },
-        Key.R3C3: {  # Screenshot
+        Key.R0C0: {  # Screenshot
             'action_type': ActionType.KEY,
             'action': [Keycode.WINDOWS, Keycode.SHIFT, Keycode.S],
             'colors': {
@@ -12,7 +12,7 @@ TEXT_LAYER = {
     'description': 'Text snippets, shortcuts, and productivity tools',
     'color': Color.GREEN,  # Green productivity theme
     'keys': {
-        # Common text snippets (top row)
+        # Common text snippets (right column, C3)
         Key.R3C3: {  # Email signature
             'action_type': ActionType.STRING,
             'action': "Best regards,\nYour Name",
@@ -22,9 +22,9 @@ TEXT_LAYER = {
                 'held': (100, 255, 200)
             }
         },
-        Key.R2C3: {  # Current date
-            'action_type': ActionType.FUNCTION,
-            'action': 'type_current_date',  # Custom function (would need implementation)
+        Key.R2C3: {  # Thank-you note
+            'action_type': ActionType.STRING,
+            'action': "Thanks for your help!",
             'colors': {
                 'default': (0, 180, 120),
                 'pressed': (50, 230, 170),
@@ -50,7 +50,7 @@ TEXT_LAYER = {
             }
         },
         
-        # Common shortcuts (second row)
+        # Common shortcuts (column C2)
         Key.R3C2: {  # Select All
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.A],
@@ -78,7 +78,7 @@ TEXT_LAYER = {
                 'held': (120, 255, 240)
             }
         },
-        Key.R1C3: {  # Undo
+        Key.R0C2: {  # Undo
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.Z],
             'colors': {
@@ -88,7 +88,7 @@ TEXT_LAYER = {
             }
         },
         
-        # Navigation and window management (third row)
+        # Navigation and window management (column C1)
         Key.R3C1: {  # Alt+Tab (Window Switcher)
             'action_type': ActionType.KEY,
             'action': [Keycode.ALT, Keycode.TAB],
@@ -107,7 +107,7 @@ TEXT_LAYER = {
                 'held': (140, 255, 220)
             }
         },
-        Key.R2C2: {  # Windows + Right (Snap Right)
+        Key.R1C1: {  # Windows + Right (Snap Right)
             'action_type': ActionType.KEY,
             'action': [Keycode.WINDOWS, Keycode.RIGHT_ARROW],
             'colors': {
@@ -116,7 +116,7 @@ TEXT_LAYER = {
                 'held': (140, 255, 240)
             }
         },
-        Key.R2C3: {  # Windows + D (Show Desktop)
+        Key.R0C1: {  # Windows + D (Show Desktop)
             'action_type': ActionType.KEY,
             'action': [Keycode.WINDOWS, Keycode.D],
             'colors': {
@@ -126,7 +126,7 @@ TEXT_LAYER = {
             }
         },
         
-        # Layer navigation (bottom row)
+        # Layer navigation (left column, C0)
         Key.R3C0: {  # Modifier key
             'action_type': ActionType.LAYER,
             'action': LayerAction.MODIFIER,
@@ -136,7 +136,7 @@ TEXT_LAYER = {
                 'held': (100, 200, 150)
             }
         },
-        Key.R3C1: {  # Back to main layer (adjust target as needed)
+        Key.R2C0: {  # Back to main layer (adjust target as needed)
             'action_type': ActionType.LAYER,
             'action': 0,  # Change this to your main layer index
             'colors': {
@@ -145,7 +145,7 @@ TEXT_LAYER = {
                 'held': (100, 210, 160)
             }
         },
-        Key.R3C2: {  # Calculator shortcut
+        Key.R1C0: {  # Calculator shortcut
             'action_type': ActionType.KEY,
             'action': [Keycode.WINDOWS, Keycode.R],  # Opens Run dialog
             'colors': {
@@ -154,7 +154,7 @@ TEXT_LAYER = {
                 'held': (100, 220, 170)
             }
         },
-        Key.R3C3: {  # Task Manager
+        Key.R0C0: {  # Task Manager
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.SHIFT, Keycode.ESCAPE],
             'colors': {
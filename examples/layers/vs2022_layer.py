@@ -12,7 +12,7 @@ VS2022_LAYER = {
     'description': 'Visual Studio 2022 shortcuts and commands',
     'color': Color.PURPLE,  # VS2022 purple theme
     'keys': {
-        # Solution and project operations (top row)
+        # Solution and project operations (right column, C3)
         Key.R3C3: {  # Build Solution
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.SHIFT, Keycode.B],
@@ -50,7 +50,7 @@ VS2022_LAYER = {
             }
         },
         
-        # Code navigation and IntelliSense (second row)
+        # Code navigation and IntelliSense (column C2)
         Key.R3C2: {  # Go to Definition
             'action_type': ActionType.KEY,
             'action': [Keycode.F12],
@@ -78,7 +78,7 @@ VS2022_LAYER = {
                 'held': (255, 120, 255)
             }
         },
-        Key.R1C3: {  # Peek Definition
+        Key.R0C2: {  # Peek Definition
             'action_type': ActionType.KEY,
             'action': [Keycode.ALT, Keycode.F12],
             'colors': {
@@ -88,7 +88,7 @@ VS2022_LAYER = {
             }
         },
         
-        # Debugging and testing (third row)
+        # Debugging and testing (column C1)
         Key.R3C1: {  # Start Debugging
             'action_type': ActionType.KEY,
             'action': [Keycode.F5],
@@ -107,7 +107,7 @@ VS2022_LAYER = {
                 'held': (230, 140, 255)
             }
         },
-        Key.R2C2: {  # Toggle Breakpoint
+        Key.R1C1: {  # Toggle Breakpoint
             'action_type': ActionType.KEY,
             'action': [Keycode.F9],
             'colors': {
@@ -116,7 +116,7 @@ VS2022_LAYER = {
                 'held': (255, 140, 255)
             }
         },
-        Key.R2C3: {  # Run All Tests
+        Key.R0C1: {  # Run All Tests
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.R, Keycode.A],
             'colors': {
@@ -126,7 +126,7 @@ VS2022_LAYER = {
             }
         },
         
-        # Layer navigation and tools (bottom row)
+        # Layer navigation and tools (left column, C0)
         Key.R3C0: {  # Modifier key
             'action_type': ActionType.LAYER,
             'action': LayerAction.MODIFIER,
@@ -136,7 +136,7 @@ VS2022_LAYER = {
                 'held': (200, 100, 255)
             }
         },
-        Key.R3C1: {  # Back to main layer (adjust target as needed)
+        Key.R2C0: {  # Back to main layer (adjust target as needed)
             'action_type': ActionType.LAYER,
             'action': 0,  # Change this to your main layer index
             'colors': {
@@ -145,7 +145,7 @@ VS2022_LAYER = {
                 'held': (210, 100, 255)
             }
         },
-        Key.R3C2: {  # Code Cleanup
+        Key.R1C0: {  # Code Cleanup
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.K, Keycode.CONTROL, Keycode.D],
             'colors': {
@@ -154,7 +154,7 @@ VS2022_LAYER = {
                 'held': (220, 100, 255)
             }
         },
-        Key.R3C3: {  # Error List
+        Key.R0C0: {  # Error List
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.BACKSLASH, Keycode.E],
             'colors': {
@@ -12,7 +12,7 @@ VSCODE_LAYER = {
     'description': 'Visual Studio Code shortcuts and commands',
     'color': Color.BLUE,  # VS Code blue theme
     'keys': {
-        # Navigation and file operations (top row)
+        # Navigation and file operations (right column, C3)
         Key.R3C3: {  # Quick Open
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.P],
@@ -50,7 +50,7 @@ VSCODE_LAYER = {
             }
         },
         
-        # Editing and refactoring (second row)
+        # Editing and refactoring (column C2)
         Key.R3C2: {  # Format Document
             'action_type': ActionType.KEY,
             'action': [Keycode.SHIFT, Keycode.ALT, Keycode.F],
@@ -78,7 +78,7 @@ VSCODE_LAYER = {
                 'held': (120, 220, 255)
             }
         },
-        Key.R1C3: {  # Find References
+        Key.R0C2: {  # Find References
             'action_type': ActionType.KEY,
             'action': [Keycode.SHIFT, Keycode.F12],
             'colors': {
@@ -88,7 +88,7 @@ VSCODE_LAYER = {
             }
         },
         
-        # Debugging and running (third row)
+        # Debugging and running (column C1)
         Key.R3C1: {  # Start Debugging
             'action_type': ActionType.KEY,
             'action': [Keycode.F5],
@@ -107,7 +107,7 @@ VSCODE_LAYER = {
                 'held': (140, 180, 255)
             }
         },
-        Key.R2C2: {  # Step Over
+        Key.R1C1: {  # Step Over
             'action_type': ActionType.KEY,
             'action': [Keycode.F10],
             'colors': {
@@ -116,7 +116,7 @@ VSCODE_LAYER = {
                 'held': (140, 220, 255)
             }
         },
-        Key.R2C3: {  # Step Into
+        Key.R0C1: {  # Step Into
             'action_type': ActionType.KEY,
             'action': [Keycode.F11],
             'colors': {
@@ -126,7 +126,7 @@ VSCODE_LAYER = {
             }
         },
         
-        # Layer navigation (bottom row)
+        # Layer navigation (left column, C0)
         Key.R3C0: {  # Modifier key
             'action_type': ActionType.LAYER,
             'action': LayerAction.MODIFIER,
@@ -136,7 +136,7 @@ VSCODE_LAYER = {
                 'held': (100, 150, 255)
             }
         },
-        Key.R3C1: {  # Back to main layer (adjust target as needed)
+        Key.R2C0: {  # Back to main layer (adjust target as needed)
             'action_type': ActionType.LAYER,
             'action': 0,  # Change this to your main layer index
             'colors': {
@@ -145,7 +145,7 @@ VSCODE_LAYER = {
                 'held': (100, 160, 255)
             }
         },
-        Key.R3C2: {  # Quick Save All
+        Key.R1C0: {  # Quick Save All
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.K, Keycode.S],
             'colors': {
@@ -154,7 +154,7 @@ VSCODE_LAYER = {
                 'held': (100, 170, 255)
             }
         },
-        Key.R3C3: {  # Close All Editors
+        Key.R0C0: {  # Close All Editors
             'action_type': ActionType.KEY,
             'action': [Keycode.CONTROL, Keycode.K, Keycode.W],
             'colors': {
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Latency and scan-rate benchmarks for the KeybowFlow runtime.
+Drives KeybowController through scripts/simulator.py with synthetic key streams
+and reports host-side timings as JSON.
+
+Usage:
+    python scripts/benchmark.py                          # all example keymaps
+    python scripts/benchmark.py examples/configs/streaming_setup.py -o bench.json
+    python scripts/benchmark.py --compare baseline.json  # exit 1 on regressions
+
+Latency is measured from the start of the scan that sees a switch edge to the first
+HID report it produces, in host CPU time. Absolute numbers are far lower than on an
+RP2040; compare runs made on the same machine.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from simulator import REPO_ROOT, Simulator, example_keymaps  # noqa: E402
+
+# Percent slowdown of a percentile or loop rate that --compare reports as a regression
+DEFAULT_THRESHOLD = 25.0
+REPEATS = 20
+LOOP_SCANS = 2000
+
+
+def percentiles(samples_ns):
+    if not samples_ns:
+        return None
+    ordered = sorted(samples_ns)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] / 1000.0, 3)
+
+    return {
+        "count": len(ordered),
+        "p50_us": pick(0.50),
+        "p90_us": pick(0.90),
+        "p99_us": pick(0.99),
+        "max_us": round(ordered[-1] / 1000.0, 3),
+    }
+
+
+class Bench:
+    """A Simulator instrumented with host-time report timestamps."""
+
+    def __init__(self, path):
+        self.sim = Simulator(path)
+        self.controller = self.sim.controller
+        self.kinds = self.sim.runtime
+        self._report_times = []
+        for device in self.sim.devices:
+            self._wrap(device)
+        # The report builder keeps the keyboard's send_report from start-up
+        self.controller.reports._send_report = self.sim.keyboard_device.send_report
+
+    def _wrap(self, device):
+        send_report = device.send_report
+
+        def timed_send_report(report, report_id=None):
+            self._report_times.append(time.perf_counter_ns())
+            send_report(report, report_id)
+
+        device.send_report = timed_send_report
+
+    def records(self):
+        layer = self.controller.current_layer
+        return list(enumerate(self.controller.key_table[layer]))
+
+    def keys_of_kind(self, *kinds):
+        return [n for n, record in self.records() if record.kind in kinds]
+
+    def edge(self, key, pressed):
+        """Flip a switch and scan once; returns (latency to first report or None, scan time)."""
+        self._report_times.clear()
+        self.sim.hardware.switches[key] = pressed
+        start = time.perf_counter_ns()
+        self.sim.scan()
+        end = time.perf_counter_ns()
+        latency = self._report_times[0] - start if self._report_times else None
+        return latency, end - start
+
+    def settle(self, ms=50):
+        self.sim.run_for(ms)
+
+
+def scenario_single_taps(bench):
+    latencies = []
+    keys = bench.keys_of_kind(bench.kinds.KIND_KEY)
+    for _ in range(REPEATS):
+        for key in keys:
+            latency, _ = bench.edge(key, True)
+            bench.sim.run_for(20)
+            bench.edge(key, False)
+            bench.settle(10)
+            if latency is not None:
+                latencies.append(latency)
+    return latencies
+
+
+def _chord_fits(bench, chord):
+    """True when the chord's non-modifier keycodes fit a 6-key boot report."""
+    table = bench.controller.key_table[bench.controller.current_layer]
+    codes = set()
+    for key in chord:
+        codes.update(code for code in table[key].payload if code < 0xE0)
+    return len(codes) <= 6
+
+
+def scenario_rolling_chords(bench):
+    latencies = []
+    keys = bench.keys_of_kind(bench.kinds.KIND_KEY)
+    if len(keys) < 4:
+        return None
+    chords = [[keys[(i + j) % len(keys)] for j in range(4)] for i in range(len(keys))]
+    chords = [chord for chord in chords if _chord_fits(bench, chord)]
+    if not chords:
+        return None
+    for i in range(REPEATS * 2):
+        chord = chords[i % len(chords)]
+        for key in chord:
+            latency, _ = bench.edge(key, True)
+            bench.sim.run_for(5)
+            if latency is not None:
+                latencies.append(latency)
+        for key in chord:
+            bench.edge(key, False)
+            bench.sim.run_for(5)
+        bench.settle(10)
+    return latencies
+
+
+def scenario_dual_with_modifier(bench):
+    modifiers = bench.keys_of_kind(bench.kinds.KIND_MODIFIER)
+    duals = bench.keys_of_kind(bench.kinds.KIND_DUAL)
+    if not modifiers or not duals:
+        return None
+    latencies = []
+    home = bench.controller.current_layer
+    for _ in range(REPEATS):
+        for key in duals:
+            bench.edge(modifiers[0], True)
+            latency, scan = bench.edge(key, True)
+            latencies.append(latency if latency is not None else scan)
+            bench.edge(key, False)
+            bench.edge(modifiers[0], False)
+            if bench.controller.current_layer != home:
+                bench.controller.switch_layer(home)
+            bench.settle(10)
+    return latencies
+
+
+def scenario_layer_switch_storm(bench):
+    """Time whole scans that switch layers (LED diff and flush included)."""
+    layers = sorted(bench.controller.key_table)
+    if len(layers) < 2:
+        return None
+    samples = []
+    for i in range(REPEATS * 10):
+        target = layers[i % len(layers)]
+        start = time.perf_counter_ns()
+        bench.controller.switch_layer(target)
+        bench.sim.scan()
+        samples.append(time.perf_counter_ns() - start)
+    bench.controller.switch_layer(layers[0])
+    bench.settle(10)
+    return samples
+
+
+def scenario_string_macros(bench):
+    """Scan times while the longest STRING action plays back."""
+    strings = bench.keys_of_kind(bench.kinds.KIND_STRING)
+    if not strings:
+        return None
+    table = bench.controller.key_table[bench.controller.current_layer]
+    key = max(strings, key=lambda n: len(table[n].payload))
+    samples = []
+    for _ in range(REPEATS // 4 or 1):
+        bench.edge(key, True)
+        bench.edge(key, False)
+        for _ in range(10000):
+            _, scan = bench.edge(key, False)
+            samples.append(scan)
+            if not bench.controller.scheduler.busy:
+                break
+        bench.settle(10)
+    return samples
+
+
+def scenario_tap_hold(bench):
+    """Latency of tap-hold decisions: the release that makes a tap, the scan whose deadline makes a hold."""
+    keys = bench.keys_of_kind(bench.kinds.KIND_TAP_HOLD)
+    if not keys:
+        return None
+    tap_hold = bench.controller.tap_hold
+    home = bench.controller.current_layer
+    latencies = []
+    for _ in range(REPEATS):
+        for key in keys:
+            bench.edge(key, True)
+            bench.sim.run_for(20)
+            latency, _ = bench.edge(key, False)
+            if latency is not None:
+                latencies.append(latency)
+            bench.settle(10)
+            bench.edge(key, True)
+            latency = None
+            while tap_hold.key is not None:
+                latency, _ = bench.edge(key, True)
+            if latency is not None:
+                latencies.append(latency)
+            bench.edge(key, False)
+            if bench.controller.current_layer != home:
+                bench.controller.switch_layer(home)
+            bench.settle(10)
+    return latencies
+
+
+def scenario_animated_taps(bench):
+    """single_taps while the ripple animation draws, to show frames stay off the key path."""
+    keys = bench.keys_of_kind(bench.kinds.KIND_KEY)
+    if not keys:
+        return None
+    import animation
+    animation.time = bench.sim.clock
+    controller = bench.controller
+    controller.animator = animation.Animator(animation.LightingMode.RIPPLE, controller.leds)
+    try:
+        return scenario_single_taps(bench)
+    finally:
+        controller.animator = None
+        controller.update_layer_colors()
+
+
+def loop_rate(bench, scans=LOOP_SCANS):
+    start = time.perf_counter()
+    bench.sim.scan(scans)
+    elapsed = time.perf_counter() - start
+    return round(scans / elapsed, 1)
+
+
+SCENARIOS = (
+    ("single_taps", scenario_single_taps),
+    ("rolling_chords", scenario_rolling_chords),
+    ("dual_with_modifier", scenario_dual_with_modifier),
+    ("layer_switch_storm", scenario_layer_switch_storm),
+    ("string_macros", scenario_string_macros),
+    ("tap_hold", scenario_tap_hold),
+    ("animated_taps", scenario_animated_taps),
+)
+
+
+def run_keymap(path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        bench = Bench(path)
+        result = {"idle_loop_hz": loop_rate(bench), "scenarios": {}}
+        for name, scenario in SCENARIOS:
+            stats = percentiles(scenario(bench) or [])
+            if stats is not None:
+                result["scenarios"][name] = stats
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Return human-readable regressions of `results` against a `baseline` report."""
+    regressions = []
+    for keymap, current in results["keymaps"].items():
+        previous = baseline.get("keymaps", {}).get(keymap)
+        if not previous:
+            continue
+        old_hz, new_hz = previous.get("idle_loop_hz"), current.get("idle_loop_hz")
+        if old_hz and new_hz and new_hz < old_hz * (1 - threshold / 100.0):
+            regressions.append("{}: idle loop {} Hz -> {} Hz".format(keymap, old_hz, new_hz))
+        for name, stats in current["scenarios"].items():
+            old = previous.get("scenarios", {}).get(name)
+            if not old:
+                continue
+            for metric in ("p50_us", "p99_us"):
+                if stats[metric] > old[metric] * (1 + threshold / 100.0):
+                    regressions.append("{}: {} {} {} -> {}".format(
+                        keymap, name, metric, old[metric], stats[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the KeybowFlow runtime on simulated hardware")
+    parser.add_argument("keymaps", nargs="*", help="keymap modules (default: all examples)")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="percent slowdown reported as a regression (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "keymaps": {},
+    }
+    for path in args.keymaps or example_keymaps():
+        name = os.path.relpath(os.path.abspath(path), REPO_ROOT)
+        results["keymaps"][name] = run_keymap(path)
+
+    report = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
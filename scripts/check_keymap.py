@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Check keymap modules for mistakes before they reach the device.
+
+Runs the same load-time checks as the runtime (src/keycheck.py) and also reports
+duplicate keys in dict literals, which Python drops silently when the module is
+imported (only the last `Key.R3C1: {...}` entry survives). Layers the keymap
+references by module name are loaded and checked too.
+
+Usage:
+    python scripts/check_keymap.py                       # src/keymap.py and every example
+    python scripts/check_keymap.py examples/layers/vscode_layer.py
+
+Exits 1 if any keymap has errors, duplicate keys included; warnings are reported only.
+"""
+
+import argparse
+import ast
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from simulator import REPO_ROOT, SRC_DIR, SimClock, example_keymaps, install_fake_modules, load_keymap  # noqa: E402
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import constants  # noqa: E402
+from keycheck import validate_layers  # noqa: E402
+from layercache import resolve_references  # noqa: E402
+from log import ERROR  # noqa: E402
+
+
+def _constant_key(node):
+    """Value of a dict key written as a literal or a constants attribute (Key.R3C1), else None."""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        owner = getattr(constants, node.value.id, None)
+        if owner is not None and hasattr(owner, node.attr):
+            return getattr(owner, node.attr)
+    return None
+
+
+def find_duplicate_keys(source, filename="<keymap>"):
+    """Return (line, message) for every dict literal key that repeats an earlier one."""
+    duplicates = []
+    for node in ast.walk(ast.parse(source, filename)):
+        if not isinstance(node, ast.Dict):
+            continue
+        seen = {}
+        for key in node.keys:
+            if key is None:
+                continue
+            value = _constant_key(key)
+            if value is None:
+                continue
+            text = ast.get_source_segment(source, key) or repr(value)
+            if value in seen:
+                duplicates.append((key.lineno, "duplicate key {} overrides line {}".format(text, seen[value])))
+            seen[value] = key.lineno
+    return duplicates
+
+
+def check_keymap(path):
+    """Return (errors, warnings) as lists of printable lines for one keymap module."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    # The overridden entry never reaches the device, so a duplicate is always a mistake
+    errors = ["line {}: {}".format(line, message) for line, message in find_duplicate_keys(source, path)]
+    install_fake_modules(SimClock())
+    with contextlib.redirect_stdout(io.StringIO()):
+        module = load_keymap(path)
+    problems = validate_layers(
+        resolve_references(module.LAYERS), getattr(module, "COLORS", constants.DEFAULT_COLORS), module.CONFIG
+    )
+    errors.extend(str(problem) for problem in problems if problem.severity == ERROR)
+    warnings = [str(problem) for problem in problems if problem.severity != ERROR]
+    return errors, warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check KeybowFlow keymaps for mistakes")
+    parser.add_argument("keymaps", nargs="*", help="keymap modules (default: src/keymap.py and every example)")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.keymaps or example_keymaps():
+        name = os.path.relpath(os.path.abspath(path), REPO_ROOT)
+        try:
+            errors, warnings = check_keymap(path)
+        except Exception as e:
+            errors, warnings = ["cannot load: {}".format(e)], []
+        print("{} {}".format("FAIL" if errors else "ok  ", name))
+        for line in errors:
+            print("       error: " + line)
+        for line in warnings:
+            print("       warning: " + line)
+        failed = failed or bool(errors)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Compile a keymap module into a binary keymap image for the device.
+
+The image holds packed key records, the color palette and every string the
+keymap uses, stored once. When keymap.kbf is present on CIRCUITPY the runtime
+loads it (src/keyimage.py) instead of importing keymap.py. Keymaps with errors
+from scripts/check_keymap.py are refused, so the device never re-checks an image.
+Layers the keymap references by module name are built into the image. CONFIG
+values must be None, bools, 32-bit integers, floats, text or lists of integers.
+
+Usage:
+    python scripts/compile_keymap.py                                   # src/keymap.py -> keymap.kbf
+    python scripts/compile_keymap.py examples/configs/streaming_setup.py -o keymap.kbf
+"""
+
+import argparse
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from check_keymap import check_keymap  # noqa: E402
+from simulator import SRC_DIR, SimClock, install_fake_modules, load_keymap  # noqa: E402
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import keyimage  # noqa: E402
+from constants import DEFAULT_COLORS  # noqa: E402
+from debounce import format_key_settings, key_settings  # noqa: E402
+from layercache import resolve_references  # noqa: E402
+from keytable import (  # noqa: E402
+    KIND_KEY, KIND_LAYER, KIND_DUAL, KIND_SEQUENCE, KIND_STRING,
+    KIND_CONSUMER, KIND_FUNCTION, KIND_TAP_HOLD, KIND_DELAY, Palette, compile_layers,
+)
+
+DEFAULT_OUTPUT = "keymap.kbf"
+
+
+class ImageWriter:
+    """Interns blobs and records while a keymap is encoded."""
+
+    def __init__(self):
+        self.blobs = []
+        self._blob_index = {}
+        self.records = []
+        self._record_index = {}
+        self._by_identity = {}
+
+    def blob(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        index = self._blob_index.get(data)
+        if index is None:
+            index = len(self.blobs)
+            self.blobs.append(data)
+            self._blob_index[data] = index
+        return index
+
+    def record(self, record):
+        index = self._by_identity.get(id(record))
+        if index is not None:
+            return index
+        packed = self._pack(record)
+        index = self._record_index.get(packed)
+        if index is None:
+            index = len(self.records)
+            self.records.append(packed)
+            self._record_index[packed] = index
+        self._by_identity[id(record)] = index
+        return index
+
+    def _pack(self, record):
+        kind, payload = record.kind, record.payload
+        colors = record.colors or (keyimage.NO_COLORS, 0, 0)
+        a = b = 0
+        if kind == KIND_KEY:
+            a = self.blob(bytes(payload))
+        elif kind == KIND_LAYER or kind == KIND_CONSUMER or kind == KIND_DELAY:
+            if not 0 <= payload <= 0xFFFF:
+                raise ValueError("{} cannot be stored in a keymap image".format(payload))
+            a = payload
+        elif kind == KIND_DUAL:
+            a, b = self.record(record.default), self.record(record.modifier)
+        elif kind == KIND_TAP_HOLD:
+            term, permissive, hold_on_other = payload
+            a = self.blob(struct.pack(
+                keyimage.TAP_HOLD, self.record(record.default), self.record(record.modifier),
+                keyimage.TERM_UNSET if term is None else term,
+                keyimage.FLAG_UNSET if permissive is None else int(bool(permissive)),
+                keyimage.FLAG_UNSET if hold_on_other is None else int(bool(hold_on_other)),
+            ))
+        elif kind == KIND_SEQUENCE:
+            steps = [self.record(step) for step in payload]
+            a = self.blob(struct.pack("<" + "H" * len(steps), *steps))
+        elif kind == KIND_STRING or kind == KIND_FUNCTION:
+            if not isinstance(payload, str):
+                raise ValueError("custom function {!r} cannot be stored in a keymap image".format(payload))
+            a = self.blob(payload)
+        return struct.pack(keyimage.RECORD, kind, colors[0], colors[1], colors[2], a, b)
+
+    def config_entry(self, key, value):
+        if value is None:
+            value_type, value = keyimage.VALUE_NONE, 0
+        elif isinstance(value, bool):
+            value_type, value = keyimage.VALUE_BOOL, int(value)
+        elif isinstance(value, int):
+            value_type = keyimage.VALUE_INT
+        elif isinstance(value, float):
+            value_type, value = keyimage.VALUE_FLOAT, self.blob(repr(value))
+        elif isinstance(value, str):
+            value_type, value = keyimage.VALUE_TEXT, self.blob(value)
+        elif isinstance(value, (list, tuple)) and all(
+            isinstance(item, int) and not isinstance(item, bool) for item in value
+        ):
+            value_type, value = keyimage.VALUE_INTS, self.blob(struct.pack("<" + "i" * len(value), *value))
+        else:
+            raise ValueError(
+                "CONFIG[{!r}] = {!r} cannot be stored in a keymap image "
+                "(values are None, bools, numbers, text or lists of integers)".format(key, value)
+            )
+        return struct.pack(keyimage.CONFIG_ENTRY, self.blob(key), value_type, value)
+
+
+def compile_image(layers, colors, config):
+    """Return the image bytes for a LAYERS/COLORS/CONFIG triple."""
+    palette = Palette(colors)
+    key_table = compile_layers(layers, palette)
+    if len(palette.rgb) >= keyimage.NO_COLORS:
+        raise ValueError("A keymap image holds at most {} colors".format(keyimage.NO_COLORS - 1))
+
+    writer = ImageWriter()
+    layer_entries = []
+    for layer, table in key_table.items():
+        if not isinstance(layer, int) or not 0 <= layer <= 0xFF:
+            raise ValueError("Layer index {!r} cannot be stored in a keymap image".format(layer))
+        name = layers[layer].get('name', "Layer {}".format(layer))
+        indices = [writer.record(record) for record in table]
+        layer_entries.append(struct.pack(keyimage.LAYER, layer, 0, writer.blob(name), *indices))
+    # Per-key debounce settings (CONFIG and key configs) are stored as one text entry
+    debounce_keys = format_key_settings(key_settings(config, layers))
+    config = dict(config)
+    config.pop('debounce_keys', None)
+    if debounce_keys:
+        config['debounce_keys'] = debounce_keys
+    config_entries = [writer.config_entry(key, value) for key, value in config.items()]
+
+    offsets = [0]
+    for data in writer.blobs:
+        offsets.append(offsets[-1] + len(data))
+    if offsets[-1] > 0xFFFF:
+        raise ValueError("Keymap strings exceed 64 KB")
+
+    out = bytearray(struct.pack(
+        keyimage.HEADER, keyimage.MAGIC, keyimage.VERSION, len(layer_entries),
+        len(palette.rgb), len(writer.blobs), len(writer.records), len(config_entries),
+    ))
+    for rgb in palette.rgb:
+        out.extend(bytes(rgb))
+    out.extend(struct.pack("<" + "H" * len(offsets), *offsets))
+    for data in writer.blobs:
+        out.extend(data)
+    for packed in writer.records:
+        out.extend(packed)
+    for entry in layer_entries + config_entries:
+        out.extend(entry)
+    return bytes(out)
+
+
+def compile_keymap(path):
+    """Check and import a keymap module (or single layer file); returns its image bytes."""
+    errors, warnings = check_keymap(path)
+    for line in warnings:
+        print("warning: " + line, file=sys.stderr)
+    if errors:
+        raise ValueError("; ".join(errors))
+    install_fake_modules(SimClock())
+    module = load_keymap(path)
+    layers = resolve_references(module.LAYERS)
+    return compile_image(layers, getattr(module, "COLORS", DEFAULT_COLORS), module.CONFIG)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a KeybowFlow keymap into a binary image")
+    parser.add_argument("keymap", nargs="?", default=os.path.join(SRC_DIR, "keymap.py"),
+                        help="keymap module (default: src/keymap.py)")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help="image file to write (default: %(default)s)")
+    args = parser.parse_args()
+
+    try:
+        image = compile_keymap(args.keymap)
+    except (ImportError, ValueError, struct.error) as e:
+        print("Cannot compile {}: {}".format(args.keymap, e), file=sys.stderr)
+        sys.exit(1)
+    with open(args.output, "wb") as f:
+        f.write(image)
+    print("Wrote {} ({} bytes from {})".format(args.output, len(image), args.keymap))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,28 @@
 """
 Deployment script for copying runtime files to a CIRCUITPY device.
 For manual use: copy src/*.py to your CIRCUITPY drive.
+
+Usage: python scripts/deploy.py [config-file] [--strip-logs debug|info|warning|error] [--image]
+
+--strip-logs removes log calls at or below the given level from the copied files,
+so shipped builds pay nothing for them (not even the call).
+
+--image also compiles keymap.py into keymap.kbf (see scripts/compile_keymap.py),
+which the runtime loads instead of importing keymap.py. Without it, any
+keymap.kbf left on the device is removed so the copied keymap.py takes effect.
+
+Layer modules the keymap references by name (e.g. "media_layer.MEDIA_LAYER")
+are copied from examples/layers when they are not in src/.
 """
 
+import ast
 import sys
 import shutil
 from pathlib import Path
 
+# Log functions removed by --strip-logs, from most to least verbose
+LOG_FUNCTIONS = ("log_debug", "log_info", "log_warning", "log_error")
+
 def find_circuitpy():
     """Find CIRCUITPY drive on Windows."""
     for drive in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
@@ -16,8 +32,63 @@ def find_circuitpy():
             return Path(f"{drive}:")
     return None
 
+
+class _LogCallStripper(ast.NodeTransformer):
+    def __init__(self, names):
+        self.names = names
+
+    def visit_Expr(self, node):
+        call = node.value
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id in self.names:
+            return None
+        return node
+
+    def generic_visit(self, node):
+        super().generic_visit(node)
+        # Keep blocks whose only statements were log calls syntactically valid
+        body = getattr(node, "body", None)
+        if isinstance(body, list) and not body:
+            body.append(ast.Pass())
+        return node
+
+
+def strip_log_calls(source, level):
+    """Return `source` without log calls at or below `level` (e.g. "debug")."""
+    names = LOG_FUNCTIONS[:LOG_FUNCTIONS.index("log_" + level) + 1]
+    tree = _LogCallStripper(set(names)).visit(ast.parse(source))
+    return ast.unparse(ast.fix_missing_locations(tree)) + "\n"
+
+
+def referenced_layer_files(source, layers_dir=Path("examples/layers")):
+    """Layer files in `layers_dir` named by string constants in a keymap's source."""
+    files = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            path = layers_dir / (node.value.partition(".")[0] + ".py")
+            if node.value and path.exists() and path not in files:
+                files.append(path)
+    return files
+
+
+def parse_args(argv):
+    config, strip_level, image = "", None, False
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--strip-logs":
+            strip_level = args.pop(0) if args else "debug"
+            if "log_" + strip_level not in LOG_FUNCTIONS:
+                print(f"Unknown log level: {strip_level}")
+                sys.exit(1)
+        elif arg == "--image":
+            image = True
+        else:
+            config = arg
+    return config, strip_level, image
+
+
 def main():
-    config = sys.argv[1] if len(sys.argv) > 1 else ""
+    config, strip_level, image = parse_args(sys.argv[1:])
     
     # Find device
     device = find_circuitpy()
@@ -38,8 +109,28 @@ def main():
     # Copy source files
     src_dir = Path("src")
     for py_file in src_dir.glob("*.py"):
+        if strip_level and py_file.name != "keymap.py":
+            source = strip_log_calls(py_file.read_text(encoding="utf-8"), strip_level)
+            (device / py_file.name).write_text(source, encoding="utf-8")
+            print(f"Copied: {py_file.name} (log calls <= {strip_level} stripped)")
+            continue
         shutil.copy2(py_file, device / py_file.name)
         print(f"Copied: {py_file.name}")
+
+    keymap_source = (src_dir / "keymap.py").read_text(encoding="utf-8")
+    for layer_file in referenced_layer_files(keymap_source):
+        if not (src_dir / layer_file.name).exists():
+            shutil.copy2(layer_file, device / layer_file.name)
+            print(f"Copied: {layer_file.name} (referenced layer)")
+
+    image_path = device / "keymap.kbf"
+    if image:
+        from compile_keymap import compile_keymap
+        image_path.write_bytes(compile_keymap(str(src_dir / "keymap.py")))
+        print(f"Compiled: keymap.kbf ({image_path.stat().st_size} bytes)")
+    elif image_path.exists():
+        image_path.unlink()
+        print("Removed stale keymap.kbf")
     
     print("Deploy completed")
 
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Heap used by each example keymap and the runtime structures built from it.
+
+CPython has no gc.mem_free(), so this traces allocations with tracemalloc while a
+simulated controller starts and attributes what is still alive afterwards to the
+keymap module (its dict tree) or to the runtime modules in src/ (key tables, LED
+frames, controller state). Module bytecode is not counted. Object sizes differ
+from CircuitPython's, so compare configurations and revisions rather than reading the
+numbers as RP2040 bytes; on the device, code.py logs the real gc.mem_free() figures.
+
+Usage:
+    python scripts/memory_report.py                  # every example keymap
+    python scripts/memory_report.py keymap.kbf --json
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from simulator import REPO_ROOT, SRC_DIR, Simulator, example_keymaps  # noqa: E402
+
+
+def measure(path):
+    """Return {'keymap': bytes, 'runtime': bytes} still allocated after start-up."""
+    keymap_file = os.path.abspath(path)
+    gc.collect()
+    tracemalloc.start(25)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim = Simulator(path)
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    totals = {"keymap": 0, "runtime": 0}
+    for trace in snapshot.traces:
+        # Count blocks allocated by keymap or src/ code itself; imports (bytecode) and
+        # the simulator's fakes are allocated by other frames and left out
+        filename = os.path.abspath(trace.traceback[-1].filename)
+        if filename == keymap_file or os.path.basename(filename) == "keymap.py":
+            totals["keymap"] += trace.size
+        elif filename.startswith(SRC_DIR):
+            totals["runtime"] += trace.size
+    del sim
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report heap used by KeybowFlow keymaps")
+    parser.add_argument("keymaps", nargs="*", help="keymap modules or .kbf images (default: all examples)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    results = {}
+    for path in args.keymaps or example_keymaps():
+        results[os.path.relpath(os.path.abspath(path), REPO_ROOT)] = measure(path)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return
+    print("{:<45} {:>10} {:>10} {:>10}".format("keymap", "keymap B", "runtime B", "total B"))
+    for name, totals in results.items():
+        print("{:<45} {:>10} {:>10} {:>10}".format(
+            name, totals["keymap"], totals["runtime"], totals["keymap"] + totals["runtime"]))
+
+
+if __name__ == "__main__":
+    main()
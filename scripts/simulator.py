@@ -0,0 +1,810 @@
+#!/usr/bin/env python3
+"""
+Host-side simulator for the KeybowFlow runtime.
+Runs KeybowController on plain CPython with simulated PMK hardware and HID devices.
+
+Usage:
+    python scripts/simulator.py examples/configs/gaming_simple.py --tap 3 --tap 7
+    python scripts/simulator.py --smoke          # exercise every example keymap
+    python scripts/simulator.py keymap.kbf --tap 0  # run a compiled keymap image
+
+From Python:
+    from simulator import Simulator
+    sim = Simulator("examples/configs/streaming_setup.py")
+    sim.tap(3)
+    print(sim.keyboard_reports())
+"""
+
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+
+# Runtime modules that are reloaded fresh for every simulated controller
+_RUNTIME_MODULES = ("keymap", "constants", "keybowflow_code")
+
+
+# =====================================================================================
+# Clock
+# =====================================================================================
+
+class SimClock:
+    """Stand-in for the `time` module used by the runtime.
+
+    In virtual mode time only moves when `advance`/`sleep` are called, so scripted
+    timings are exact and runs are reproducible. In real mode it forwards to CPython.
+    """
+
+    def __init__(self, virtual=True):
+        import time as _time
+        self._time = _time
+        self.virtual = virtual
+        self._now_ns = 0
+        self.scan_cost_ns = 0
+
+    def monotonic_ns(self):
+        if self.virtual:
+            return self._now_ns
+        return self._time.monotonic_ns()
+
+    def monotonic(self):
+        return self.monotonic_ns() / 1e9
+
+    def time(self):
+        return self.monotonic()
+
+    def sleep(self, seconds):
+        if self.virtual:
+            self._now_ns += int(seconds * 1e9)
+        else:
+            self._time.sleep(seconds)
+
+    def advance(self, ns):
+        if self.virtual:
+            self._now_ns += int(ns)
+
+    def localtime(self, *args):
+        return self._time.localtime(*args)
+
+    def struct_time(self, *args):
+        return self._time.struct_time(*args)
+
+
+# =====================================================================================
+# Fake usb_hid / adafruit_hid
+# =====================================================================================
+
+class SimHIDDevice:
+    """A usb_hid.Device that records every report sent to the host."""
+
+    def __init__(self, clock, name, usage_page, usage, report_length):
+        self.clock = clock
+        self.name = name
+        self.usage_page = usage_page
+        self.usage = usage
+        self.report_length = report_length
+        self.reports = []  # (monotonic_ns, bytes)
+
+    def send_report(self, report, report_id=None):
+        self.reports.append((self.clock.monotonic_ns(), bytes(report)))
+
+    def get_last_received_report(self, report_id=None):
+        return None
+
+
+class Keycode:
+    """USB HID keycodes (subset of adafruit_hid.keycode.Keycode, same values)."""
+
+    A = 0x04
+    B = 0x05
+    C = 0x06
+    D = 0x07
+    E = 0x08
+    F = 0x09
+    G = 0x0A
+    H = 0x0B
+    I = 0x0C  # noqa: E741
+    J = 0x0D
+    K = 0x0E
+    L = 0x0F
+    M = 0x10
+    N = 0x11
+    O = 0x12  # noqa: E741
+    P = 0x13
+    Q = 0x14
+    R = 0x15
+    S = 0x16
+    T = 0x17
+    U = 0x18
+    V = 0x19
+    W = 0x1A
+    X = 0x1B
+    Y = 0x1C
+    Z = 0x1D
+    ONE = 0x1E
+    TWO = 0x1F
+    THREE = 0x20
+    FOUR = 0x21
+    FIVE = 0x22
+    SIX = 0x23
+    SEVEN = 0x24
+    EIGHT = 0x25
+    NINE = 0x26
+    ZERO = 0x27
+    ENTER = 0x28
+    RETURN = ENTER
+    ESCAPE = 0x29
+    BACKSPACE = 0x2A
+    TAB = 0x2B
+    SPACEBAR = 0x2C
+    SPACE = SPACEBAR
+    MINUS = 0x2D
+    EQUALS = 0x2E
+    LEFT_BRACKET = 0x2F
+    RIGHT_BRACKET = 0x30
+    BACKSLASH = 0x31
+    POUND = 0x32
+    SEMICOLON = 0x33
+    QUOTE = 0x34
+    GRAVE_ACCENT = 0x35
+    COMMA = 0x36
+    PERIOD = 0x37
+    FORWARD_SLASH = 0x38
+    CAPS_LOCK = 0x39
+    F1 = 0x3A
+    F2 = 0x3B
+    F3 = 0x3C
+    F4 = 0x3D
+    F5 = 0x3E
+    F6 = 0x3F
+    F7 = 0x40
+    F8 = 0x41
+    F9 = 0x42
+    F10 = 0x43
+    F11 = 0x44
+    F12 = 0x45
+    PRINT_SCREEN = 0x46
+    SCROLL_LOCK = 0x47
+    PAUSE = 0x48
+    INSERT = 0x49
+    HOME = 0x4A
+    PAGE_UP = 0x4B
+    DELETE = 0x4C
+    END = 0x4D
+    PAGE_DOWN = 0x4E
+    RIGHT_ARROW = 0x4F
+    LEFT_ARROW = 0x50
+    DOWN_ARROW = 0x51
+    UP_ARROW = 0x52
+    KEYPAD_NUMLOCK = 0x53
+    KEYPAD_FORWARD_SLASH = 0x54
+    KEYPAD_ASTERISK = 0x55
+    KEYPAD_MINUS = 0x56
+    KEYPAD_PLUS = 0x57
+    KEYPAD_ENTER = 0x58
+    KEYPAD_ONE = 0x59
+    KEYPAD_TWO = 0x5A
+    KEYPAD_THREE = 0x5B
+    KEYPAD_FOUR = 0x5C
+    KEYPAD_FIVE = 0x5D
+    KEYPAD_SIX = 0x5E
+    KEYPAD_SEVEN = 0x5F
+    KEYPAD_EIGHT = 0x60
+    KEYPAD_NINE = 0x61
+    KEYPAD_ZERO = 0x62
+    KEYPAD_PERIOD = 0x63
+    KEYPAD_BACKSLASH = 0x64
+    APPLICATION = 0x65
+    POWER = 0x66
+    KEYPAD_EQUALS = 0x67
+    F13 = 0x68
+    F14 = 0x69
+    F15 = 0x6A
+    F16 = 0x6B
+    F17 = 0x6C
+    F18 = 0x6D
+    F19 = 0x6E
+    F20 = 0x6F
+    F21 = 0x70
+    F22 = 0x71
+    F23 = 0x72
+    F24 = 0x73
+    LEFT_CONTROL = 0xE0
+    CONTROL = LEFT_CONTROL
+    LEFT_SHIFT = 0xE1
+    SHIFT = LEFT_SHIFT
+    LEFT_ALT = 0xE2
+    ALT = LEFT_ALT
+    OPTION = ALT
+    LEFT_GUI = 0xE3
+    GUI = LEFT_GUI
+    WINDOWS = GUI
+    COMMAND = GUI
+    RIGHT_CONTROL = 0xE4
+    RIGHT_SHIFT = 0xE5
+    RIGHT_ALT = 0xE6
+    RIGHT_GUI = 0xE7
+
+    @classmethod
+    def modifier_bit(cls, keycode):
+        return 1 << (keycode - 0xE0) if 0xE0 <= keycode <= 0xE7 else 0
+
+
+class ConsumerControlCode:
+    """USB HID consumer control codes (same values as adafruit_hid)."""
+
+    RECORD = 0xB2
+    FAST_FORWARD = 0xB3
+    REWIND = 0xB4
+    SCAN_NEXT_TRACK = 0xB5
+    SCAN_PREVIOUS_TRACK = 0xB6
+    STOP = 0xB7
+    EJECT = 0xB8
+    PLAY_PAUSE = 0xCD
+    MUTE = 0xE2
+    VOLUME_DECREMENT = 0xEA
+    VOLUME_INCREMENT = 0xE9
+    BRIGHTNESS_DECREMENT = 0x70
+    BRIGHTNESS_INCREMENT = 0x6F
+
+
+def find_device(devices, *, usage_page, usage):
+    for device in devices:
+        if device.usage_page == usage_page and device.usage == usage:
+            return device
+    raise ValueError("Could not find matching HID device.")
+
+
+class Keyboard:
+    """Mirror of adafruit_hid.keyboard.Keyboard's report handling."""
+
+    def __init__(self, devices, timeout=None):
+        self._keyboard_device = find_device(devices, usage_page=0x1, usage=0x06)
+        self.report = bytearray(8)
+        self.report_modifier = memoryview(self.report)[0:1]
+        self.report_keys = memoryview(self.report)[2:]
+        self.release_all()
+
+    def press(self, *keycodes):
+        for keycode in keycodes:
+            self._add_keycode_to_report(keycode)
+        self._keyboard_device.send_report(self.report)
+
+    def release(self, *keycodes):
+        for keycode in keycodes:
+            self._remove_keycode_from_report(keycode)
+        self._keyboard_device.send_report(self.report)
+
+    def release_all(self):
+        for i in range(8):
+            self.report[i] = 0
+        self._keyboard_device.send_report(self.report)
+
+    def send(self, *keycodes):
+        self.press(*keycodes)
+        self.release_all()
+
+    def _add_keycode_to_report(self, keycode):
+        modifier = Keycode.modifier_bit(keycode)
+        if modifier:
+            self.report_modifier[0] |= modifier
+            return
+        for i in range(6):
+            if self.report_keys[i] == keycode:
+                return
+        for i in range(6):
+            if self.report_keys[i] == 0:
+                self.report_keys[i] = keycode
+                return
+        raise ValueError("Trying to press more than six keys at once.")
+
+    def _remove_keycode_from_report(self, keycode):
+        modifier = Keycode.modifier_bit(keycode)
+        if modifier:
+            self.report_modifier[0] &= ~modifier
+            return
+        for i in range(6):
+            if self.report_keys[i] == keycode:
+                self.report_keys[i] = 0
+
+    @property
+    def led_status(self):
+        return b"\x00"
+
+    def led_on(self, led_code):
+        return False
+
+
+# Printable ASCII -> (shift, keycode), as in adafruit_hid.keyboard_layout_us
+_ASCII_UNSHIFTED = {
+    " ": Keycode.SPACE, "\n": Keycode.ENTER, "\t": Keycode.TAB, "\b": Keycode.BACKSPACE,
+    "-": Keycode.MINUS, "=": Keycode.EQUALS, "[": Keycode.LEFT_BRACKET,
+    "]": Keycode.RIGHT_BRACKET, "\\": Keycode.BACKSLASH, ";": Keycode.SEMICOLON,
+    "'": Keycode.QUOTE, "`": Keycode.GRAVE_ACCENT, ",": Keycode.COMMA,
+    ".": Keycode.PERIOD, "/": Keycode.FORWARD_SLASH, "0": Keycode.ZERO,
+}
+_ASCII_SHIFTED = {
+    "!": Keycode.ONE, "@": Keycode.TWO, "#": Keycode.THREE, "$": Keycode.FOUR,
+    "%": Keycode.FIVE, "^": Keycode.SIX, "&": Keycode.SEVEN, "*": Keycode.EIGHT,
+    "(": Keycode.NINE, ")": Keycode.ZERO, "_": Keycode.MINUS, "+": Keycode.EQUALS,
+    "{": Keycode.LEFT_BRACKET, "}": Keycode.RIGHT_BRACKET, "|": Keycode.BACKSLASH,
+    ":": Keycode.SEMICOLON, '"': Keycode.QUOTE, "~": Keycode.GRAVE_ACCENT,
+    "<": Keycode.COMMA, ">": Keycode.PERIOD, "?": Keycode.FORWARD_SLASH,
+}
+
+
+class KeyboardLayoutUS:
+    """Mirror of adafruit_hid.keyboard_layout_us.KeyboardLayoutUS."""
+
+    def __init__(self, keyboard):
+        self.keyboard = keyboard
+
+    def write(self, string, delay=None):
+        for char in string:
+            keycodes = self.keycodes(char)
+            self.keyboard.press(*keycodes)
+            self.keyboard.release_all()
+
+    def keycodes(self, char):
+        if "a" <= char <= "z":
+            return (Keycode.A + ord(char) - ord("a"),)
+        if "A" <= char <= "Z":
+            return (Keycode.SHIFT, Keycode.A + ord(char) - ord("A"))
+        if "1" <= char <= "9":
+            return (Keycode.ONE + ord(char) - ord("1"),)
+        if char in _ASCII_UNSHIFTED:
+            return (_ASCII_UNSHIFTED[char],)
+        if char in _ASCII_SHIFTED:
+            return (Keycode.SHIFT, _ASCII_SHIFTED[char])
+        raise ValueError("No keycode available for character {!r}.".format(char))
+
+
+class ConsumerControl:
+    """Mirror of adafruit_hid.consumer_control.ConsumerControl."""
+
+    def __init__(self, devices, timeout=None):
+        self._consumer_device = find_device(devices, usage_page=0x0C, usage=0x01)
+        self._report = bytearray(2)
+
+    def send(self, consumer_code):
+        self.press(consumer_code)
+        self.release()
+
+    def press(self, consumer_code):
+        self._report[0] = consumer_code & 0xFF
+        self._report[1] = (consumer_code >> 8) & 0xFF
+        self._consumer_device.send_report(self._report)
+
+    def release(self):
+        self._report[0] = self._report[1] = 0x0
+        self._consumer_device.send_report(self._report)
+
+
+# =====================================================================================
+# Fake PMK / Keybow2040
+# =====================================================================================
+
+class SimKeybow2040:
+    """Keybow 2040 hardware with scriptable switches and recorded pixel writes."""
+
+    NUM_KEYS = 16
+
+    def __init__(self):
+        self.switches = [False] * self.NUM_KEYS
+        self.pixels = [(0, 0, 0)] * self.NUM_KEYS
+        self.pixel_writes = 0
+
+    def num_keys(self):
+        return self.NUM_KEYS
+
+    def switch_state(self, number):
+        return self.switches[number]
+
+    def set_pixel(self, number, r, g, b):
+        self.pixels[number] = (r, g, b)
+        self.pixel_writes += 1
+
+
+class SimKey:
+    """Mirror of pmk.Key: edge detection, hold timing and LED state."""
+
+    def __init__(self, number, pmk):
+        self.number = number
+        self._pmk = pmk
+        self.pressed = False
+        self.held = False
+        self.hold_time = 0.75
+        self.press_function = None
+        self.release_function = None
+        self.hold_function = None
+        self.press_func_fired = False
+        self.hold_func_fired = False
+        self.time_of_last_press = 0.0
+        self.rgb = [0, 0, 0]
+        self.lit = False
+        self.led_off()
+
+    def get_state(self):
+        return self._pmk.hardware.switch_state(self.number)
+
+    def update(self):
+        now = self._pmk.clock.monotonic()
+        state = self.get_state()
+        if state and not self.pressed:
+            self.pressed = True
+            self.time_of_last_press = now
+            self.hold_func_fired = False
+            if self.press_function is not None:
+                self.press_function(self)
+        elif state and not self.held and now - self.time_of_last_press >= self.hold_time:
+            self.held = True
+            if self.hold_function is not None and not self.hold_func_fired:
+                self.hold_func_fired = True
+                self.hold_function(self)
+        elif not state and self.pressed:
+            self.pressed = False
+            self.held = False
+            if self.release_function is not None:
+                self.release_function(self)
+
+    def set_led(self, r, g, b):
+        self.rgb = [r, g, b]
+        self.lit = (r, g, b) != (0, 0, 0)
+        if not self._pmk.sleeping:
+            self._pmk.hardware.set_pixel(self.number, r, g, b)
+
+    def led_on(self):
+        self.set_led(*self.rgb)
+
+    def led_off(self):
+        self.lit = False
+        self._pmk.hardware.set_pixel(self.number, 0, 0, 0)
+
+    def toggle_led(self, rgb=None):
+        if self.lit:
+            self.led_off()
+        else:
+            self.set_led(*(rgb or self.rgb))
+
+
+class SimPMK:
+    """Mirror of pmk.PMK, including LED sleep handling."""
+
+    clock = None  # set by Simulator before construction
+
+    def __init__(self, hardware):
+        self.hardware = hardware
+        self.sleeping = False
+        self.was_asleep = False
+        self.led_sleep_enabled = False
+        self.led_sleep_time = 60
+        self.last_led_states = None
+        self.keys = [SimKey(i, self) for i in range(hardware.num_keys())]
+        self.time_of_last_press = self.clock.monotonic()
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+        for key in self.keys:
+            key.update()
+        now = self.clock.monotonic()
+        if self.any_pressed():
+            self.time_of_last_press = now
+            self.sleeping = False
+        if self.led_sleep_enabled and not self.sleeping:
+            if now - self.time_of_last_press > self.led_sleep_time:
+                self.last_led_states = [k.rgb if k.lit else [0, 0, 0] for k in self.keys]
+                self.set_all(0, 0, 0)
+                self.sleeping = True
+                self.was_asleep = True
+        if not self.sleeping and self.was_asleep:
+            for key, rgb in zip(self.keys, self.last_led_states):
+                key.set_led(*rgb)
+            self.was_asleep = False
+        self.clock.advance(self.clock.scan_cost_ns)
+
+    def set_all(self, r, g, b):
+        for key in self.keys:
+            self.hardware.set_pixel(key.number, r, g, b)
+
+    def get_states(self):
+        return [key.pressed for key in self.keys]
+
+    def get_pressed(self):
+        return [key.number for key in self.keys if key.pressed]
+
+    def any_pressed(self):
+        return any(key.pressed for key in self.keys)
+
+    def none_pressed(self):
+        return not self.any_pressed()
+
+    def _attach(self, attr, key, handler):
+        def attach_handler(handler):
+            setattr(key, attr, handler)
+            return handler
+        if handler is not None:
+            return attach_handler(handler)
+        return attach_handler
+
+    def on_press(self, key, handler=None):
+        return self._attach("press_function", key, handler)
+
+    def on_release(self, key, handler=None):
+        return self._attach("release_function", key, handler)
+
+    def on_hold(self, key, handler=None):
+        return self._attach("hold_function", key, handler)
+
+
+# =====================================================================================
+# Module installation
+# =====================================================================================
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install_fake_modules(clock):
+    """Register usb_hid, pmk and adafruit_hid stand-ins in sys.modules."""
+    devices = [
+        SimHIDDevice(clock, "keyboard", 0x1, 0x06, 8),
+        SimHIDDevice(clock, "consumer", 0x0C, 0x01, 2),
+        SimHIDDevice(clock, "mouse", 0x1, 0x02, 4),
+    ]
+    _module("usb_hid", devices=devices, Device=SimHIDDevice)
+
+    SimPMK.clock = clock
+    _module("pmk", PMK=SimPMK, Key=SimKey, __path__=[])
+    _module("pmk.platform", __path__=[])
+    _module("pmk.platform.keybow2040", Keybow2040=SimKeybow2040)
+
+    _module("adafruit_hid", find_device=find_device, __path__=[])
+    _module("adafruit_hid.keycode", Keycode=Keycode)
+    _module("adafruit_hid.keyboard", Keyboard=Keyboard, Keycode=Keycode, find_device=find_device)
+    _module("adafruit_hid.keyboard_layout_us", KeyboardLayoutUS=KeyboardLayoutUS)
+    _module("adafruit_hid.consumer_control", ConsumerControl=ConsumerControl)
+    _module("adafruit_hid.consumer_control_code", ConsumerControlCode=ConsumerControlCode)
+    return devices
+
+
+def _load_source(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _find_layer(module):
+    for value in vars(module).values():
+        if isinstance(value, dict) and "keys" in value and "name" in value:
+            return value
+    raise ValueError("{} defines neither LAYERS nor a layer dict".format(module.__name__))
+
+
+def load_keymap(path):
+    """Load a config or layer file from examples/ (or any keymap.py) as `keymap`.
+
+    Layer files such as examples/layers/vscode_layer.py only define a single layer
+    dict; those are wrapped into a one-layer LAYERS with default CONFIG.
+    """
+    # Layers referenced by module name (src/layercache.py) are imported from next to the
+    # keymap or from examples/layers, as if both were copied to the CIRCUITPY root
+    for folder in (os.path.join(REPO_ROOT, "examples", "layers"), os.path.dirname(os.path.abspath(path))):
+        if folder not in sys.path:
+            sys.path.insert(0, folder)
+    module = _load_source("keymap", path)
+    if not hasattr(module, "LAYERS"):
+        module.LAYERS = {0: _find_layer(module)}
+    if not hasattr(module, "CONFIG"):
+        module.CONFIG = {"default_layer": min(module.LAYERS)}
+    return module
+
+
+def _purge_runtime_modules():
+    src_prefix = os.path.normcase(SRC_DIR)
+    for name, module in list(sys.modules.items()):
+        origin = os.path.normcase(getattr(module, "__file__", None) or "")
+        if name in _RUNTIME_MODULES or origin.startswith(src_prefix):
+            del sys.modules[name]
+
+
+# =====================================================================================
+# Simulator
+# =====================================================================================
+
+class Simulator:
+    """A KeybowController wired to simulated hardware.
+
+    Args:
+        keymap: path to a keymap module (defaults to src/keymap.py) or a compiled
+                .kbf keymap image
+        virtual_time: drive the runtime from a virtual clock (default) or real time
+        scan_cost_us: virtual time consumed by each keybow.update() call
+        config: optional dict merged into the keymap's CONFIG before start-up
+    """
+
+    def __init__(self, keymap=None, virtual_time=True, scan_cost_us=500, config=None):
+        self.clock = SimClock(virtual=virtual_time)
+        self.clock.scan_cost_ns = scan_cost_us * 1000
+        self.devices = install_fake_modules(self.clock)
+        self.keyboard_device, self.consumer_device = self.devices[0], self.devices[1]
+
+        if SRC_DIR not in sys.path:
+            sys.path.insert(0, SRC_DIR)
+        _purge_runtime_modules()
+        keymap = keymap or os.path.join(SRC_DIR, "keymap.py")
+        image = keymap.endswith(".kbf")
+        if not image:
+            keymap_module = load_keymap(keymap)
+            if config:
+                keymap_module.CONFIG = dict(keymap_module.CONFIG, **config)
+
+        # code.py looks for keymap.kbf in the working directory (the CIRCUITPY root on a device)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as root:
+            if image:
+                shutil.copyfile(keymap, os.path.join(root, "keymap.kbf"))
+            os.chdir(root)
+            try:
+                self.runtime = _load_source("keybowflow_code", os.path.join(SRC_DIR, "code.py"))
+            finally:
+                os.chdir(cwd)
+        if image and config:
+            self.runtime.CONFIG.update(config)
+        self._patch_time()
+        self.controller = self.runtime.KeybowController()
+        # Modules the controller imports on demand (e.g. animation) load during start-up
+        self._patch_time()
+        self.keybow = self.controller.keybow
+        self.hardware = self.keybow.hardware
+
+    def _patch_time(self):
+        for name, module in list(sys.modules.items()):
+            origin = getattr(module, "__file__", None) or ""
+            if origin.startswith(SRC_DIR) and getattr(module, "time", None) is not None:
+                module.time = self.clock
+
+    # -- input scripting -------------------------------------------------------------
+
+    def scan(self, count=1):
+        """Run `count` iterations of the controller's main loop body."""
+        for _ in range(count):
+            self.controller.step()
+
+    def press(self, key, scans=1):
+        self.hardware.switches[key] = True
+        self.scan(scans)
+
+    def release(self, key, scans=1):
+        self.hardware.switches[key] = False
+        self.scan(scans)
+
+    def hold(self, key, ms):
+        """Keep `key` down for `ms` milliseconds of scanning (fires PMK holds)."""
+        self.hardware.switches[key] = True
+        self.run_for(ms)
+
+    def tap(self, key, hold_ms=30):
+        self.press(key)
+        self.run_for(hold_ms)
+        self.release(key)
+
+    def run_for(self, ms):
+        """Scan until `ms` milliseconds have elapsed on the simulation clock."""
+        deadline = self.clock.monotonic_ns() + int(ms * 1e6)
+        self.scan()
+        while self.clock.monotonic_ns() < deadline:
+            self.scan()
+
+    def play(self, script):
+        """Replay [(t_ms, key, pressed), ...] with timing relative to now."""
+        start = self.clock.monotonic_ns()
+        for t_ms, key, pressed in sorted(script, key=lambda event: event[0]):
+            target = start + int(t_ms * 1e6)
+            while self.clock.monotonic_ns() < target:
+                self.scan()
+            self.hardware.switches[key] = bool(pressed)
+            self.scan()
+
+    # -- output inspection -----------------------------------------------------------
+
+    def keyboard_reports(self):
+        return list(self.keyboard_device.reports)
+
+    def consumer_reports(self):
+        return list(self.consumer_device.reports)
+
+    def clear_reports(self):
+        for device in self.devices:
+            device.reports.clear()
+
+    def leds(self):
+        return list(self.hardware.pixels)
+
+
+def example_keymaps():
+    """src/keymap.py plus every file in examples/configs and examples/layers."""
+    paths = [os.path.join(SRC_DIR, "keymap.py")]
+    for folder in ("configs", "layers"):
+        paths.extend(sorted(glob.glob(os.path.join(REPO_ROOT, "examples", folder, "*.py"))))
+    return paths
+
+
+def smoke(path):
+    """Tap every key of a keymap, alone and with each modifier key held.
+
+    Returns (keyboard reports, consumer reports, error lines logged by the runtime).
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        sim = Simulator(path)
+        table = sim.controller.key_table[sim.controller.current_layer]
+        modifiers = [n for n, record in enumerate(table) if record.kind == sim.runtime.KIND_MODIFIER]
+        for key in range(16):
+            sim.tap(key)
+            sim.run_for(100)
+        for modifier in modifiers:
+            sim.press(modifier)
+            for key in range(16):
+                if key != modifier:
+                    sim.tap(key)
+                    sim.run_for(100)
+            sim.release(modifier)
+    errors = [line for line in output.getvalue().splitlines() if line.startswith("[ERROR]")]
+    return len(sim.keyboard_reports()), len(sim.consumer_reports()), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a KeybowFlow keymap against simulated hardware")
+    parser.add_argument("keymap", nargs="?", help="keymap module or .kbf image (default: src/keymap.py)")
+    parser.add_argument("--tap", type=int, action="append", default=[], help="tap a key (repeatable)")
+    parser.add_argument("--hold-ms", type=int, default=30, help="how long each tap is held")
+    parser.add_argument("--smoke", action="store_true", help="tap every key of every example keymap")
+    args = parser.parse_args()
+
+    if args.smoke:
+        failed = False
+        for path in [args.keymap] if args.keymap else example_keymaps():
+            name = os.path.relpath(path, REPO_ROOT)
+            try:
+                keyboard, consumer, errors = smoke(path)
+            except Exception as e:
+                print("FAIL {}: {}".format(name, e))
+                failed = True
+                continue
+            status = "FAIL" if errors else "ok  "
+            print("{} {} ({} keyboard / {} consumer reports)".format(status, name, keyboard, consumer))
+            for line in errors:
+                print("       " + line)
+            failed = failed or bool(errors)
+        sys.exit(1 if failed else 0)
+
+    sim = Simulator(args.keymap)
+    for key in args.tap:
+        sim.clear_reports()
+        sim.tap(key, args.hold_ms)
+        layer = sim.controller.current_layer
+        print("key {:2d} -> layer {}".format(key, layer))
+        for t_ns, report in sim.keyboard_reports():
+            print("  {:>10.3f} ms  kbd  {}".format(t_ns / 1e6, report.hex(" ")))
+        for t_ns, report in sim.consumer_reports():
+            print("  {:>10.3f} ms  cc   {}".format(t_ns / 1e6, report.hex(" ")))
+    print("LEDs:", sim.leds())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+KeybowFlow LED animations
+Draws CONFIG['lighting_mode'] effects over the current layer's colors. Each key's
+color is its default color times a 0-255 level from integer lookup tables, so a
+frame needs no floating point.
+
+Frames are drawn a few keys at a time: step() writes keys until the scan's time
+budget is spent and the next scan carries on where it stopped. A frame that
+falls behind is finished late, and the frames missed meanwhile are skipped
+rather than drawn, so animation never holds up key handling.
+"""
+
+import math
+import time
+from array import array
+
+from constants import LightingMode
+from keytable import NUM_KEYS
+
+DEFAULT_FPS = 30
+DEFAULT_PERIOD_MS = 3000     # one breath or wave
+DEFAULT_BUDGET_US = 1000     # drawing time per scan
+
+# Lowest level of a breath, and of a key between wave crests or outside ripples
+BREATHING_FLOOR = 24
+WAVE_FLOOR = 64
+RIPPLE_FLOOR = 48
+
+MAX_RIPPLES = 4
+RIPPLE_MS = 600              # lifetime of one ripple
+RIPPLE_WIDTH = 16            # ring width, in DISTANCE units
+
+# One period of a sine wave as 256 levels (0-255)
+SINE = bytes(int(127.5 + 127.5 * math.sin(2 * math.pi * i / 256)) for i in range(256))
+
+# Linear level to LED level, so a breath looks even rather than mostly bright (gamma 2.2)
+EASE = bytes(int(255 * (i / 255) ** 2.2 + 0.5) for i in range(256))
+
+
+def key_position(key_num):
+    """(row, column) of a key, row 0 at the top (see constants.Key)."""
+    return 3 - key_num % 4, key_num // 4
+
+
+def _distances():
+    table = bytearray(NUM_KEYS * NUM_KEYS)
+    for a in range(NUM_KEYS):
+        row_a, col_a = key_position(a)
+        for b in range(NUM_KEYS):
+            row_b, col_b = key_position(b)
+            table[a * NUM_KEYS + b] = int(16 * math.sqrt((row_a - row_b) ** 2 + (col_a - col_b) ** 2) + 0.5)
+    return bytes(table)
+
+
+# Distance between two keys in 1/16 key pitches: DISTANCE[a * 16 + b]
+DISTANCE = _distances()
+MAX_DISTANCE = max(DISTANCE)
+
+
+class Animator:
+    """Draws one lighting mode into an LedFramebuffer at up to `fps` frames per second."""
+
+    def __init__(self, mode, leds, fps=DEFAULT_FPS, period_ms=DEFAULT_PERIOD_MS, budget_us=DEFAULT_BUDGET_US):
+        self.mode = mode
+        self.leds = leds
+        self.frame_ns = 1000000000 // max(1, fps)
+        self.period_ms = max(1, period_ms)
+        self.budget_ns = budget_us * 1000
+        self.next_frame_ns = 0
+        self.cursor = 0          # next key of the frame being drawn (0 = frame done)
+        self.phase = 0           # position in the period of the frame being drawn, 0-255
+        self.level = 0           # breathing level of the frame being drawn
+        self.frames = 0
+        self.skipped = 0         # frames not drawn because drawing fell behind
+        self.partial = 0         # scans that ran out of budget mid-frame
+        # Ripples: origin key and start time (ms); an origin of NUM_KEYS is a free slot
+        self.ripple_keys = bytearray([NUM_KEYS] * MAX_RIPPLES)
+        self.ripple_ms = array('L', [0] * MAX_RIPPLES)
+        self._ripple_next = 0
+        # Per frame: each ripple's ring radius and strength (0 = faded out)
+        self._radius = bytearray(MAX_RIPPLES)
+        self._strength = bytearray(MAX_RIPPLES)
+
+    @classmethod
+    def from_config(cls, config, leds):
+        """An Animator for CONFIG's lighting_mode, or None for static lighting."""
+        mode = config.get('lighting_mode', LightingMode.STATIC)
+        if mode not in (LightingMode.BREATHING, LightingMode.RIPPLE, LightingMode.WAVE):
+            return None
+        return cls(
+            mode, leds,
+            config.get('animation_fps', DEFAULT_FPS),
+            config.get('animation_period', DEFAULT_PERIOD_MS),
+            config.get('animation_budget_us', DEFAULT_BUDGET_US),
+        )
+
+    def press(self, key_num):
+        """Start a ripple at a pressed key (ripple mode only)."""
+        if self.mode != LightingMode.RIPPLE:
+            return
+        i = self._ripple_next
+        self.ripple_keys[i] = key_num
+        self.ripple_ms[i] = (time.monotonic_ns() // 1000000) & 0xFFFFFFFF
+        self._ripple_next = (i + 1) % MAX_RIPPLES
+
+    def step(self, frame, colored, skip):
+        """Draw keys of the current frame until the budget runs out; returns keys drawn.
+
+        `frame` and `colored` are the layer's default LayerFrames frame and lit keys;
+        keys in `skip` (e.g. keys held down) are left as they are.
+        """
+        now = time.monotonic_ns()
+        if not self.cursor:
+            if now < self.next_frame_ns:
+                return 0
+            if self.next_frame_ns:
+                self.skipped += (now - self.next_frame_ns) // self.frame_ns
+            self.next_frame_ns = now + self.frame_ns
+            self._begin(now // 1000000)
+        deadline = now + self.budget_ns
+        leds = self.leds
+        mode = self.mode
+        key_num = self.cursor
+        drawn = 0
+        while key_num < NUM_KEYS:
+            bit = 1 << key_num
+            if colored & bit and not skip & bit:
+                if mode == LightingMode.BREATHING:
+                    level = self.level
+                elif mode == LightingMode.WAVE:
+                    level = WAVE_FLOOR + (SINE[(self.phase - (key_num // 4) * 32) & 0xFF] * (255 - WAVE_FLOOR) >> 8)
+                else:
+                    level = self._ripple_level(key_num)
+                level += 1
+                offset = key_num * 3
+                leds.set(key_num, frame[offset] * level >> 8, frame[offset + 1] * level >> 8,
+                         frame[offset + 2] * level >> 8)
+                leds.flush()
+                drawn += 1
+                key_num += 1
+                if time.monotonic_ns() >= deadline:
+                    break
+            else:
+                key_num += 1
+        if key_num < NUM_KEYS:
+            self.cursor = key_num
+            self.partial += 1
+        else:
+            self.cursor = 0
+            self.frames += 1
+        return drawn
+
+    def _begin(self, now_ms):
+        phase = (now_ms % self.period_ms) * 256 // self.period_ms
+        self.phase = phase
+        if self.mode == LightingMode.BREATHING:
+            self.level = BREATHING_FLOOR + (EASE[SINE[phase]] * (255 - BREATHING_FLOOR) >> 8)
+        elif self.mode == LightingMode.RIPPLE:
+            for i in range(MAX_RIPPLES):
+                strength = 0
+                if self.ripple_keys[i] < NUM_KEYS:
+                    age = ((now_ms & 0xFFFFFFFF) - self.ripple_ms[i]) & 0xFFFFFFFF
+                    if age < RIPPLE_MS:
+                        self._radius[i] = age * MAX_DISTANCE // RIPPLE_MS
+                        strength = (RIPPLE_MS - age) * 255 // RIPPLE_MS
+                    else:
+                        self.ripple_keys[i] = NUM_KEYS
+                self._strength[i] = strength
+
+    def _ripple_level(self, key_num):
+        level = RIPPLE_FLOOR
+        for i in range(MAX_RIPPLES):
+            strength = self._strength[i]
+            if not strength:
+                continue
+            gap = DISTANCE[self.ripple_keys[i] * NUM_KEYS + key_num] - self._radius[i]
+            if gap < 0:
+                gap = -gap
+            if gap < RIPPLE_WIDTH:
+                ring = strength * (RIPPLE_WIDTH - gap) // RIPPLE_WIDTH
+                if ring > level:
+                    level = ring
+        return level
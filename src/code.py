@@ -4,426 +4,959 @@ Main entry point for keypad events, layer switching, and LED control.
 """
 
 import time
+
+# Boot timing starts with the first import
+BOOT_START_NS = time.monotonic_ns()
+
+import gc
 import usb_hid
 from pmk import PMK
 from pmk.platform.keybow2040 import Keybow2040 as Hardware
 
+# KeyboardLayoutUS and ConsumerControl are imported when the keymap first needs them
 from adafruit_hid.keyboard import Keyboard
-from adafruit_hid.keyboard_layout_us import KeyboardLayoutUS
-from adafruit_hid.consumer_control import ConsumerControl
+
+# Free heap before the keymap loads (gc.mem_free only exists on CircuitPython)
+gc.collect()
+MEM_FREE_AT_START = gc.mem_free() if hasattr(gc, 'mem_free') else None
+
+# Compiled keymap image (scripts/compile_keymap.py), used instead of keymap.py when present
+KEYMAP_IMAGE = "keymap.kbf"
+KEYMAP_SOURCE = "keymap.py"
 
 # Import configuration and constants
-try:
-    from keymap import LAYERS, COLORS, CONFIG
-    print("[INFO] Configuration loaded from keymap.py")
-except Exception as e:
-    print(f"[ERROR] Failed to import configuration from keymap.py: {e}")
-    raise
+KEYMAP_START_NS = time.monotonic_ns()
+import sys
+import keyimage
+from constants import ActionType, Color, LayerAction, Function, LightingMode, DEFAULT_COLORS
 
-from constants import ActionType, Color, LayerAction
 
+def read_keymap(reload=False):
+    """Return (image, LAYERS, CONFIG, COLORS) from keymap.kbf, or from keymap.py without one.
 
-def _safe_has_debug_flag():
+    With reload, keymap.py is imported again rather than taken from sys.modules.
+    """
     try:
-        return bool(CONFIG.get("debug", False))
-    except Exception:
-        return False
-
+        image = keyimage.load(KEYMAP_IMAGE)
+        print(f"[INFO] Configuration loaded from {KEYMAP_IMAGE}")
+        return image, {}, image.config, DEFAULT_COLORS
+    except OSError:
+        pass
+    except Exception as e:
+        print(f"[ERROR] Ignoring unreadable {KEYMAP_IMAGE}: {e}")
+    if reload:
+        sys.modules.pop('keymap', None)
+    keymap = __import__('keymap')
+    print(f"[INFO] Configuration loaded from {KEYMAP_SOURCE}")
+    return None, keymap.LAYERS, keymap.CONFIG, getattr(keymap, 'COLORS', DEFAULT_COLORS)
 
-DEBUG = _safe_has_debug_flag()
 
+try:
+    IMAGE, LAYERS, CONFIG, COLORS = read_keymap()
+except Exception as e:
+    print(f"[ERROR] Failed to import configuration from {KEYMAP_SOURCE}: {e}")
+    raise
+KEYMAP_LOAD_NS = time.monotonic_ns() - KEYMAP_START_NS
+from keytable import (
+    NUM_KEYS, KIND_NONE, KIND_KEY, KIND_MODIFIER, KIND_LAYER, KIND_DUAL,
+    KIND_SEQUENCE, KIND_STRING, KIND_CONSUMER, KIND_FUNCTION, KIND_TAP_HOLD,
+    Palette, compile_layer, compile_layers, layer_records,
+)
+from ledframes import LayerFrames, STATE_DEFAULT, STATE_PRESSED, STATE_HELD, FRAME_SIZE
+from framebuffer import LedFramebuffer
+from hidreport import ReportBuilder
+from scheduler import ActionScheduler, plan_sequence, OP_CONSUMER
+from textreports import TextReportCache, DEFAULT_CACHE_SIZE
+from pacer import ScanPacer
+from debounce import Debouncer
+from eventqueue import EventQueue
+from deadlines import DeadlineQueue
+from taphold import TapHold
+from recorder import MacroRecorder, DEFAULT_MAX_EVENTS as DEFAULT_MACRO_EVENTS
+from probes import Probes
+from usage import UsageCounters, nvm_store, DEFAULT_SAVE_INTERVAL as DEFAULT_USAGE_SAVE_INTERVAL
+from keycheck import validate_layers, validate_layer, disabled_keys
+from layercache import LayerCache, is_reference, load_reference, modifier_targets
+from layercache import DEFAULT_CACHE_SIZE as DEFAULT_LAYER_CACHE_SIZE, DEFAULT_MIN_FREE
+from reload import KeymapWatcher, disable_autoreload, DEFAULT_INTERVAL as DEFAULT_RELOAD_INTERVAL
+import log
+from log import log_debug, log_info, log_warning, log_error
 
-def log_debug(*args):
-    if DEBUG:
-        print("[DEBUG]", *args)
+try:
+    log.configure(CONFIG)
+except Exception as e:
+    log_error("Invalid logging configuration: {}", e)
 
+IMPORT_NS = time.monotonic_ns() - BOOT_START_NS - KEYMAP_LOAD_NS
 
-def log_info(*args):
-    print("[INFO]", *args)
+# Buffered log messages written to serial per idle scan
+LOG_DRAIN_PER_SCAN = 2
 
+# Hot paths timed with timing_probes on, in Probes index order
+PROBE_NAMES = ('press', 'release', 'hold', 'layer_colors', 'switch_layer', 'hid_send')
+PROBED_METHODS = ('handle_key_press', 'handle_key_release', 'handle_key_hold', 'update_layer_colors', '_enter_layer')
 
-def log_error(*args):
-    print("[ERROR]", *args)
+# Seconds the show_heatmap function keeps the heatmap on the LEDs
+DEFAULT_HEATMAP_TIME = 5
 
 
 class KeybowController:
     def __init__(self):
-        self._initialize_hardware()
-        self._initialize_hid_devices()
-        self._load_configuration()
-        self._setup_led_settings()
-        self._setup_key_handlers()
-        self._apply_initial_layer()
-
-        self.pressed_keys = set()
-        self.held_keys = set()
-        self.pressed_actions = {}  # key number -> pressed action (int or list)
+        # (phase, ns) for each boot step, logged once the pad is ready
+        self.boot_times = [('imports', IMPORT_NS), ('keymap', KEYMAP_LOAD_NS)]
+        self._timed('hardware', self._initialize_hardware)
+        self._timed('hid', self._initialize_hid_devices)
+        self._timed('config', self._load_configuration)
+        self._setup_probes()
+        self._timed('handlers', self._setup_key_handlers)
+        self._timed('leds', self._setup_led_settings)
+        self._setup_hot_reload()
+
+        # Key state as 16-bit masks (bit n = key n) instead of sets
+        self.pressed_mask = 0    # keys whose KEY action is down on the host
+        self.held_mask = 0       # keys PMK reported as held
+        self.down_mask = 0       # keys physically down, whatever their action
+        self.pressed_actions = [None] * NUM_KEYS  # keycodes to release, per key
+        self.layer_hold_mask = 0  # tap-hold keys holding a layer
+        self.layer_origins = [None] * NUM_KEYS    # layer to return to, per key in layer_hold_mask
+        # Handlers for constants.FUNCTION_NAMES (keymaps may also give a callable directly)
+        self.functions = {
+            Function.TOGGLE_ALL_LEDS: self._toggle_all_leds,
+            Function.SHOW_LAYER_INFO: self._show_layer_info,
+            Function.BRIGHTNESS_UP: self._brightness_up,
+            Function.BRIGHTNESS_DOWN: self._brightness_down,
+            Function.CANCEL_MACRO: self._cancel_macro,
+            Function.RECORD_MACRO: self._record_macro,
+            Function.DUMP_USAGE: self._dump_usage,
+            Function.SHOW_HEATMAP: self._show_heatmap,
+            Function.SHOW_TIMINGS: self._show_timings,
+        }
+        self._setup_macro_recorder()
+        self._setup_usage_counters()
 
         for key in self.keys:
             key.is_pressed = False
 
         log_info("Keybow initialized")
-        log_info(f"Config: {CONFIG.get('name', 'Unnamed')} v{CONFIG.get('version', 'None')}")
-        layer_name = LAYERS.get(self.current_layer, {}).get('name', f"Layer {self.current_layer}")
-        log_info(f"Starting layer: {self.current_layer} ({layer_name})")
+        if MEM_FREE_AT_START is not None:
+            gc.collect()
+            mem_free = gc.mem_free()
+            log_info("Free memory: {} bytes ({} used by keymap and runtime)",
+                     mem_free, MEM_FREE_AT_START - mem_free)
+        log_info("Boot: {} (total {:.1f} ms)", ", ".join(
+            "{} {:.1f} ms".format(phase, ns / 1000000) for phase, ns in self.boot_times
+        ), sum(ns for _, ns in self.boot_times) / 1000000)
+        log_info("Config: {} v{}", CONFIG.get('name', 'Unnamed'), CONFIG.get('version', 'None'))
+        log_info("Starting layer: {} ({})", self.current_layer, self.layer_names[self.current_layer])
+
+    def _timed(self, phase, setup):
+        start = time.monotonic_ns()
+        setup()
+        self.boot_times.append((phase, time.monotonic_ns() - start))
 
     def _initialize_hardware(self):
         try:
-            import gc
             gc.collect()
             self.keybow = PMK(Hardware())
             self.keys = self.keybow.keys
+            self.leds = LedFramebuffer(self.keys)
             log_info("Hardware initialized")
         except Exception as e:
-            log_error(f"Failed to initialize hardware: {e}")
+            log_error("Failed to initialize hardware: {}", e)
             raise
 
     def _initialize_hid_devices(self):
         try:
             self.keyboard = Keyboard(usb_hid.devices)
-            self.layout = KeyboardLayoutUS(self.keyboard)
-            self.consumer_control = ConsumerControl(usb_hid.devices)
+            # Pad keys are refcounted and sent as one report per scan
+            self.reports = ReportBuilder(self.keyboard, usb_hid.devices)
+            # Created on first use by the properties below
+            self._layout = None
+            self._consumer_control = None
+            self._string_cache = None
+            self.scheduler = ActionScheduler(self.reports)
+            self._load_macro_settings()
             log_info("HID devices initialized")
         except Exception as e:
-            log_error(f"Failed to initialize HID devices: {e}")
+            log_error("Failed to initialize HID devices: {}", e)
             raise
 
+    def _load_macro_settings(self):
+        self.scheduler.steps_per_poll = CONFIG.get('macro_steps_per_scan', 4)
+        self.sequence_delay_ns = int(CONFIG.get('sequence_delay', 10) * 1000000)
+        self.string_delay_ns = int(CONFIG.get('string_delay', 0) * 1000000)
+        self.macro_speed = CONFIG.get('macro_speed', 1.0)
+        self.sequence_plans = {}
+        self.precompile_strings = CONFIG.get('precompile_strings', False)
+
+    @property
+    def layout(self):
+        """KeyboardLayoutUS, created when the first string is compiled."""
+        if self._layout is None:
+            from adafruit_hid.keyboard_layout_us import KeyboardLayoutUS
+            self._layout = KeyboardLayoutUS(self.keyboard)
+            log_debug("Keyboard layout loaded")
+        return self._layout
+
+    @property
+    def consumer_control(self):
+        """ConsumerControl, created when the first consumer code is sent."""
+        if self._consumer_control is None:
+            from adafruit_hid.consumer_control import ConsumerControl
+            self._consumer_control = ConsumerControl(usb_hid.devices)
+            log_debug("Consumer control initialized")
+        return self._consumer_control
+
+    @property
+    def string_cache(self):
+        if self._string_cache is None:
+            self._string_cache = TextReportCache(
+                self.layout, CONFIG.get('string_cache_size', DEFAULT_CACHE_SIZE)
+            )
+        return self._string_cache
+
     def _load_configuration(self):
         self.layers = LAYERS
         self.colors = COLORS
-        if not self.layers:
-            raise ValueError("No layers defined in configuration")
+        references = {}
+        build = self._build_layer
+        if IMAGE is not None:
+            self.layer_names = IMAGE.layer_names
+            self.palette = IMAGE.palette
+            # Every layer stays packed in the image until the cache first loads it
+            self.key_table = {}
+            references = {idx: KEYMAP_IMAGE for idx in IMAGE.layer_names}
+            build = self._build_image_layer
+        else:
+            if not self.layers:
+                raise ValueError("No layers defined in configuration")
+            problems = validate_layers(self.layers, self.colors, CONFIG)
+            self._report_problems(problems)
+            self.layer_names = {
+                idx: layer if is_reference(layer) else layer.get('name', "Layer {}".format(idx))
+                for idx, layer in self.layers.items()
+            }
+            self.palette = Palette(self.colors)
+            self.key_table = compile_layers(self.layers, self.palette, disabled_keys(problems))
+            references = {idx: layer for idx, layer in self.layers.items() if is_reference(layer)}
+        self.layer_cache = LayerCache(
+            self.key_table, references, build,
+            CONFIG.get('layer_cache_size', DEFAULT_LAYER_CACHE_SIZE),
+            CONFIG.get('layer_min_free', DEFAULT_MIN_FREE),
+        )
         self.current_layer = CONFIG.get('default_layer', 0)
-        if self.current_layer not in self.layers:
+        if self.current_layer not in self.layer_cache:
             raise ValueError(f"Default layer {self.current_layer} not found in LAYERS")
-        self.held_modifiers = set()
+        self._pin_layers(CONFIG.get('pin_layers', True))
+        if self.layer_cache.get(self.current_layer) is None:
+            raise ValueError(f"Default layer {self.current_layer} could not be loaded")
+        self.modifier_mask = 0   # modifier keys currently down
+        if self.precompile_strings:
+            for table in self.key_table.values():
+                self._precompile_strings(table)
+            log_debug("Precompiled {} strings", len(self.string_cache))
         log_info("Configuration loaded and validated")
 
+    def _report_problems(self, problems):
+        """Log keymap check results; raises ValueError if a whole layer or the keymap is unusable."""
+        fatal = None
+        for problem in problems:
+            if problem.severity != log.ERROR:
+                log_warning("Keymap: {}", problem)
+            elif problem.key is None:
+                log_error("Keymap: {}", problem)
+                fatal = fatal or problem
+            else:
+                log_error("Keymap: {} (key disabled)", problem)
+        if fatal is not None:
+            raise ValueError(f"Invalid keymap: {fatal}")
+
+    def _build_layer(self, idx, ref):
+        """Check and compile a layer loaded by reference (LayerCache's build callback)."""
+        layer = load_reference(ref)
+        problems = validate_layer(idx, layer, self.layers, self.colors)
+        self._report_problems(problems)
+        self.layer_names[idx] = layer.get('name', "Layer {}".format(idx))
+        return compile_layer(layer, self.palette, disabled_keys(problems).get(idx, ()))
+
+    def _build_image_layer(self, idx, path):
+        """Decode one layer of the keymap image (LayerCache's build callback); it was checked when compiled."""
+        return IMAGE.layer_table(idx)
+
+    def _pin_layers(self, pins):
+        """Keep layers loaded for the whole session.
+
+        pins is CONFIG['pin_layers']: True pins the default layer and the layers its
+        modifier keys switch to, a list pins those layer indices, False pins nothing.
+        """
+        if pins is True:
+            table = self.layer_cache.pin(self.current_layer)
+            pins = modifier_targets(table) if table is not None else ()
+        for layer in pins or ():
+            if layer in self.layer_cache:
+                self.layer_cache.pin(layer)
+
+    def _layer_loaded(self, layer, table):
+        self.frames.add(layer, table)
+        if self.precompile_strings:
+            self._precompile_strings(table)
+
+    def _layer_evicted(self, layer, table):
+        self.frames.drop(layer)
+        for record in layer_records(table):
+            if record.kind == KIND_SEQUENCE:
+                self.sequence_plans.pop(record.payload, None)
+
+    def _precompile_strings(self, table):
+        """Warm the string cache with a layer's STRING actions, dual branches included."""
+        for record in layer_records(table):
+            if record.kind == KIND_STRING:
+                self.string_cache.get(record.payload)
+
     def _setup_led_settings(self):
         self.keybow.led_sleep_enabled = CONFIG.get('led_sleep_enabled', True)
         self.keybow.led_sleep_time = CONFIG.get('led_sleep_time', 30)
         self.brightness = CONFIG.get('brightness', 1.0)
-        log_info(f"LED settings: sleep={self.keybow.led_sleep_enabled}, brightness={self.brightness}")
+        self.pacer = ScanPacer.from_config(CONFIG)
+        self.frames = LayerFrames(self.key_table, self.palette, self.brightness)
+        # Layers loaded or dropped later keep their LED frames in step
+        self.layer_cache.on_load = self._layer_loaded
+        self.layer_cache.on_evict = self._layer_evicted
+        # Imported only when a lighting_mode other than static needs it
+        self.animator = None
+        lighting_mode = CONFIG.get('lighting_mode', LightingMode.STATIC)
+        if lighting_mode != LightingMode.STATIC:
+            from animation import Animator
+            self.animator = Animator.from_config(CONFIG, self.leds)
+        log_info("LED settings: sleep={}, brightness={}, lighting={}",
+                 self.keybow.led_sleep_enabled, self.brightness, lighting_mode)
+        self._apply_initial_layer()
 
     def _setup_key_handlers(self):
+        # PMK passes the key to its handlers, so all keys share three bound methods
+        # instead of holding a closure per key and event
+        press, release, hold = self.handle_key_press, self.handle_key_release, self.handle_key_hold
+        # Timed decisions (tap-hold terms) share one queue polled from scan_once
+        self.deadlines = DeadlineQueue()
+        self.tap_hold = TapHold(self.deadlines, self._decide_tap_hold, press, release, CONFIG)
+        # With event_queue_size set, edges are only queued and scan_once dispatches
+        # them within a time budget; with debounce configured, PMK's edges go through
+        # the debouncer first, so it judges each edge by the time PMK saw it
+        self.events = EventQueue.from_config(CONFIG, self.keys, press, release, hold)
+        if self.events is not None:
+            press, release, hold = self.events.on_press, self.events.on_release, self.events.on_hold
+        self.debouncer = Debouncer.from_config(CONFIG, self.layers, self.keys, press, release, hold)
+        if self.debouncer is not None:
+            press, release, hold = self.debouncer.on_press, self.debouncer.on_release, self.debouncer.on_hold
+            if self.events is not None:
+                # A resync after drops restores the debounced state, not the raw switches
+                self.events.down = self._debounced_keys
+        self._attach_handlers(press, release, hold)
+
+    def _debounced_keys(self):
+        return self.debouncer.reported
+
+    def _attach_handlers(self, press, release, hold):
         for key in self.keys:
-            self._attach_key_handlers(key)
-
-    def _attach_key_handlers(self, key):
-        @self.keybow.on_press(key)
-        def press_handler(_, k=key):
-            self.handle_key_press(k)
-
-        @self.keybow.on_release(key)
-        def release_handler(_, k=key):
-            self.handle_key_release(k)
-
-        @self.keybow.on_hold(key)
-        def hold_handler(_, k=key):
-            self.handle_key_hold(k)
+            self.keybow.on_press(key, press)
+            self.keybow.on_release(key, release)
+            self.keybow.on_hold(key, hold)
+
+    def _setup_probes(self):
+        """Time the hot paths when CONFIG['timing_probes'] is on, before handlers are attached.
+
+        The methods are replaced on the instance by timed wrappers, so with probes off
+        nothing on the hot path changes. A reload first puts the unwrapped ones back.
+        """
+        for name in PROBED_METHODS:
+            self.__dict__.pop(name, None)
+        self.reports._send_report = self.reports.device_send
+        self.probes = None
+        if not CONFIG.get('timing_probes', False):
+            return
+        probes = self.probes = Probes(PROBE_NAMES)
+        self.handle_key_press = probes.wrap(0, self.handle_key_press)
+        self.handle_key_release = probes.wrap(1, self.handle_key_release)
+        self.handle_key_hold = probes.wrap(2, self.handle_key_hold)
+        self.update_layer_colors = probes.wrap(3, self.update_layer_colors, 0)
+        # switch_layer and LAYER keys both go through _enter_layer
+        self._enter_layer = probes.wrap(4, self._enter_layer)
+        self.reports._send_report = probes.wrap(5, self.reports._send_report)
+        log_info("Timing probes on: {}", ", ".join(PROBE_NAMES))
+
+    def _setup_hot_reload(self):
+        """Watch the keymap files when CONFIG['hot_reload'] is on, instead of CircuitPython autoreload."""
+        self.watcher = None
+        if not CONFIG.get('hot_reload', False):
+            return
+        if not disable_autoreload():
+            log_debug("No supervisor module; CircuitPython autoreload left alone")
+        self.watcher = KeymapWatcher(
+            (KEYMAP_IMAGE, KEYMAP_SOURCE),
+            CONFIG.get('reload_interval', DEFAULT_RELOAD_INTERVAL),
+            CONFIG.get('hot_reload') == 'hash',
+        )
+        log_info("Hot reload: watching {} and {}", KEYMAP_SOURCE, KEYMAP_IMAGE)
+
+    def reload_keymap(self):
+        """Load the saved keymap and swap it in between two scans.
+
+        Hardware, HID devices and the current layer (if the new keymap still has it)
+        are kept. If the new keymap cannot be loaded the running one stays in place.
+        """
+        global IMAGE, LAYERS, CONFIG, COLORS
+        start = time.monotonic_ns()
+        keymap = (IMAGE, LAYERS, CONFIG, COLORS)
+        saved = dict(self.__dict__)
+        # State kept outside the controller that the setup steps below overwrite
+        send_report = self.reports._send_report
+        led_sleep = (self.keybow.led_sleep_enabled, self.keybow.led_sleep_time)
+        layer = self.current_layer
+        try:
+            IMAGE, LAYERS, CONFIG, COLORS = read_keymap(reload=True)
+            log.configure(CONFIG)
+            self._load_macro_settings()
+            self._load_configuration()
+            if layer != self.current_layer and layer in self.layer_cache and self.layer_cache.get(layer) is not None:
+                self.current_layer = layer
+            self._setup_probes()
+            self._setup_key_handlers()
+            self._setup_led_settings()
+            self._setup_usage_counters(saved['usage'])
+        except Exception as e:
+            IMAGE, LAYERS, CONFIG, COLORS = keymap
+            self.__dict__.clear()
+            self.__dict__.update(saved)
+            self.reports._send_report = send_report
+            self.keybow.led_sleep_enabled, self.keybow.led_sleep_time = led_sleep
+            log.configure(CONFIG)
+            self._load_macro_settings()
+            front = self.debouncer if self.debouncer is not None else self.events
+            if front is not None:
+                self._attach_handlers(front.on_press, front.on_release, front.on_hold)
+            else:
+                self._attach_handlers(self.handle_key_press, self.handle_key_release, self.handle_key_hold)
+            self.update_layer_colors()
+            log_error("Keymap reload failed, keeping the running keymap: {}", e)
+            return False
+        watcher = self.watcher
+        self._setup_hot_reload()
+        if self.watcher is not None and watcher is not None:
+            self.watcher.applied = watcher.applied
+        gc.collect()
+        log_info("Keymap reloaded in {:.1f} ms: {} v{}, layer {} ({})",
+                 (time.monotonic_ns() - start) / 1000000, CONFIG.get('name', 'Unnamed'),
+                 CONFIG.get('version', 'None'), self.current_layer, self.layer_names[self.current_layer])
+        return True
 
     def _apply_initial_layer(self):
         self.update_layer_colors()
+        self.leds.flush()
 
-    def get_color_rgb(self, color_input):
-        if isinstance(color_input, (tuple, list)) and len(color_input) == 3:
-            return tuple(int(c * self.brightness) for c in color_input)
-        if isinstance(color_input, str) and color_input in self.colors:
-            color = self.colors[color_input]
-            return tuple(int(c * self.brightness) for c in color)
-        off_color = self.colors.get('off', (0, 0, 0))
-        return tuple(int(c * self.brightness) for c in off_color)
-
-    def get_key_config(self, key_num, layer=None):
-        layer = self.current_layer if layer is None else layer
-        return self.layers.get(layer, {}).get('keys', {}).get(key_num)
+    def _set_key_color(self, key, record, state):
+        if record.colors is not None:
+            self.leds.set_from(key.number, self.frames.frames[self.current_layer][state])
 
     def update_layer_colors(self):
-        name = self.layers[self.current_layer]['name']
-        log_info(f"Updating colors for layer: {name}")
-        for key in self.keys:
-            cfg = self.get_key_config(key.number)
-            if cfg and 'colors' in cfg:
-                default_color = cfg['colors'].get('default', 'off')
-                key.set_led(*self.get_color_rgb(default_color))
-            else:
-                key.led_off()
+        log_debug("Updating colors for layer: {}", self.current_layer)
+        self.leds.load(
+            self.frames.frames[self.current_layer][STATE_DEFAULT],
+            self.frames.colored[self.current_layer],
+        )
 
     def handle_key_press(self, key):
-        key_num = key.number
-        config = self.get_key_config(key_num)
-        log_info(f"handle_key_press: key {key_num} pressed, config: {config}")
-
-        if config and 'colors' in config:
-            pressed_color = config['colors'].get('pressed', 'white')
-            key.set_led(*self.get_color_rgb(pressed_color))
-
-        if not config:
+        # Presses during a pending tap-hold decision are replayed once it is made
+        if self.tap_hold.key is not None and self.tap_hold.intercept(key, True):
             return
-
-        # Modifier key
-        if (
-            (isinstance(config, dict) and config.get('action_type') == 'modifier')
-            or (isinstance(config, dict) and isinstance(config.get('action'), dict) and config['action'].get('action_type') == 'modifier')
-        ):
-            self.held_modifiers.add(key_num)
-            log_info(f"Modifier key pressed (key {key_num}) - layer switching enabled")
+        key_num = key.number
+        record = self.key_table[self.current_layer][key_num]
+        log_debug("handle_key_press: key {} pressed, kind: {}", key_num, record.kind)
+
+        self.down_mask |= 1 << key_num
+        if self.usage is not None:
+            self.usage.count_press(self.current_layer, key_num)
+        if self.animator is not None:
+            self.animator.press(key_num)
+        self._set_key_color(key, record, STATE_PRESSED)
+        recorder = self.recorder
+        if (recorder.binding or recorder.macros) and self._macro_key_press(key_num, record):
             return
-
-        # Dual-action selection
-        if isinstance(config, dict) and ('default' in config and 'modifier' in config):
-            chosen = config['modifier'] if len(self.held_modifiers) > 0 else config['default']
-            if isinstance(chosen, dict) and chosen.get('action_type') == ActionType.LAYER:
-                self.switch_layer(chosen.get('action'))
-                return
-            if isinstance(chosen, (int, list)):
-                self._execute_key_action(chosen, press_only=True)
-                self.pressed_keys.add(key_num)
-                self.pressed_actions[key_num] = chosen
-                return
-            if isinstance(chosen, dict):
-                at = chosen.get('action_type')
-                if at == ActionType.KEY:
-                    act = chosen.get('action')
-                    self._execute_key_action(act, press_only=True)
-                    self.pressed_keys.add(key_num)
-                    self.pressed_actions[key_num] = act
-                    return
-                else:
-                    self.execute_action(chosen, key, press_only=False)
-                    return
-
-        # Plain action
-        at = config.get('action_type', ActionType.NONE)
-        if at == ActionType.KEY:
-            act = config.get('action')
-            self._execute_key_action(act, press_only=True)
-            self.pressed_keys.add(key_num)
-            self.pressed_actions[key_num] = act
-        elif at == ActionType.LAYER:
-            self._handle_layer_switching(config)
-        else:
-            self.execute_action(config, key, press_only=False)
-
-    def _handle_layer_switching(self, config):
-        if config.get('action_type') != ActionType.LAYER:
-            return False
-        action = config.get('action')
-        if action == LayerAction.MODIFIER:
-            return False
-        if isinstance(action, int) and action in self.layers:
-            self.switch_layer(action)
+        self._press_record(key, key_num, record)
+
+    def _press_record(self, key, key_num, record):
+        kind = record.kind
+        if kind == KIND_DUAL:
+            record = record.modifier if self.modifier_mask else record.default
+            kind = record.kind
+
+        if kind == KIND_TAP_HOLD:
+            self.tap_hold.start(key, record)
+        elif kind == KIND_KEY:
+            if self.pressed_mask & (1 << key_num):
+                # Pressed again without a release (one lost to a full event queue)
+                self.reports.release(self.pressed_actions[key_num])
+            self.reports.press(record.payload)
+            if self.recorder.recording:
+                self.recorder.record(record.payload, True)
+            self.pressed_mask |= 1 << key_num
+            self.pressed_actions[key_num] = record.payload
+        elif kind == KIND_MODIFIER:
+            self.modifier_mask |= 1 << key_num
+            log_debug("Modifier key pressed (key {}) - layer switching enabled", key_num)
+        elif kind == KIND_LAYER:
+            self._enter_layer(record.payload)
+        elif kind != KIND_NONE:
+            self.execute_action(record, key)
+
+    def _macro_key_press(self, key_num, record):
+        """Bind a finished recording to the key, or play the macro bound to it."""
+        recorder = self.recorder
+        layer = self.current_layer
+        if recorder.binding:
+            if record.kind == KIND_FUNCTION and record.payload == Function.RECORD_MACRO:
+                return False   # pressed again to discard the recording
+            macro = recorder.bind(layer, key_num)
+            if macro is None:
+                log_info("Macro unbound from layer {} key {}", layer, key_num)
+            else:
+                log_info("Macro ({} events) bound to layer {} key {}", len(macro), layer, key_num)
+            self._save_macros()
             return True
-        return False
+        macro = recorder.macros.get((layer, key_num))
+        if macro is None:
+            return False
+        self.scheduler.queue(macro.plan(self.macro_speed))
+        return True
+
+    def _decide_tap_hold(self, key, record, hold):
+        log_debug("Tap-hold key {}: {}", key.number, "hold" if hold else "tap")
+        if hold and record.modifier.kind == KIND_LAYER:
+            # A held layer lasts while the key is down; the release goes back
+            self.layer_hold_mask |= 1 << key.number
+            self.layer_origins[key.number] = self.current_layer
+        self._press_record(key, key.number, record.modifier if hold else record.default)
 
     def handle_key_release(self, key):
+        if self.tap_hold.key is not None and self.tap_hold.intercept(key, False):
+            return
         key_num = key.number
-        config = self.get_key_config(key_num)
-        log_info(f"handle_key_release: key {key_num} released, config: {config}")
-
-        if config and (
-            (isinstance(config, dict) and config.get('action_type') == 'modifier')
-            or (isinstance(config, dict) and isinstance(config.get('action'), dict) and config['action'].get('action_type') == 'modifier')
-        ):
-            if key_num in self.held_modifiers:
-                self.held_modifiers.remove(key_num)
-                log_info(f"Modifier key released (key {key_num})")
-
-        if key_num in self.pressed_keys:
-            self.pressed_keys.remove(key_num)
-            pressed_action = self.pressed_actions.pop(key_num, None)
-            if pressed_action is not None:
-                self._release_key_action(pressed_action)
-
-        if config and 'colors' in config:
-            default_color = config['colors'].get('default', 'off')
-            key.set_led(*self.get_color_rgb(default_color))
+        bit = 1 << key_num
+        if self.layer_hold_mask & bit:
+            self.layer_hold_mask &= ~bit
+            self._enter_layer(self.layer_origins[key_num])
+            self.layer_origins[key_num] = None
+        record = self.key_table[self.current_layer][key_num]
+        log_debug("handle_key_release: key {} released, kind: {}", key_num, record.kind)
+
+        self.down_mask &= ~bit
+        self.held_mask &= ~bit
+        if self.modifier_mask & bit:
+            self.modifier_mask &= ~bit
+            log_debug("Modifier key released (key {})", key_num)
+
+        if self.pressed_mask & bit:
+            self.pressed_mask &= ~bit
+            self.reports.release(self.pressed_actions[key_num])
+            if self.recorder.recording:
+                self.recorder.record(self.pressed_actions[key_num], False)
+            self.pressed_actions[key_num] = None
+
+        if record.colors is not None:
+            self._set_key_color(key, record, STATE_DEFAULT)
         else:
-            key.led_off()
+            self.leds.off(key_num)
 
     def handle_key_hold(self, key):
         key_num = key.number
-        config = self.get_key_config(key_num)
-        log_info(f"handle_key_hold: key {key_num} held, config: {config}")
-        if config and 'colors' in config:
-            held_color = config['colors'].get('held', 'yellow')
-            key.set_led(*self.get_color_rgb(held_color))
-        self.held_keys.add(key_num)
+        if not self.down_mask & (1 << key_num):
+            return   # press still buffered behind a tap-hold decision
+        record = self.key_table[self.current_layer][key_num]
+        log_debug("handle_key_hold: key {} held, kind: {}", key_num, record.kind)
+        self._set_key_color(key, record, STATE_HELD)
+        self.held_mask |= 1 << key_num
+        if self.usage is not None:
+            self.usage.count_hold(self.current_layer, key_num)
 
     def switch_layer(self, new_layer):
-        if new_layer not in self.layers:
-            log_error(f"Invalid layer: {new_layer}")
+        if new_layer not in self.layer_cache:
+            log_error("Invalid layer: {}", new_layer)
             return
+        self._enter_layer(new_layer)
+
+    def _enter_layer(self, new_layer):
+        # LAYER records only hold targets that keycheck found in the keymap; a referenced
+        # layer that cannot be loaded leaves the current layer active
+        if self.layer_cache.get(new_layer) is None:
+            return
+        if self.heatmap_shown:
+            self._hide_heatmap()
+        if self.usage is not None:
+            self.usage.count_switch(new_layer)
         old_layer = self.current_layer
         self.current_layer = new_layer
-        self.update_layer_colors()
-        old_name = LAYERS.get(old_layer, {}).get('name', f"Layer {old_layer}")
-        new_name = LAYERS.get(new_layer, {}).get('name', f"Layer {new_layer}")
-        log_info(f"Layer switch: {old_name} -> {new_name}")
-
-    def execute_action(self, config, key=None, press_only=False):
-        at = config.get('action_type', ActionType.NONE)
-        action = config.get('action')
-        if at == ActionType.NONE or action is None:
-            return
+        self._show_layer_change(old_layer, new_layer)
+        log_info("Layer switch: {} -> {}", self.layer_names[old_layer], self.layer_names[new_layer])
+
+    def _show_layer_change(self, old_layer, new_layer):
+        """Repaint only the LEDs whose color differs between the two layers."""
+        frames = self.frames
+        down = self.down_mask
+        if old_layer in frames.frames:
+            self.leds.load_changed(
+                frames.frames[new_layer][STATE_DEFAULT], frames.colored[new_layer],
+                # Keys whose hardware state is unknown (toggle_all_leds) are repainted too
+                (frames.diff(old_layer, new_layer) | self.leds.stale) & ~down,
+            )
+        else:
+            # The outgoing layer was just dropped from the layer cache
+            self.update_layer_colors()
+        # Keys held through the switch show the incoming layer's pressed or held color
+        key_num = 0
+        while down:
+            if down & 1:
+                bit = 1 << key_num
+                if frames.colored[new_layer] & bit:
+                    state = STATE_HELD if self.held_mask & bit else STATE_PRESSED
+                    self.leds.set_from(key_num, frames.frames[new_layer][state])
+                else:
+                    self.leds.off(key_num)
+            down >>= 1
+            key_num += 1
+
+    def execute_action(self, record, key=None):
+        kind = record.kind
+        action = record.payload
         try:
-            if at == ActionType.KEY:
-                self._execute_key_action(action, press_only)
-            elif at == ActionType.SEQUENCE and not press_only:
+            if kind == KIND_KEY:
+                self.reports.tap(action)
+            elif kind == KIND_SEQUENCE:
                 self._execute_sequence_action(action)
-            elif at == ActionType.STRING and not press_only:
+            elif kind == KIND_STRING:
                 self._execute_string_action(action)
-            elif at == ActionType.CONSUMER and not press_only:
+            elif kind == KIND_CONSUMER:
                 self._execute_consumer_action(action)
-            elif at == ActionType.FUNCTION and not press_only:
+            elif kind == KIND_FUNCTION:
                 self._execute_function_action(action, key)
         except Exception as e:
-            log_error(f"Error executing {at} action: {e}")
-
-    def release_action(self, config, key=None):
-        at = config.get('action_type', ActionType.NONE)
-        action = config.get('action')
-        if at == ActionType.KEY and action is not None:
-            try:
-                self._release_key_action(action)
-            except Exception as e:
-                log_error(f"Error releasing {at} action: {e}")
-
-    def _execute_key_action(self, action, press_only=False):
-        if action is None:
-            return
-        if isinstance(action, list):
-            if press_only:
-                self.keyboard.press(*action)
-                log_info(f"Key combination pressed: {[str(k) for k in action]}")
-            else:
-                self.keyboard.send(*action)
-                log_info(f"Key combination: {[str(k) for k in action]}")
-        elif isinstance(action, int):
-            if press_only:
-                self.keyboard.press(action)
-                log_info(f"Key pressed: {action} (value: {action})")
-            else:
-                self.keyboard.send(action)
-                log_info(f"Key: {action} (value: {action})")
-
-    def _release_key_action(self, action):
-        action_val = self._extract_action(action)
-        if action_val is None:
-            return
-        if isinstance(action_val, list):
-            self.keyboard.release(*action_val)
-            log_info(f"Key combination released: {[str(k) for k in action_val]}")
-        elif isinstance(action_val, int):
-            self.keyboard.release(action_val)
-            log_info(f"Key released: {action_val} (value: {action_val})")
+            log_error("Error executing action kind {}: {}", kind, e)
 
     def _execute_sequence_action(self, action):
-        log_info(f"Sequence: {action}")
-        for item in action:
-            if isinstance(item, list):
-                self.keyboard.send(*item)
-            else:
-                self.keyboard.send(item)
-            time.sleep(0.01)
+        log_debug("Sequence: {}", action)
+        plan = self.sequence_plans.get(action)
+        if plan is None:
+            plan = plan_sequence(action, self._text_reports, self.sequence_delay_ns, self.string_delay_ns)
+            self.sequence_plans[action] = plan
+            if self.scheduler.consumer_control is None and any(step[0] == OP_CONSUMER for step in plan):
+                self.scheduler.consumer_control = self.consumer_control
+        self.scheduler.queue(plan)
+
+    def _text_reports(self, text):
+        return self.string_cache.get(text)
 
     def _execute_string_action(self, action):
-        try:
-            self.layout.write(action)
-            log_info(f"Typed: '{action}'")
-        except Exception as e:
-            log_error(f"Failed to type string action: {e}")
+        self.scheduler.queue_text(self.string_cache.get(action), self.string_delay_ns)
+        log_debug("Typed: '{}'", action)
 
     def _execute_consumer_action(self, action):
-        try:
-            self.consumer_control.send(action)
-            log_info(f"Media: {action}")
-        except Exception as e:
-            log_error(f"Failed to send consumer action: {e}")
+        if self.scheduler.consumer_control is None:
+            self.scheduler.consumer_control = self.consumer_control
+        self.scheduler.queue_consumer(action)
+        log_debug("Media: {}", action)
 
     def _execute_function_action(self, action, key=None):
-        if action == 'toggle_all_leds':
-            self._toggle_all_leds()
-        elif action == 'show_layer_info':
-            self._show_layer_info()
-        elif action == 'brightness_up':
-            self._adjust_brightness(0.1)
-        elif action == 'brightness_down':
-            self._adjust_brightness(-0.1)
+        if callable(action):
+            action()
         else:
-            log_error(f"Unknown function: {action}")
+            self.functions[action]()
+
+    def _brightness_up(self):
+        self._adjust_brightness(0.1)
+
+    def _brightness_down(self):
+        self._adjust_brightness(-0.1)
 
     def _toggle_all_leds(self):
         for key in self.keys:
             key.toggle_led()
+        self.leds.invalidate()
         log_info("Toggled all LEDs")
 
     def _show_layer_info(self):
-        layer_info = self.layers[self.current_layer]
-        key_count = len(layer_info.get('keys', {}))
-        log_info("Layer {idx}: {name} ({count} keys configured)".format(
-            idx=self.current_layer,
-            name=LAYERS.get(self.current_layer, {}).get('name', f"Layer {self.current_layer}"),
-            count=key_count,
-        ))
+        key_count = sum(
+            1 for record in self.key_table[self.current_layer]
+            if record.kind != KIND_NONE or record.colors is not None
+        )
+        log_info(
+            "Layer {}: {} ({} keys configured)",
+            self.current_layer, self.layer_names[self.current_layer], key_count,
+        )
+        log_info("Scan mode: {}", self.scan_mode)
+        if self.debouncer is not None:
+            log_info("Debounce: {} bounces filtered", self.debouncer.bounce_count)
+        reports = self.reports
+        log_info(
+            "HID reports: {} sent, {} duplicates skipped, {} key changes merged",
+            reports.sent, reports.skipped, reports.merged,
+        )
+        events = self.events
+        if events is not None:
+            log_info(
+                "Input events: peak {}/{} queued, longest wait {:.1f} ms, {} dropped, {} coalesced",
+                events.peak, events.size, events.max_wait_us / 1000, events.dropped, events.coalesced,
+            )
+        tap_hold = self.tap_hold
+        if tap_hold.taps or tap_hold.holds:
+            log_info(
+                "Tap-hold: {} taps, {} holds, timeouts late by {:.2f} ms max, {:.2f} ms mean",
+                tap_hold.taps, tap_hold.holds, tap_hold.late_max_ns / 1000000,
+                tap_hold.late_total_ns / 1000000 / max(1, tap_hold.timeouts),
+            )
+        if self.recorder.macros:
+            log_info("Recorded macros: {} bound", len(self.recorder.macros))
+        if self.usage is not None:
+            log_info("Usage counters: {} NVM writes", self.usage.saves)
+        animator = self.animator
+        if animator is not None:
+            log_info(
+                "Lighting: {}, {} frames drawn, {} skipped, {} split across scans",
+                animator.mode, animator.frames, animator.skipped, animator.partial,
+            )
+        if self.layer_cache.references:
+            log_info(
+                "Layer cache: {} layers loaded, {} loads, {} dropped",
+                len(self.key_table), self.layer_cache.loads, self.layer_cache.evictions,
+            )
+
+    def _setup_macro_recorder(self):
+        recorder = self.recorder = MacroRecorder(CONFIG.get('macro_record_events', DEFAULT_MACRO_EVENTS))
+        try:
+            loaded = recorder.load()
+        except Exception as e:
+            log_error("Ignoring unreadable {}: {}", recorder.path, e)
+            recorder.macros = {}
+            return
+        if loaded:
+            log_info("Loaded {} recorded macros from {}", loaded, recorder.path)
+
+    def _record_macro(self):
+        recorder = self.recorder
+        if recorder.recording:
+            recorder.stop()
+            log_info("Recorded {} events ({} dropped); press a key to bind them to it",
+                     recorder.count, recorder.dropped)
+        elif recorder.binding:
+            recorder.cancel()
+            log_info("Discarded the recorded macro")
+        else:
+            recorder.start()
+            log_info("Recording macro")
+
+    def _save_macros(self):
+        try:
+            self.recorder.save()
+        except OSError as e:
+            # CIRCUITPY is read-only to code.py unless boot.py remounts it
+            log_warning("Could not save {} ({}); recorded macros last until restart", self.recorder.path, e)
+
+    def _show_timings(self):
+        if self.probes is None:
+            log_warning("Timing probes are off (set timing_probes in CONFIG)")
+            return
+        self.probes.dump()
+
+    def _setup_usage_counters(self, previous=None):
+        """Create the counters for the keymap's layers; a reload passes the running ones.
+
+        Counts from `previous` are kept for the layers the new keymap still has, since
+        they are newer than what NVM holds.
+        """
+        self.usage = None
+        self.usage_store = None
+        self.heatmap_shown = False
+        if not CONFIG.get('usage_counters', False):
+            return
+        self.usage = UsageCounters(
+            max(self.layer_names) + 1,
+            CONFIG.get('usage_save_interval', DEFAULT_USAGE_SAVE_INTERVAL),
+        )
+        self.usage_store = nvm_store()
+        if previous is not None:
+            self.usage.copy_from(previous)
+            return
+        if self.usage_store is None:
+            log_warning("No NVM on this board; usage counters are not saved")
+        elif self.usage.load(self.usage_store):
+            log_info("Usage counters loaded from NVM")
+        self.usage.next_save = time.monotonic() + self.usage.save_interval
+
+    def _save_usage(self, now):
+        try:
+            self.usage.save(self.usage_store, now)
+        except Exception as e:
+            log_error("Could not save usage counters: {}", e)
+            self.usage_store = None
+
+    def _dump_usage(self):
+        if self.usage is None:
+            log_warning("Usage counters are off (set usage_counters in CONFIG)")
+            return
+        self.usage.dump()
+
+    def _show_heatmap(self):
+        """Color the current layer's keys from blue (least pressed) to red (most pressed)."""
+        usage = self.usage
+        if usage is None:
+            log_warning("Usage counters are off (set usage_counters in CONFIG)")
+            return
+        if self.heatmap_shown:
+            self._hide_heatmap()
+            return
+        layer = self.current_layer
+        if layer >= usage.layers:
+            return
+        start = layer * NUM_KEYS
+        counts = usage.presses[start:start + NUM_KEYS]
+        top = max(counts)
+        scale = int(255 * (getattr(self, 'brightness', 1.0) or 1.0))
+        frame = bytearray(FRAME_SIZE)
+        colored = 0
+        for key_num in range(NUM_KEYS):
+            if counts[key_num]:
+                heat = counts[key_num] * scale // top
+                frame[key_num * 3] = heat
+                frame[key_num * 3 + 2] = scale - heat
+                colored |= 1 << key_num
+        self.leds.load(frame, colored)
+        self.heatmap_shown = True
+        self.deadlines.schedule(
+            time.monotonic_ns() + int(CONFIG.get('heatmap_time', DEFAULT_HEATMAP_TIME) * 1000000000),
+            self._heatmap_expired, 'heatmap',
+        )
+
+    def _heatmap_expired(self, token, late_ns):
+        self._hide_heatmap()
+
+    def _hide_heatmap(self):
+        self.deadlines.cancel('heatmap')
+        self.heatmap_shown = False
+        self.update_layer_colors()
+
+    def _cancel_macro(self):
+        cancelled = self.scheduler.cancel()
+        log_info("Cancelled macro ({} steps dropped)", cancelled)
 
     def _adjust_brightness(self, delta):
         try:
             current = getattr(self, 'brightness', 1.0) or 1.0
             self.brightness = max(0.1, min(1.0, current + delta))
-            log_info("Brightness: {:.1f}".format(self.brightness))
+            log_info("Brightness: {:.1f}", self.brightness)
+            self.frames.rebuild(self.brightness)
             self.update_layer_colors()
         except Exception as e:
-            log_error(f"Failed to adjust brightness: {e}")
+            log_error("Failed to adjust brightness: {}", e)
 
     def release_all_keys(self):
         try:
+            self.scheduler.cancel()
+            self.tap_hold.reset()
+            self.recorder.cancel()
+            self.deadlines.cancel('heatmap')
+            self.heatmap_shown = False
+            if self.events is not None:
+                self.events.clear()
             self.keyboard.release_all()
+            self.reports.reset()
             log_info("Released all pressed keys")
-            for key in self.keys:
-                key.led_off()
+            self.leds.all_off()
+            self.leds.flush()
             log_info("All LEDs turned off")
-            self.pressed_keys.clear()
-            self.held_keys.clear()
-            self.pressed_actions.clear()
+            self.pressed_mask = 0
+            self.held_mask = 0
+            self.down_mask = 0
+            self.modifier_mask = 0
+            self.layer_hold_mask = 0
+            for key_num in range(NUM_KEYS):
+                self.pressed_actions[key_num] = None
+                self.layer_origins[key_num] = None
         except Exception as e:
-            log_error(f"Error during cleanup: {e}")
+            log_error("Error during cleanup: {}", e)
+
+    def scan_once(self):
+        # update() queues the scan's key edges and the handlers run from dispatch() (or
+        # straight from update() without an event queue); their key changes go out as
+        # one report, queued macro steps follow, and LED writes made along the way go
+        # out together afterwards.
+        self.keybow.update()
+        if self.debouncer is not None and self.debouncer.pending:
+            self.debouncer.poll()
+        if self.events is not None and self.events.count:
+            self.events.dispatch()
+        if self.deadlines.entries:
+            self.deadlines.poll()
+        self.reports.flush()
+        self.scheduler.poll()
+        self.leds.flush()
+        # Animation frames are drawn last, within their own budget, and wait while key
+        # edges are still queued
+        animator = self.animator
+        if (animator is not None and not self.heatmap_shown and not self.keybow.sleeping
+                and not (self.events is not None and self.events.count)):
+            layer = self.current_layer
+            animator.step(self.frames.frames[layer][STATE_DEFAULT], self.frames.colored[layer], self.down_mask)
+        if log.pending() and self.keybow.none_pressed():
+            log.drain(LOG_DRAIN_PER_SCAN)
+
+    def step(self):
+        """One iteration of the main loop: scan, then back off if the keypad is idle."""
+        self.scan_once()
+        if (self.scheduler.busy or self.deadlines.entries
+                or (self.events is not None and self.events.count)
+                or (self.debouncer is not None and self.debouncer.pending)):
+            idle_for = 0
+        else:
+            idle_for = time.monotonic() - self.keybow.time_of_last_press
+        # Saved keymaps are only swapped in while no key is down and nothing is pending
+        if (self.watcher is not None and idle_for and not self.down_mask
+                and self.watcher.changed(time.monotonic())):
+            self.reload_keymap()
+        # Counters are written while idle, at most once per save interval
+        usage = self.usage
+        if (usage is not None and usage.dirty and idle_for and not self.down_mask
+                and self.usage_store is not None and time.monotonic() >= usage.next_save):
+            self._save_usage(time.monotonic())
+        # Cached layers give memory back while idle, not only when the next layer loads
+        if idle_for and not self.down_mask:
+            self.layer_cache.check_memory(self.current_layer)
+        mode = self.pacer.mode
+        self.pacer.pace(idle_for)
+        if self.pacer.mode != mode:
+            log_debug("Scan mode: {}", self.pacer.mode_name)
+
+    @property
+    def scan_mode(self):
+        return self.pacer.mode_name
 
     def run(self):
         log_info("\n" + "=" * 50)
         log_info("Keybow Controller Starting")
         log_info("=" * 50)
-        layer_name = LAYERS.get(self.current_layer, {}).get('name', f"Layer {self.current_layer}")
-        log_info(f"Current layer: {self.current_layer} ({layer_name})")
+        log_info("Current layer: {} ({})", self.current_layer, self.layer_names[self.current_layer])
         log_info("Press Ctrl+C to stop")
         log_info("=" * 50 + "\n")
         try:
             while True:
-                self.keybow.update()
+                self.step()
         except KeyboardInterrupt:
             log_info("Keybow Controller stopped by user")
             self.release_all_keys()
+            log.flush()
         except Exception as e:
-            log_error(f"Unexpected error: {e}")
+            log_error("Unexpected error: {}", e)
             self.release_all_keys()
             log_info("Restarting in 3 seconds...")
             time.sleep(3)
             self.run()
 
-    def _extract_action(self, config):
-        if config is None:
-            return None
-        if isinstance(config, dict):
-            if 'modifier' in config and 'default' in config:
-                if len(self.held_modifiers) > 0:
-                    return self._extract_action(config['modifier'])
-                return self._extract_action(config['default'])
-            if 'action' in config:
-                return self._extract_action(config['action'])
-        if isinstance(config, (int, list)):
-            return config
-        return None
-
 
 def main():
     controller = KeybowController()
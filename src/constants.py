@@ -74,6 +74,80 @@ class LayerAction:
     MODIFIER = 'modifier'   # Marks a key as the layer modifier
 
 
+class LightingMode:
+    """Values for CONFIG['lighting_mode']."""
+    STATIC = 'static'         # Layer colors only (default)
+    BREATHING = 'breathing'   # All keys fade in and out together
+    RIPPLE = 'ripple'         # Rings spread out from each pressed key
+    WAVE = 'wave'             # A brightness wave runs across the columns
+
+
+LIGHTING_MODES = (
+    LightingMode.STATIC,
+    LightingMode.BREATHING,
+    LightingMode.RIPPLE,
+    LightingMode.WAVE,
+)
+
+
+class Function:
+    """Built-in actions for ActionType.FUNCTION keys."""
+    TOGGLE_ALL_LEDS = 'toggle_all_leds'
+    SHOW_LAYER_INFO = 'show_layer_info'
+    BRIGHTNESS_UP = 'brightness_up'
+    BRIGHTNESS_DOWN = 'brightness_down'
+    CANCEL_MACRO = 'cancel_macro'
+    RECORD_MACRO = 'record_macro'
+    DUMP_USAGE = 'dump_usage'
+    SHOW_HEATMAP = 'show_heatmap'
+    SHOW_TIMINGS = 'show_timings'
+
+
+FUNCTION_NAMES = (
+    Function.TOGGLE_ALL_LEDS,
+    Function.SHOW_LAYER_INFO,
+    Function.BRIGHTNESS_UP,
+    Function.BRIGHTNESS_DOWN,
+    Function.CANCEL_MACRO,
+    Function.RECORD_MACRO,
+    Function.DUMP_USAGE,
+    Function.SHOW_HEATMAP,
+    Function.SHOW_TIMINGS,
+)
+
+# Names accepted by ActionType.CONSUMER keys in place of a ConsumerControlCode value
+CONSUMER_NAMES = {
+    'play_pause': 0xCD,
+    'stop': 0xB7,
+    'next': 0xB5,
+    'previous': 0xB6,
+    'fast_forward': 0xB3,
+    'rewind': 0xB4,
+    'record': 0xB2,
+    'eject': 0xB8,
+    'mute': 0xE2,
+    'volume_up': 0xE9,
+    'volume_down': 0xEA,
+    'brightness_up': 0x6F,
+    'brightness_down': 0x70,
+}
+
+
+# Common color palette, used when a keymap does not define its own COLORS
+DEFAULT_COLORS = {
+    Color.OFF: (0, 0, 0),
+    Color.WHITE: (255, 255, 255),
+    Color.BLUE: (0, 0, 255),
+    Color.GREEN: (0, 255, 0),
+    Color.YELLOW: (255, 255, 0),
+    Color.RED: (255, 0, 0),
+    Color.ORANGE: (255, 128, 0),
+    Color.PURPLE: (128, 0, 255),
+    Color.CYAN: (0, 255, 255),
+    Color.PINK: (255, 0, 128),
+}
+
+
 # =====================================================================================
 # Keymap helpers
 # =====================================================================================
@@ -137,18 +211,7 @@ def create_simple_keymap(keys, colors=None, name="Simple Keymap"):
     }
 
     # Build COLORS mapping (common colors)
-    COLORS = {
-        Color.OFF: (0, 0, 0),
-        Color.WHITE: (255, 255, 255),
-        Color.BLUE: (0, 0, 255),
-        Color.GREEN: (0, 255, 0),
-        Color.YELLOW: (255, 255, 0),
-        Color.RED: (255, 0, 0),
-        Color.ORANGE: (255, 128, 0),
-        Color.PURPLE: (128, 0, 255),
-        Color.CYAN: (0, 255, 255),
-        Color.PINK: (255, 0, 128),
-    }
+    COLORS = dict(DEFAULT_COLORS)
 
     # Build CONFIG
     CONFIG = {
@@ -0,0 +1,53 @@
+"""
+KeybowFlow deadline queue
+One sorted queue of timed callbacks polled from the scan loop, so timers cost a
+single length check per scan while nothing is waiting.
+"""
+
+import time
+
+
+class DeadlineQueue:
+    """(deadline_ns, callback, token) entries, earliest first.
+
+    A token identifies what the timer is for (e.g. a key number); scheduling a
+    token again or cancelling it drops its earlier entry.
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def schedule(self, deadline_ns, callback, token):
+        self.cancel(token)
+        entries = self.entries
+        i = len(entries)
+        while i and entries[i - 1][0] > deadline_ns:
+            i -= 1
+        entries.insert(i, (deadline_ns, callback, token))
+
+    def cancel(self, token):
+        entries = self.entries
+        for i in range(len(entries)):
+            if entries[i][2] == token:
+                del entries[i]
+                return
+
+    def next_deadline(self):
+        return self.entries[0][0] if self.entries else None
+
+    def poll(self, now_ns=None):
+        """Run the callbacks whose deadline has passed; returns how many ran."""
+        entries = self.entries
+        if not entries:
+            return 0
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        ran = 0
+        while entries and entries[0][0] <= now_ns:
+            deadline_ns, callback, token = entries.pop(0)
+            callback(token, now_ns - deadline_ns)
+            ran += 1
+        return ran
@@ -0,0 +1,203 @@
+"""
+KeybowFlow debounce
+Filters switch chatter between PMK's edge detection and the key handlers.
+
+Each switch has a mode and a debounce time in milliseconds:
+
+    off       PMK's edges go straight to the handlers
+    eager     an edge is reported at once, then the key ignores further edges for
+              its debounce time; if the switch ended up in the other state when
+              the lock-out ends, that change is reported then
+    deferred  an edge is reported once the switch has stayed in the new state for
+              its debounce time, so glitches shorter than that never reach a handler
+
+An edge arriving within a key's debounce time of its previous edge counts as a bounce.
+"""
+
+import time
+from array import array
+
+from keytable import NUM_KEYS
+
+MODE_OFF = 0
+MODE_EAGER = 1
+MODE_DEFERRED = 2
+
+MODE_NAMES = {'off': MODE_OFF, 'eager': MODE_EAGER, 'deferred': MODE_DEFERRED}
+
+DEFAULT_DEBOUNCE_MS = 5
+MAX_DEBOUNCE_MS = 1000
+
+# Timestamps are milliseconds in a wrapping 32-bit counter
+_MS_MASK = 0xFFFFFFFF
+
+
+def _now_ms():
+    return (time.monotonic_ns() // 1000000) & _MS_MASK
+
+
+def parse_setting(value, mode=MODE_OFF, ms=DEFAULT_DEBOUNCE_MS):
+    """Return (mode, ms) for a debounce setting, or None if it is not one.
+
+    A setting is a mode name ('eager'), a time in ms (keeps `mode`), a
+    (mode name, ms) pair, or the same pair as text ('deferred:20').
+    """
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    elif isinstance(value, str) and ':' in value:
+        name, _, number = value.partition(':')
+        try:
+            value = (name, int(number))
+        except ValueError:
+            return None
+    if isinstance(value, str):
+        return (MODE_NAMES[value], ms) if value in MODE_NAMES else None
+    if isinstance(value, (tuple, list)) and len(value) == 2 and value[0] in MODE_NAMES:
+        mode, value = MODE_NAMES[value[0]], value[1]
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= MAX_DEBOUNCE_MS:
+        return mode, value
+    return None
+
+
+def key_settings(config, layers):
+    """Per-switch overrides {key number: setting} from key configs and CONFIG['debounce_keys'].
+
+    Key configs in inline layers may carry 'debounce'; CONFIG['debounce_keys'] wins over
+    them and may also be the text form written into keymap images ("3=deferred:20,0=eager").
+    """
+    settings = {}
+    for layer in layers.values():
+        if not isinstance(layer, dict):
+            continue
+        for key_num, key_config in layer.get('keys', {}).items():
+            if isinstance(key_config, dict) and 'debounce' in key_config:
+                settings[key_num] = key_config['debounce']
+    overrides = config.get('debounce_keys') or {}
+    if isinstance(overrides, str):
+        overrides = dict(
+            (int(key), setting) for key, _, setting in
+            (entry.partition('=') for entry in overrides.split(',') if entry)
+        )
+    settings.update(overrides)
+    return settings
+
+
+def format_key_settings(settings):
+    """Text form of key_settings() for a keymap image config entry."""
+    entries = []
+    for key_num, value in sorted(settings.items()):
+        if parse_setting(value) is None:
+            continue
+        if isinstance(value, (tuple, list)):
+            value = "{}:{}".format(*value)
+        entries.append("{}={}".format(key_num, value))
+    return ",".join(entries)
+
+
+class Debouncer:
+    """Per-switch debounce state in front of the controller's key handlers.
+
+    PMK calls on_press/on_release/on_hold on raw edges; the debouncer forwards the
+    edges that survive to press/release/hold. Call poll() every scan while
+    `pending` is non-zero to report lock-outs and settle times that have ended.
+    """
+
+    def __init__(self, keys, press, release, hold, modes, times):
+        self.keys = keys
+        self._press = press
+        self._release = release
+        self._hold = hold
+        self.modes = modes      # bytearray: MODE_* per key
+        self.times = times      # array('H'): debounce ms per key
+        now = _now_ms()
+        start = (now - 0x10000) & _MS_MASK   # older than any debounce time
+        # eager: when the last change was reported; deferred: when the last edge arrived
+        self.stamp = array('L', [start] * NUM_KEYS)
+        self.last_edge = array('L', [start] * NUM_KEYS)
+        self.bounces = array('L', [0] * NUM_KEYS)
+        self.raw = 0            # switch state as PMK last reported it (bit n = key n)
+        self.reported = 0       # state the handlers have seen
+        self.pending = 0        # keys waiting for a lock-out or settle time to end
+
+    @classmethod
+    def from_config(cls, config, layers, keys, press, release, hold):
+        """Build a debouncer from CONFIG, or return None when every key is 'off'."""
+        default = parse_setting(config.get('debounce', 'off'), MODE_OFF,
+                                config.get('debounce_ms', DEFAULT_DEBOUNCE_MS))
+        if default is None:
+            default = (MODE_OFF, DEFAULT_DEBOUNCE_MS)
+        modes = bytearray([default[0]] * NUM_KEYS)
+        times = array('H', [default[1]] * NUM_KEYS)
+        for key_num, value in key_settings(config, layers).items():
+            if not isinstance(key_num, int) or not 0 <= key_num < NUM_KEYS:
+                continue
+            parsed = parse_setting(value, modes[key_num], times[key_num])
+            if parsed is not None:
+                modes[key_num], times[key_num] = parsed
+        if not any(modes):
+            return None
+        return cls(keys, press, release, hold, modes, times)
+
+    @property
+    def bounce_count(self):
+        return sum(self.bounces)
+
+    def on_press(self, key):
+        self._edge(key, True)
+
+    def on_release(self, key):
+        self._edge(key, False)
+
+    def on_hold(self, key):
+        if self.reported & (1 << key.number):
+            self._hold(key)
+
+    def _edge(self, key, down):
+        key_num = key.number
+        bit = 1 << key_num
+        if down:
+            self.raw |= bit
+        else:
+            self.raw &= ~bit
+        mode = self.modes[key_num]
+        if mode == MODE_OFF:
+            self._report(key, key_num, down, 0)
+            return
+        now = _now_ms()
+        window = self.times[key_num]
+        if (now - self.last_edge[key_num]) & _MS_MASK < window:
+            self.bounces[key_num] += 1
+        self.last_edge[key_num] = now
+        if mode == MODE_EAGER and (now - self.stamp[key_num]) & _MS_MASK >= window:
+            self._report(key, key_num, down, now)
+            return
+        if mode == MODE_DEFERRED:
+            self.stamp[key_num] = now
+        self.pending |= bit
+
+    def _report(self, key, key_num, down, now):
+        bit = 1 << key_num
+        if down == bool(self.reported & bit):
+            return
+        self.stamp[key_num] = now
+        if down:
+            self.reported |= bit
+            self._press(key)
+        else:
+            self.reported &= ~bit
+            self._release(key)
+
+    def poll(self):
+        """Report keys whose lock-out or settle time has ended."""
+        pending = self.pending
+        if not pending:
+            return
+        now = _now_ms()
+        key_num = 0
+        while pending:
+            if pending & 1 and (now - self.stamp[key_num]) & _MS_MASK >= self.times[key_num]:
+                bit = 1 << key_num
+                self.pending &= ~bit
+                self._report(self.keys[key_num], key_num, bool(self.raw & bit), now)
+            pending >>= 1
+            key_num += 1
@@ -0,0 +1,194 @@
+"""
+KeybowFlow input event queue
+PMK's key callbacks only record (key, edge, time) in a fixed ring buffer; the
+scan loop then hands the events to the key handlers within a per-scan time
+budget, so a slow handler delays the next dispatch instead of the next scan.
+
+When the buffer is full a new event is dropped, or with the 'coalesce' policy
+room is made first: a queued hold is discarded, or the new edge cancels the
+key's last queued opposite edge (a press and release that never reached the
+handlers). After drops, once the buffer has drained, keys whose switch state
+disagrees with what the handlers last saw get the missing edge, so no key is
+left stuck down.
+
+The queue is off unless CONFIG sets event_queue_size.
+"""
+
+import time
+from array import array
+
+EDGE_RELEASE = 0
+EDGE_PRESS = 1
+EDGE_HOLD = 2
+
+POLICY_DROP = 0
+POLICY_COALESCE = 1
+POLICY_NAMES = {'drop': POLICY_DROP, 'coalesce': POLICY_COALESCE}
+
+DEFAULT_QUEUE_SIZE = 32          # suggested event_queue_size; the queue is off by default
+DEFAULT_DISPATCH_BUDGET_US = 2000
+
+# Timestamps are microseconds in a wrapping 32-bit counter
+_US_MASK = 0xFFFFFFFF
+
+
+def _now_us():
+    return (time.monotonic_ns() // 1000) & _US_MASK
+
+
+class EventQueue:
+    """Ring buffer of key edges between PMK and the key handlers.
+
+    on_press/on_release/on_hold are attached to PMK; dispatch() delivers queued
+    events to press/release/hold until the buffer is empty or budget_us has passed
+    (at least one event per call). `down`, if given, returns the mask of keys the
+    queue's source considers down (e.g. a debouncer's reported state); the resync
+    after drops follows it instead of the raw switches.
+    """
+
+    def __init__(self, keys, press, release, hold, size=DEFAULT_QUEUE_SIZE,
+                 budget_us=DEFAULT_DISPATCH_BUDGET_US, policy=POLICY_DROP, down=None):
+        self.keys = keys
+        self.down = down
+        self.handlers = (release, press, hold)   # indexed by EDGE_*
+        self.size = size
+        self.budget_ns = budget_us * 1000
+        self.policy = policy
+        self.key_nums = bytearray(size)
+        self.edges = bytearray(size)
+        self.times = array('L', [0] * size)
+        self.head = 0               # oldest queued event
+        self.count = 0
+        self.delivered = 0          # keys whose last dispatched edge was a press (bit n = key n)
+        self.resync = False         # events were dropped since the last resync
+        self.dropped = 0
+        self.coalesced = 0
+        self.peak = 0               # most events queued at once
+        self.max_wait_us = 0        # longest time an event waited for dispatch
+
+    @classmethod
+    def from_config(cls, config, keys, press, release, hold, down=None):
+        """Build a queue from CONFIG, or return None when event_queue_size is unset or 0."""
+        size = config.get('event_queue_size', 0)
+        if not isinstance(size, int) or size <= 0:
+            return None
+        budget_us = config.get('dispatch_budget_us', DEFAULT_DISPATCH_BUDGET_US)
+        policy = POLICY_NAMES.get(config.get('event_overflow', 'drop'), POLICY_DROP)
+        return cls(keys, press, release, hold, size, budget_us, policy, down)
+
+    def on_press(self, key):
+        self.push(key.number, EDGE_PRESS)
+
+    def on_release(self, key):
+        self.push(key.number, EDGE_RELEASE)
+
+    def on_hold(self, key):
+        self.push(key.number, EDGE_HOLD)
+
+    def push(self, key_num, edge):
+        if self.count == self.size and not self._make_room(key_num, edge):
+            return
+        tail = (self.head + self.count) % self.size
+        self.key_nums[tail] = key_num
+        self.edges[tail] = edge
+        self.times[tail] = _now_us()
+        self.count += 1
+        if self.count > self.peak:
+            self.peak = self.count
+
+    def _make_room(self, key_num, edge):
+        """Handle a push into a full buffer; True if the event should still be stored."""
+        if self.policy == POLICY_COALESCE:
+            if edge == EDGE_HOLD:
+                self.coalesced += 1
+                return False
+            pos = self._find(EDGE_HOLD, None)
+            if pos is not None:
+                self._remove(pos)
+                self.coalesced += 1
+                return True
+            pos = self._find(None, key_num)
+            if pos is not None and self.edges[pos] != EDGE_HOLD and self.edges[pos] != edge:
+                # The queued edge and this one cancel out
+                self._remove(pos)
+                self.coalesced += 2
+                return False
+        self.dropped += 1
+        if edge != EDGE_HOLD:
+            self.resync = True
+        return False
+
+    def _find(self, edge, key_num):
+        """Position of the newest queued event matching `edge` or `key_num`, or None."""
+        for offset in range(self.count - 1, -1, -1):
+            pos = (self.head + offset) % self.size
+            if (edge is None or self.edges[pos] == edge) and (key_num is None or self.key_nums[pos] == key_num):
+                return pos
+        return None
+
+    def _remove(self, pos):
+        """Drop the event at ring position `pos`, closing the gap."""
+        size = self.size
+        offset = (pos - self.head) % size
+        for _ in range(offset, self.count - 1):
+            nxt = (pos + 1) % size
+            self.key_nums[pos] = self.key_nums[nxt]
+            self.edges[pos] = self.edges[nxt]
+            self.times[pos] = self.times[nxt]
+            pos = nxt
+        self.count -= 1
+
+    def dispatch(self):
+        """Deliver queued events within the time budget; returns how many were delivered."""
+        start_ns = time.monotonic_ns()
+        now_us = (start_ns // 1000) & _US_MASK
+        keys, handlers, size = self.keys, self.handlers, self.size
+        delivered = 0
+        while self.count:
+            pos = self.head
+            key_num, edge = self.key_nums[pos], self.edges[pos]
+            wait_us = (now_us - self.times[pos]) & _US_MASK
+            if wait_us > self.max_wait_us:
+                self.max_wait_us = wait_us
+            self.head = (pos + 1) % size
+            self.count -= 1
+            if edge == EDGE_PRESS:
+                self.delivered |= 1 << key_num
+            elif edge == EDGE_RELEASE:
+                self.delivered &= ~(1 << key_num)
+            handlers[edge](keys[key_num])
+            delivered += 1
+            if self.count and time.monotonic_ns() - start_ns >= self.budget_ns:
+                break
+        if self.resync and not self.count:
+            self._resync()
+        return delivered
+
+    def _resync(self):
+        """Send the edges lost to drops, from each key's current state."""
+        self.resync = False
+        if self.down is not None:
+            down = self.down()
+        else:
+            down = 0
+            for key in self.keys:
+                if key.pressed:
+                    down |= 1 << key.number
+        # Releases first, so the report never holds more keys than are down
+        for key in self.keys:
+            bit = 1 << key.number
+            if not down & bit and self.delivered & bit:
+                self.delivered &= ~bit
+                self.handlers[EDGE_RELEASE](key)
+        for key in self.keys:
+            bit = 1 << key.number
+            if down & bit and not self.delivered & bit:
+                self.delivered |= bit
+                self.handlers[EDGE_PRESS](key)
+
+    def clear(self):
+        """Forget queued events; the handlers are treated as having seen every key released."""
+        self.head = 0
+        self.count = 0
+        self.delivered = 0
+        self.resync = False
@@ -0,0 +1,116 @@
+"""
+KeybowFlow LED framebuffer
+Buffers LED writes between the controller and PMK and flushes only changed pixels.
+"""
+
+from keytable import NUM_KEYS
+from ledframes import FRAME_SIZE
+
+ALL_KEYS = (1 << NUM_KEYS) - 1
+
+
+class LedFramebuffer:
+    """Dirty-tracked 16-pixel framebuffer in front of the PMK keys.
+
+    Writes made during a scan only touch the target bytearray; flush() then pushes
+    the pixels whose color (or on/off state) differs from what was last written.
+    Pixels flagged stale are rewritten regardless, for when something outside the
+    framebuffer (PMK sleep, toggle_led) changed the hardware behind its back.
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.target = bytearray(FRAME_SIZE)
+        self.shown = bytearray(FRAME_SIZE)
+        self.off_target = ALL_KEYS
+        self.off_shown = ALL_KEYS
+        self.dirty = 0
+        self.stale = ALL_KEYS
+        self.writes = 0
+
+    def set_from(self, key_num, frame):
+        """Copy one pixel out of a LayerFrames frame."""
+        offset = key_num * 3
+        target = self.target
+        target[offset] = frame[offset]
+        target[offset + 1] = frame[offset + 1]
+        target[offset + 2] = frame[offset + 2]
+        bit = 1 << key_num
+        self.off_target &= ~bit
+        self.dirty |= bit
+
+    def set(self, key_num, r, g, b):
+        offset = key_num * 3
+        target = self.target
+        target[offset] = r
+        target[offset + 1] = g
+        target[offset + 2] = b
+        bit = 1 << key_num
+        self.off_target &= ~bit
+        self.dirty |= bit
+
+    def off(self, key_num):
+        bit = 1 << key_num
+        self.off_target |= bit
+        self.dirty |= bit
+
+    def load(self, frame, colored):
+        """Replace the whole target with a frame; keys not in `colored` are turned off."""
+        self.target[:] = frame
+        self.off_target = ALL_KEYS & ~colored
+        self.dirty = ALL_KEYS
+
+    def load_changed(self, frame, colored, changed):
+        """Switch to a frame that only differs from the current target in `changed`.
+
+        The whole frame is copied in one go, but only the `changed` keys are marked
+        dirty, so flush() skips the pixels both frames agree on.
+        """
+        self.target[:] = frame
+        self.off_target = (self.off_target & ~changed) | (changed & ~colored)
+        self.dirty |= changed
+
+    def all_off(self):
+        self.off_target = ALL_KEYS
+        self.dirty = ALL_KEYS
+
+    def invalidate(self, mask=ALL_KEYS):
+        self.stale |= mask
+
+    def flush(self):
+        """Write changed pixels to the hardware; returns the number of pixels written."""
+        dirty = self.dirty
+        if not dirty:
+            return 0
+        self.dirty = 0
+        target = self.target
+        shown = self.shown
+        written = 0
+        key_num = 0
+        while dirty:
+            if dirty & 1:
+                bit = 1 << key_num
+                offset = key_num * 3
+                if self.off_target & bit:
+                    if self.stale & bit or not self.off_shown & bit:
+                        self.keys[key_num].led_off()
+                        self.off_shown |= bit
+                        written += 1
+                elif (
+                    self.stale & bit
+                    or self.off_shown & bit
+                    or target[offset] != shown[offset]
+                    or target[offset + 1] != shown[offset + 1]
+                    or target[offset + 2] != shown[offset + 2]
+                ):
+                    r = shown[offset] = target[offset]
+                    g = shown[offset + 1] = target[offset + 1]
+                    b = shown[offset + 2] = target[offset + 2]
+                    self.keys[key_num].set_led(r, g, b)
+                    self.off_shown &= ~bit
+                    written += 1
+                self.stale &= ~bit
+            dirty >>= 1
+            key_num += 1
+        self.writes += written
+        return written
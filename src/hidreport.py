@@ -0,0 +1,176 @@
+"""
+KeybowFlow keyboard report builder
+Builds the keyboard report from two sources: the pad's keys, counted per
+keycode so two keys holding the same modifier (two Ctrl combos) keep it down
+until both are released, and the keys the playing macro holds. Each report is
+the union of both, so neither source can release what the other still holds.
+Everything the key handlers changed during one scan goes out as a single
+report, and a report identical to the one the host already has is not sent.
+"""
+
+_FIRST_MODIFIER = 0xE0
+
+
+def slot_of(report, keycode):
+    """Index of `keycode` in the key slots of a boot keyboard report, or 0."""
+    for i in range(2, 8):
+        if report[i] == keycode:
+            return i
+    return 0
+
+
+def keyboard_sender(keyboard, devices=()):
+    """The function that sends a raw report to the HID device behind `keyboard`.
+
+    adafruit_hid's Keyboard only sends the reports its own press/release build, so
+    this takes the device it keeps in the private _keyboard_device (adafruit_hid is
+    pinned in cp_requirements.txt). Should a release rename it, the device is looked
+    up in `devices` the way Keyboard does; failing that, each report is replayed
+    through Keyboard.release_all() and press(), at two reports per send.
+    """
+    device = getattr(keyboard, '_keyboard_device', None)
+    if device is None:
+        try:
+            from adafruit_hid import find_device
+            device = find_device(devices, usage_page=0x1, usage=0x06)
+        except (ImportError, ValueError):
+            device = None
+    if device is not None:
+        return device.send_report
+
+    def replay(report):
+        codes = [_FIRST_MODIFIER + bit for bit in range(8) if report[0] & (1 << bit)]
+        codes.extend(code for code in report[2:] if code)
+        keyboard.release_all()
+        if codes:
+            keyboard.press(*codes)
+
+    return replay
+
+
+def _place(report, keycode):
+    if not slot_of(report, keycode):
+        slot = slot_of(report, 0)
+        if slot:
+            report[slot] = keycode
+
+
+class ReportBuilder:
+    """adafruit_hid's keyboard report, rebuilt from the pad and macro sources.
+
+    press(codes)/release(codes) only update the pad's counts and set_macro() replaces
+    what the macro holds; flush() rebuilds the report from both and sends it. Keys
+    keep their report slot while held; with all six slots taken a key waits for a
+    later flush.
+    """
+
+    def __init__(self, keyboard, devices=()):
+        self.report = keyboard.report
+        self.device_send = keyboard_sender(keyboard, devices)
+        self._send_report = self.device_send
+        self.last = bytearray(self.report)   # report the host last received
+        self.modifier_counts = bytearray(8)  # pad keys holding each modifier (bit order)
+        self.key_counts = {}                 # keycode -> pad keys holding it
+        self.macro_modifiers = 0             # modifier bits the playing macro holds
+        self.macro_keys = ()                 # keycodes the playing macro holds
+        self._changes = 0                    # changes since the last flush
+        self.sent = 0
+        self.skipped = 0                     # reports identical to the previous one
+        self.merged = 0                      # changes that shared a report with another
+
+    def press(self, codes):
+        for code in codes:
+            if code >= _FIRST_MODIFIER:
+                self.modifier_counts[code - _FIRST_MODIFIER] += 1
+            else:
+                self.key_counts[code] = self.key_counts.get(code, 0) + 1
+        self._changes += 1
+
+    def release(self, codes):
+        # A press the host has not seen yet goes out first, so a tap inside one scan
+        # is still a press and a release
+        if self._changes and not self._reported(codes):
+            self.flush()
+        for code in codes:
+            if code >= _FIRST_MODIFIER:
+                i = code - _FIRST_MODIFIER
+                if self.modifier_counts[i]:
+                    self.modifier_counts[i] -= 1
+            else:
+                count = self.key_counts.get(code, 0)
+                if count > 1:
+                    self.key_counts[code] = count - 1
+                elif count:
+                    del self.key_counts[code]
+        self._changes += 1
+
+    def tap(self, codes):
+        self.press(codes)
+        self.release(codes)
+
+    def set_macro(self, modifiers, keys):
+        self.macro_modifiers = modifiers
+        self.macro_keys = keys
+        self._changes += 1
+
+    def fits(self, keys):
+        """True if `keys` fit the report's six slots next to the pad's keys."""
+        used = len(self.key_counts)
+        for keycode in keys:
+            if keycode not in self.key_counts:
+                used += 1
+        return used <= 6
+
+    def _reported(self, codes):
+        last = self.last
+        for code in codes:
+            if code >= _FIRST_MODIFIER:
+                if not last[0] & (1 << (code - _FIRST_MODIFIER)):
+                    return False
+            elif not slot_of(last, code):
+                return False
+        return True
+
+    def flush(self):
+        """Rebuild the report from the pad and macro sources and send it if anything changed."""
+        changes = self._changes
+        if not changes:
+            return
+        self._changes = 0
+        self.merged += changes - 1
+        report = self.report
+        modifiers = self.macro_modifiers
+        counts = self.modifier_counts
+        for i in range(8):
+            if counts[i]:
+                modifiers |= 1 << i
+        report[0] = modifiers
+        held = self.key_counts
+        macro = self.macro_keys
+        for i in range(2, 8):
+            keycode = report[i]
+            if keycode and keycode not in held and keycode not in macro:
+                report[i] = 0
+        for keycode in held:
+            _place(report, keycode)
+        for keycode in macro:
+            _place(report, keycode)
+        self.send(report)
+
+    def send(self, report):
+        if report == self.last:
+            self.skipped += 1
+            return
+        self.last[:] = report
+        self._send_report(report)
+        self.sent += 1
+
+    def reset(self):
+        """Forget every held key after keyboard.release_all()."""
+        for i in range(8):
+            self.modifier_counts[i] = 0
+        self.key_counts = {}
+        self.macro_modifiers = 0
+        self.macro_keys = ()
+        self._changes = 0
+        self.last[:] = self.report
@@ -0,0 +1,235 @@
+"""
+KeybowFlow keymap checks
+One pass over LAYERS at load time that finds the mistakes the key handlers
+would otherwise trip over (or silently ignore) on every press.
+
+Errors disable the key they belong to; warnings are reported and the key keeps
+working (an unknown color shows as off).
+"""
+
+from constants import ActionType, LayerAction, CONSUMER_NAMES, FUNCTION_NAMES, LIGHTING_MODES
+from debounce import parse_setting
+from eventqueue import POLICY_NAMES
+from keytable import MAX_STEP_DELAY_MS, NUM_KEYS
+from log import ERROR, WARNING
+from taphold import MAX_TAPPING_TERM, valid_term
+
+# Step types a SEQUENCE can play
+_SEQUENCE_STEP_TYPES = (ActionType.KEY, ActionType.STRING, ActionType.CONSUMER, ActionType.SEQUENCE)
+
+
+class Problem:
+    """One finding: `layer` and `key` are None when it concerns the whole keymap or layer."""
+
+    def __init__(self, severity, layer, key, message):
+        self.severity = severity
+        self.layer = layer
+        self.key = key
+        self.message = message
+
+    def __str__(self):
+        if self.layer is None:
+            return self.message
+        if self.key is None:
+            return "Layer {}: {}".format(self.layer, self.message)
+        return "Layer {} key {}: {}".format(self.layer, self.key, self.message)
+
+
+def _is_keycode(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value < 256
+
+
+def _check_keycodes(action):
+    codes = action if isinstance(action, (list, tuple)) else (action,)
+    if not codes:
+        return "empty keycode list"
+    for code in codes:
+        if not _is_keycode(code):
+            return "{!r} is not a keycode".format(code)
+    return None
+
+
+def _check_consumer(action):
+    if isinstance(action, str):
+        if action.lower() not in CONSUMER_NAMES:
+            return "unknown consumer control '{}'".format(action)
+        return None
+    if not isinstance(action, int) or isinstance(action, bool) or not 0 < action <= 0xFFFF:
+        return "{!r} is not a consumer control code".format(action)
+    return None
+
+
+def _check_string(action):
+    if not isinstance(action, str):
+        return "STRING action must be text, not {!r}".format(action)
+    for char in action:
+        if ord(char) > 127:
+            return "cannot type {!r} with the US keyboard layout".format(char)
+    return None
+
+
+def _check_sequence(action, layers):
+    if not isinstance(action, (list, tuple)) or not action:
+        return "SEQUENCE action must be a non-empty list"
+    for step in action:
+        if isinstance(step, dict) and 'delay' in step:
+            delay = step['delay']
+            if not isinstance(delay, int) or isinstance(delay, bool) or not 0 <= delay <= MAX_STEP_DELAY_MS:
+                return "sequence step: delay must be 0-{} ms, not {!r}".format(MAX_STEP_DELAY_MS, delay)
+            if 'type' not in step and 'action_type' not in step:
+                continue
+        if isinstance(step, dict):
+            step_type = step.get('type', step.get('action_type'))
+            if step_type not in _SEQUENCE_STEP_TYPES:
+                return "sequence step type {!r} cannot run in a sequence".format(step_type)
+            error = _check_typed(step_type, step.get('action'), layers)
+        else:
+            error = _check_keycodes(step)
+        if error:
+            return "sequence step: " + error
+    return None
+
+
+def _check_typed(action_type, action, layers):
+    if action_type == ActionType.NONE:
+        return None
+    if action is None:
+        return "{} key has no action".format(action_type)
+    if action_type == ActionType.KEY:
+        return _check_keycodes(action)
+    if action_type == ActionType.SEQUENCE:
+        return _check_sequence(action, layers)
+    if action_type == ActionType.STRING:
+        return _check_string(action)
+    if action_type == ActionType.CONSUMER:
+        return _check_consumer(action)
+    if action_type == ActionType.LAYER:
+        if action == LayerAction.MODIFIER:
+            return None
+        if action not in layers:
+            return "layer {!r} does not exist".format(action)
+        return None
+    if action_type == ActionType.FUNCTION:
+        if not callable(action) and action not in FUNCTION_NAMES:
+            return "unknown function {!r}".format(action)
+        return None
+    return "unknown action_type {!r}".format(action_type)
+
+
+def _check_tap_hold(config, layers):
+    for branch in ('tap', 'hold'):
+        action = config[branch]
+        if isinstance(action, dict) and 'tap' in action:
+            return "{} branch: tap-hold keys cannot be nested".format(branch)
+        error = check_action(action, layers)
+        if error:
+            return "{} branch: {}".format(branch, error)
+    term = config.get('tapping_term')
+    if term is not None and not valid_term(term):
+        return "tapping_term must be 1-{} ms, not {!r}".format(MAX_TAPPING_TERM, term)
+    for option in ('permissive_hold', 'hold_on_other_key_press'):
+        if option in config and not isinstance(config[option], bool):
+            return "{} must be True or False".format(option)
+    return None
+
+
+def check_action(config, layers):
+    """Return why `config` (a key's action) cannot run, or None if it can."""
+    if not isinstance(config, dict):
+        return _check_keycodes(config)
+    action = config.get('action')
+    if config.get('action_type') == LayerAction.MODIFIER or (
+            isinstance(action, dict) and action.get('action_type') == LayerAction.MODIFIER):
+        return None
+    if 'tap' in config and 'hold' in config:
+        return _check_tap_hold(config, layers)
+    if 'default' in config and 'modifier' in config:
+        for branch in ('default', 'modifier'):
+            error = check_action(config[branch], layers)
+            if error:
+                return "{} branch: {}".format(branch, error)
+        return None
+    if 'action_type' not in config:
+        return None if action is None else "action without an action_type"
+    return _check_typed(config['action_type'], action, layers)
+
+
+def _check_color(color, colors):
+    if isinstance(color, str):
+        return None if color in colors else "unknown color '{}'".format(color)
+    if isinstance(color, (list, tuple)) and len(color) == 3 and all(
+            isinstance(c, int) and 0 <= c <= 255 for c in color):
+        return None
+    return "{!r} is not a color name or (r, g, b) tuple".format(color)
+
+
+def validate_layers(layers, colors, config=None):
+    """Check LAYERS (and CONFIG's default layer); returns a list of Problems.
+
+    Layers given as module references (see layercache.py) are checked when they load.
+    """
+    problems = []
+    if not isinstance(layers, dict) or not layers:
+        return [Problem(ERROR, None, None, "LAYERS must be a non-empty dict")]
+    config = config or {}
+    default_layer = config.get('default_layer', 0)
+    if default_layer not in layers:
+        problems.append(Problem(ERROR, None, None, "default layer {!r} does not exist".format(default_layer)))
+    if 'tapping_term' in config and not valid_term(config['tapping_term']):
+        problems.append(Problem(WARNING, None, None, "tapping_term must be 1-{} ms, not {!r}; using the default".format(
+            MAX_TAPPING_TERM, config['tapping_term'])))
+    if config.get('event_overflow', 'drop') not in POLICY_NAMES:
+        problems.append(Problem(WARNING, None, None, "unknown event_overflow {!r}, using 'drop'".format(config['event_overflow'])))
+    if config.get('lighting_mode', 'static') not in LIGHTING_MODES:
+        problems.append(Problem(WARNING, None, None, "unknown lighting_mode {!r}, using 'static'".format(config['lighting_mode'])))
+    if 'debounce' in config and parse_setting(config['debounce']) is None:
+        problems.append(Problem(WARNING, None, None, "invalid debounce setting {!r}, using off".format(config['debounce'])))
+    debounce_keys = config.get('debounce_keys', {})
+    for key_num, setting in (debounce_keys.items() if isinstance(debounce_keys, dict) else ()):
+        if parse_setting(setting) is None:
+            problems.append(Problem(WARNING, None, None, "invalid debounce setting {!r} for key {}, ignored".format(setting, key_num)))
+    for idx, layer in layers.items():
+        if not isinstance(idx, int):
+            problems.append(Problem(ERROR, idx, None, "layer index must be an int"))
+        elif not isinstance(layer, str):
+            problems.extend(validate_layer(idx, layer, layers, colors))
+    return problems
+
+
+def validate_layer(idx, layer, layers, colors):
+    """Check one layer dict; `layers` is only used to look up LAYER targets."""
+    problems = []
+    keys = layer.get('keys') if isinstance(layer, dict) else None
+    if not isinstance(keys, dict):
+        return [Problem(ERROR, idx, None, "layer must be a dict with a 'keys' dict")]
+    for key_num, key_config in keys.items():
+        if not isinstance(key_num, int) or not 0 <= key_num < NUM_KEYS:
+            problems.append(Problem(ERROR, idx, key_num, "key number must be 0-{}".format(NUM_KEYS - 1)))
+            continue
+        if not key_config:
+            continue
+        error = check_action(key_config, layers)
+        if error:
+            problems.append(Problem(ERROR, idx, key_num, error))
+        if isinstance(key_config, dict) and 'debounce' in key_config and parse_setting(key_config['debounce']) is None:
+            problems.append(Problem(WARNING, idx, key_num, "invalid debounce setting {!r}, ignored".format(key_config['debounce'])))
+        key_colors = key_config.get('colors') if isinstance(key_config, dict) else None
+        if key_colors is None:
+            continue
+        if not isinstance(key_colors, dict):
+            problems.append(Problem(WARNING, idx, key_num, "colors must be a dict of state: color"))
+            continue
+        for state, color in key_colors.items():
+            warning = _check_color(color, colors)
+            if warning:
+                problems.append(Problem(WARNING, idx, key_num, "{} {}, using off".format(state, warning)))
+    return problems
+
+
+def disabled_keys(problems):
+    """Map layer index -> key numbers with errors, for keytable.compile_layers."""
+    disabled = {}
+    for problem in problems:
+        if problem.severity == ERROR and problem.key is not None:
+            disabled.setdefault(problem.layer, set()).add(problem.key)
+    return disabled
@@ -0,0 +1,191 @@
+"""
+KeybowFlow keymap image
+Loads a keymap compiled offline by scripts/compile_keymap.py, so the device
+builds its key tables straight from packed records instead of importing
+keymap.py and its nested dicts. Images are checked when they are compiled.
+Loading decodes only the header, palette, layer names and CONFIG; a layer's
+records are unpacked when the layer cache first loads it.
+
+Image layout (little-endian):
+
+    header   magic "KBFM", version, layer count, then palette, blob, record
+             and config entry counts
+    palette  3 bytes (r, g, b) per color; index 0 is 'off'
+    blobs    (count + 1) u16 offsets into the blob data, then the data: keycode
+             lists, text, function names and sequence step lists, each stored once
+    records  8 bytes each: kind, default/pressed/held palette indices
+             (NO_COLORS when the key has none), then two u16 operands; tap-hold
+             keys point at a TAP_HOLD blob (tap and hold records, then options)
+    layers   layer index, pad, name blob, 16 u16 record indices
+    config   u16 key blob, value type, i32 value (a blob index for text, floats
+             and integer lists, whose blob holds the i32 items)
+"""
+
+import struct
+
+from keytable import (
+    NUM_KEYS, KIND_KEY, KIND_LAYER, KIND_DUAL, KIND_SEQUENCE, KIND_STRING,
+    KIND_CONSUMER, KIND_FUNCTION, KIND_TAP_HOLD, KIND_DELAY, KeyRecord, Palette,
+)
+
+MAGIC = b"KBFM"
+VERSION = 1
+
+HEADER = "<4sBBHHHH"
+RECORD = "<BBBBHH"
+LAYER = "<BBH" + "H" * NUM_KEYS
+CONFIG_ENTRY = "<HBi"
+TAP_HOLD = "<HHHBB"   # tap record, hold record, tapping term ms, permissive_hold, hold_on_other_key_press
+
+HEADER_SIZE = struct.calcsize(HEADER)
+RECORD_SIZE = struct.calcsize(RECORD)
+LAYER_SIZE = struct.calcsize(LAYER)
+CONFIG_ENTRY_SIZE = struct.calcsize(CONFIG_ENTRY)
+
+# Record colors byte meaning "no colors"
+NO_COLORS = 0xFF
+
+# Tap-hold option values meaning "use CONFIG"
+TERM_UNSET = 0xFFFF
+FLAG_UNSET = 0xFF
+
+# Config value types
+VALUE_NONE = 0
+VALUE_BOOL = 1
+VALUE_INT = 2
+VALUE_FLOAT = 3  # stored as text so the value round-trips exactly
+VALUE_TEXT = 4
+VALUE_INTS = 5   # list of integers, decoded as a tuple
+
+
+class KeymapImage:
+    """Palette, layer names and CONFIG decoded from an image, plus its packed layers.
+
+    The image buffer is kept; layer_table() unpacks one layer's key records when
+    the layer is first used, so layers never entered cost no decoded objects.
+    """
+
+    def __init__(self, view, palette, bounds, blobs, records_start, layers, layer_names, config):
+        self.view = view
+        self.palette = palette
+        self._bounds = bounds
+        self._blobs = blobs
+        self._records_start = records_start
+        self._layers = layers        # layer index -> offset of its layer entry
+        self.layer_names = layer_names
+        self.config = config
+
+    def blob(self, index):
+        return self._blobs[self._bounds[index]:self._bounds[index + 1]]
+
+    def text(self, index):
+        return str(bytes(self.blob(index)), "utf-8")
+
+    def layer_table(self, layer):
+        """Decode the 16 key records of `layer`; raises KeyError if the image has no such layer."""
+        entry = struct.unpack_from(LAYER, self.view, self._layers[layer])
+        view, start, palette, blob, text = self.view, self._records_start, self.palette, self.blob, self.text
+        # Records shared within the layer (dual branches, sequence steps) are decoded once
+        records = {}
+
+        def record(index):
+            decoded = records.get(index)
+            if decoded is None:
+                raw = struct.unpack_from(RECORD, view, start + index * RECORD_SIZE)
+                decoded = records[index] = _decode_record(raw, palette, record, blob, text)
+            return decoded
+
+        return [record(index) for index in entry[3:]]
+
+
+def load(path):
+    """Read and decode the image at `path`; raises OSError if it is missing."""
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(0)
+        # One buffer of the file's size, rather than read()'s growing copies
+        data = bytearray(size)
+        if f.readinto(data) != size:
+            raise ValueError("Keymap image is truncated")
+    return decode(data)
+
+
+def decode(data):
+    """Decode an image's header, palette, layer names and CONFIG; key records stay packed."""
+    view = memoryview(data)
+    if len(view) < HEADER_SIZE:
+        raise ValueError("Keymap image is truncated")
+    magic, version, layer_count, color_count, blob_count, record_count, config_count = (
+        struct.unpack_from(HEADER, view, 0)
+    )
+    if bytes(magic) != MAGIC or version != VERSION:
+        raise ValueError("Not a version {} keymap image".format(VERSION))
+    offset = HEADER_SIZE
+
+    rgb = []
+    for _ in range(color_count):
+        rgb.append((view[offset], view[offset + 1], view[offset + 2]))
+        offset += 3
+    palette = Palette.from_rgb(rgb)
+
+    bounds = struct.unpack_from("<" + "H" * (blob_count + 1), view, offset)
+    offset += 2 * (blob_count + 1)
+    blobs = view[offset:offset + bounds[-1]]
+    offset += bounds[-1]
+    records_start = offset
+    offset += record_count * RECORD_SIZE
+    layers, layer_names, config = {}, {}, {}
+    image = KeymapImage(view, palette, bounds, blobs, records_start, layers, layer_names, config)
+    text = image.text
+    if offset + layer_count * LAYER_SIZE + config_count * CONFIG_ENTRY_SIZE > len(view):
+        raise ValueError("Keymap image is truncated")
+
+    for _ in range(layer_count):
+        layer, _, name = struct.unpack_from("<BBH", view, offset)
+        layers[layer] = offset
+        layer_names[layer] = text(name)
+        offset += LAYER_SIZE
+
+    for _ in range(config_count):
+        key, value_type, value = struct.unpack_from(CONFIG_ENTRY, view, offset)
+        offset += CONFIG_ENTRY_SIZE
+        if value_type == VALUE_BOOL:
+            value = bool(value)
+        elif value_type == VALUE_FLOAT:
+            value = float(text(value))
+        elif value_type == VALUE_TEXT:
+            value = text(value)
+        elif value_type == VALUE_INTS:
+            items = image.blob(value)
+            value = struct.unpack_from("<" + "i" * (len(items) // 4), items, 0)
+        elif value_type != VALUE_INT:
+            value = None
+        config[text(key)] = value
+
+    return image
+
+
+def _decode_record(raw, palette, record, blob, text):
+    kind, default, pressed, held, a, b = raw
+    colors = None if default == NO_COLORS else palette.states(default, pressed, held)
+    if kind == KIND_KEY:
+        return KeyRecord(kind, tuple(blob(a)), colors)
+    if kind == KIND_LAYER or kind == KIND_CONSUMER or kind == KIND_DELAY:
+        return KeyRecord(kind, a, colors)
+    if kind == KIND_DUAL:
+        return KeyRecord(kind, None, colors, default=record(a), modifier=record(b))
+    if kind == KIND_TAP_HOLD:
+        tap, hold, term, permissive, hold_on_other = struct.unpack_from(TAP_HOLD, blob(a), 0)
+        options = (
+            None if term == TERM_UNSET else term,
+            None if permissive == FLAG_UNSET else bool(permissive),
+            None if hold_on_other == FLAG_UNSET else bool(hold_on_other),
+        )
+        return KeyRecord(kind, options, colors, default=record(tap), modifier=record(hold))
+    if kind == KIND_SEQUENCE:
+        steps = struct.unpack_from("<" + "H" * (len(blob(a)) // 2), blob(a), 0)
+        return KeyRecord(kind, tuple(record(index) for index in steps), colors)
+    if kind == KIND_STRING or kind == KIND_FUNCTION:
+        return KeyRecord(kind, text(a), colors)
+    return KeyRecord(kind, None, colors)
@@ -0,0 +1,231 @@
+"""
+KeybowFlow key table
+Compiles LAYERS into fixed 16-slot per-layer tables of pre-resolved key records.
+"""
+
+from constants import ActionType, LayerAction, CONSUMER_NAMES
+
+NUM_KEYS = 16
+
+# Record kinds, resolved once at load time so the event handlers only branch on an int
+KIND_NONE = 0
+KIND_KEY = 1
+KIND_MODIFIER = 2
+KIND_LAYER = 3
+KIND_DUAL = 4
+KIND_SEQUENCE = 5
+KIND_STRING = 6
+KIND_CONSUMER = 7
+KIND_FUNCTION = 8
+KIND_TAP_HOLD = 9
+KIND_DELAY = 10    # sequence pause, payload ms; only found among SEQUENCE steps
+
+# Longest sequence pause in ms (stored as a u16 in keymap images)
+MAX_STEP_DELAY_MS = 0xFFFF
+
+_KIND_BY_ACTION_TYPE = {
+    ActionType.KEY: KIND_KEY,
+    ActionType.SEQUENCE: KIND_SEQUENCE,
+    ActionType.STRING: KIND_STRING,
+    ActionType.CONSUMER: KIND_CONSUMER,
+    ActionType.LAYER: KIND_LAYER,
+    ActionType.FUNCTION: KIND_FUNCTION,
+    ActionType.NONE: KIND_NONE,
+}
+
+# Fallback color names per LED state, matching the runtime defaults
+DEFAULT_STATE_COLORS = ('off', 'white', 'yellow')
+
+
+class KeyRecord:
+    """A pre-resolved key action.
+
+    kind: one of the KIND_* constants
+    payload: tuple of keycodes (KEY), layer index (LAYER), tuple of step records (SEQUENCE),
+             text (STRING), consumer code (CONSUMER), function name (FUNCTION) or the
+             ms to wait (DELAY)
+    colors: (default, pressed, held) palette indices, or None when the key has no colors
+    default/modifier: branch records for KIND_DUAL keys; tap/hold records for KIND_TAP_HOLD,
+                      whose payload is (tapping term ms, permissive_hold, hold_on_other_key_press)
+                      with None for options left to CONFIG
+    """
+
+    __slots__ = ('kind', 'payload', 'colors', 'default', 'modifier')
+
+    def __init__(self, kind, payload=None, colors=None, default=None, modifier=None):
+        self.kind = kind
+        self.payload = payload
+        self.colors = colors
+        self.default = default
+        self.modifier = modifier
+
+
+EMPTY_RECORD = KeyRecord(KIND_NONE)
+
+
+class Palette:
+    """Interned list of RGB colors addressed by index."""
+
+    def __init__(self, colors):
+        self.colors = colors
+        self.rgb = []
+        self._index = {}
+        self._states = {}
+        self.off = self.resolve('off')
+
+    @classmethod
+    def from_rgb(cls, rgb):
+        """Rebuild a palette from its interned colors, in index order ('off' first)."""
+        palette = cls({'off': rgb[0] if rgb else (0, 0, 0)})
+        for color in rgb:
+            palette._intern(color)
+        return palette
+
+    def _intern(self, rgb):
+        rgb = tuple(int(c) for c in rgb)
+        idx = self._index.get(rgb)
+        if idx is None:
+            idx = len(self.rgb)
+            self.rgb.append(rgb)
+            self._index[rgb] = idx
+        return idx
+
+    def states(self, default, pressed, held):
+        """Shared (default, pressed, held) index tuple, so keys with equal colors share one."""
+        key = (default, pressed, held)
+        return self._states.setdefault(key, key)
+
+    def resolve(self, color_input):
+        if isinstance(color_input, (tuple, list)) and len(color_input) == 3:
+            return self._intern(color_input)
+        if isinstance(color_input, str) and color_input in self.colors:
+            return self._intern(self.colors[color_input])
+        return self._intern(self.colors.get('off', (0, 0, 0)))
+
+
+def _keycodes(action):
+    if isinstance(action, int):
+        return (action,)
+    if isinstance(action, (list, tuple)):
+        return tuple(action)
+    return None
+
+
+def _sequence_steps(action):
+    """Compile SEQUENCE items (keycodes, keycode lists or {'type', 'action'} dicts) to records.
+
+    A {'delay': ms} item, or a 'delay' next to a step's 'type', becomes a DELAY record
+    (after the step, for the latter).
+    """
+    steps = []
+    for item in action or ():
+        delay = None
+        if isinstance(item, dict):
+            delay = item.get('delay')
+            if delay is not None and 'type' not in item and 'action_type' not in item:
+                steps.append(KeyRecord(KIND_DELAY, delay))
+                continue
+            if 'type' in item and 'action_type' not in item:
+                item = {'action_type': item['type'], 'action': item.get('action')}
+        steps.append(compile_action(item))
+        if delay is not None:
+            steps.append(KeyRecord(KIND_DELAY, delay))
+    return tuple(steps)
+
+
+def _is_modifier(config):
+    if config.get('action_type') == LayerAction.MODIFIER:
+        return True
+    action = config.get('action')
+    if isinstance(action, dict) and action.get('action_type') == LayerAction.MODIFIER:
+        return True
+    return config.get('action_type') == ActionType.LAYER and action == LayerAction.MODIFIER
+
+
+def compile_action(config, colors=None):
+    """Resolve one action (dict, keycode or keycode list) into a KeyRecord."""
+    codes = _keycodes(config)
+    if codes is not None:
+        return KeyRecord(KIND_KEY, codes, colors)
+    if not isinstance(config, dict):
+        return KeyRecord(KIND_NONE, None, colors)
+    if _is_modifier(config):
+        return KeyRecord(KIND_MODIFIER, None, colors)
+    if 'tap' in config and 'hold' in config:
+        return KeyRecord(
+            KIND_TAP_HOLD,
+            (config.get('tapping_term'), config.get('permissive_hold'), config.get('hold_on_other_key_press')),
+            colors,
+            default=compile_action(config['tap']),
+            modifier=compile_action(config['hold']),
+        )
+    if 'default' in config and 'modifier' in config:
+        return KeyRecord(
+            KIND_DUAL, None, colors,
+            default=compile_action(config['default']),
+            modifier=compile_action(config['modifier']),
+        )
+
+    kind = _KIND_BY_ACTION_TYPE.get(config.get('action_type', ActionType.NONE), KIND_NONE)
+    action = config.get('action')
+    if action is None:
+        kind = KIND_NONE
+    if kind == KIND_KEY:
+        action = _keycodes(action)
+        if action is None:
+            kind = KIND_NONE
+    elif kind == KIND_SEQUENCE:
+        action = _sequence_steps(action)
+    elif kind == KIND_CONSUMER and isinstance(action, str):
+        action = CONSUMER_NAMES.get(action.lower(), action)
+    return KeyRecord(kind, action, colors)
+
+
+def compile_colors(config, palette):
+    if not isinstance(config, dict) or 'colors' not in config:
+        return None
+    colors = config['colors']
+    if not isinstance(colors, dict):
+        return None
+    return palette.states(*(
+        palette.resolve(colors.get(state, fallback))
+        for state, fallback in zip(('default', 'pressed', 'held'), DEFAULT_STATE_COLORS)
+    ))
+
+
+def compile_layer(layer, palette, disabled=()):
+    """Return a 16-slot list of KeyRecords for one layer.
+
+    Keys listed in `disabled` (rejected by keycheck) keep their colors but do nothing.
+    """
+    table = [EMPTY_RECORD] * NUM_KEYS
+    for key_num, config in layer.get('keys', {}).items():
+        if not isinstance(key_num, int) or not 0 <= key_num < NUM_KEYS or not config:
+            continue
+        colors = compile_colors(config, palette)
+        if key_num in disabled:
+            table[key_num] = KeyRecord(KIND_NONE, None, colors)
+        else:
+            table[key_num] = compile_action(config, colors)
+    return table
+
+
+def compile_layers(layers, palette, disabled=None):
+    """Compile every layer dict in LAYERS into {layer index: 16-slot record list}.
+
+    `disabled` maps a layer index to the key numbers that must compile to no action.
+    Layers given as module references are left to layercache.LayerCache.
+    """
+    disabled = disabled or {}
+    return {
+        idx: compile_layer(layer, palette, disabled.get(idx, ()))
+        for idx, layer in layers.items() if not isinstance(layer, str)
+    }
+
+
+def layer_records(table):
+    """Yield every record of a layer table, with the branches of dual-action and tap-hold keys."""
+    for record in table:
+        yield record
+        if record.kind == KIND_DUAL or record.kind == KIND_TAP_HOLD:
+            yield from layer_records((record.default, record.modifier))
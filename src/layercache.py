@@ -0,0 +1,150 @@
+"""
+KeybowFlow layer cache
+Layers in LAYERS can name another module instead of holding a dict:
+
+    LAYERS = {0: {...}, 1: "media_layer.MEDIA_LAYER", 2: "vscode_layer"}
+
+A reference is imported, checked and compiled the first time its layer is
+entered, then kept in a small cache. When the cache is full or free memory
+drops below a threshold, the least recently used layer is dropped and rebuilt
+the next time it is needed. Pinned layers are loaded at start-up and never
+dropped; layers written inline in LAYERS are always resident. The layers of a
+compiled keymap image are cached the same way, decoded from the image on use.
+"""
+
+import gc
+import sys
+
+from keytable import KIND_DUAL, KIND_LAYER
+from log import log_debug, log_error
+
+# Unpinned referenced layers kept compiled at once
+DEFAULT_CACHE_SIZE = 4
+# Drop cached layers while gc.mem_free() is below this many bytes (CircuitPython only)
+DEFAULT_MIN_FREE = 16384
+
+# Variable a referenced module defines its layer in when the reference names no other
+DEFAULT_LAYER_NAME = 'LAYER'
+
+
+def is_reference(layer):
+    return isinstance(layer, str)
+
+
+def load_reference(ref):
+    """Import the layer dict `ref` names: 'module' (its LAYER) or 'module.NAME'."""
+    module_name, _, name = ref.partition('.')
+    module = __import__(module_name)
+    try:
+        return getattr(module, name or DEFAULT_LAYER_NAME)
+    except AttributeError:
+        raise ImportError("{} has no layer named {}".format(module_name, name or DEFAULT_LAYER_NAME))
+    finally:
+        # Only the layer dict is kept; the module is imported again if the layer is rebuilt
+        sys.modules.pop(module_name, None)
+
+
+def resolve_references(layers):
+    """LAYERS with every reference replaced by the layer dict it names (host tools)."""
+    return {
+        idx: load_reference(layer) if is_reference(layer) else layer
+        for idx, layer in layers.items()
+    }
+
+
+def modifier_targets(table):
+    """Layers a key of `table` switches to while the modifier is held."""
+    return set(
+        record.modifier.payload for record in table
+        if record.kind == KIND_DUAL and record.modifier.kind == KIND_LAYER
+    )
+
+
+class LayerCache:
+    """Compiled layer tables by index, loading referenced layers on demand.
+
+    tables is the dict the key handlers index; it always holds the inline layers,
+    the pinned ones and the cached referenced layers. build(index, reference)
+    returns a layer's compiled table or raises (references are module names, or
+    for a keymap image its file name); on_load(index, table) and on_evict(index,
+    table) let the controller keep per-layer state in step.
+    """
+
+    def __init__(self, tables, references, build, size=DEFAULT_CACHE_SIZE, min_free=DEFAULT_MIN_FREE):
+        self.tables = tables
+        self.references = references
+        self.build = build
+        self.size = size
+        self.min_free = min_free
+        self.pinned = set()
+        self.on_load = None
+        self.on_evict = None
+        self._recent = []  # cached unpinned layers, least recently used first
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, layer):
+        return layer in self.tables or layer in self.references
+
+    def pin(self, layer):
+        """Load `layer` now and keep it for the whole session; returns its table or None."""
+        table = self.get(layer)
+        if table is not None and layer in self._recent:
+            self._recent.remove(layer)
+        if table is not None:
+            self.pinned.add(layer)
+        return table
+
+    def get(self, layer):
+        """Return the table for `layer`, loading it if needed; None if it cannot be loaded."""
+        table = self.tables.get(layer)
+        if table is None:
+            return self._load(layer) if layer in self.references else None
+        if layer in self._recent:
+            self._recent.remove(layer)
+            self._recent.append(layer)
+        return table
+
+    def _load(self, layer):
+        ref = self.references[layer]
+        gc.collect()
+        try:
+            table = self.build(layer, ref)
+        except Exception as e:
+            log_error("Cannot load layer {} ({}): {}", layer, ref, e)
+            return None
+        self.tables[layer] = table
+        self._recent.append(layer)
+        self.loads += 1
+        log_debug("Loaded layer {} from {}", layer, ref)
+        if self.on_load is not None:
+            self.on_load(layer, table)
+        self._trim(layer)
+        return table
+
+    def check_memory(self, keep):
+        """Drop cached layers (never `keep`) while free memory is below min_free.
+
+        Loads already trim the cache; this is for the scan loop's idle time, when
+        memory has run low for other reasons (macros, text caches, a reload).
+        """
+        mem_free = getattr(gc, 'mem_free', None)
+        if self._recent and mem_free is not None and mem_free() < self.min_free:
+            self._trim(keep)
+
+    def _trim(self, keep):
+        """Drop least recently used layers, never `keep`, until under size and memory limits."""
+        mem_free = getattr(gc, 'mem_free', None)
+        while self._recent and self._recent[0] != keep:
+            if len(self._recent) <= self.size:
+                if mem_free is None:
+                    return
+                gc.collect()
+                if mem_free() >= self.min_free:
+                    return
+            layer = self._recent.pop(0)
+            table = self.tables.pop(layer)
+            self.evictions += 1
+            log_debug("Dropped layer {}", layer)
+            if self.on_evict is not None:
+                self.on_evict(layer, table)
@@ -0,0 +1,91 @@
+"""
+KeybowFlow LED frames
+Precomputed, brightness-scaled default/pressed/held colors for every key of every layer.
+"""
+
+from keytable import NUM_KEYS
+
+# LED states, also the indices into a key record's colors tuple
+STATE_DEFAULT = 0
+STATE_PRESSED = 1
+STATE_HELD = 2
+
+FRAME_SIZE = NUM_KEYS * 3
+
+
+class LayerFrames:
+    """Per-layer RGB frames stored as bytearrays of 16 * (r, g, b).
+
+    frames[layer][state] holds the scaled color of every key for that state; keys
+    without colors are left at zero and flagged as unlit in colored[layer].
+    Call rebuild() whenever the brightness changes, and add()/drop() when a layer
+    is loaded into or dropped from the key table.
+
+    diff(a, b) gives the keys whose default color differs between two layers; it
+    is computed once per layer pair and kept until the frames change.
+    """
+
+    def __init__(self, key_table, palette, brightness):
+        self.key_table = key_table
+        self.palette = palette
+        self.frames = {}
+        self.colored = {}
+        self._diffs = {}
+        self.rebuild(brightness)
+
+    def rebuild(self, brightness):
+        self.brightness = brightness
+        self.scaled = []
+        self.frames = {}
+        self.colored = {}
+        self._diffs = {}
+        for layer, table in self.key_table.items():
+            self.add(layer, table)
+
+    def add(self, layer, table):
+        # Scale palette colors added since the last call (layers loaded later can add colors)
+        scaled = self.scaled
+        for rgb in self.palette.rgb[len(scaled):]:
+            scaled.append(bytes(int(c * self.brightness) for c in rgb))
+        frames = (bytearray(FRAME_SIZE), bytearray(FRAME_SIZE), bytearray(FRAME_SIZE))
+        colored = 0
+        for key_num, record in enumerate(table):
+            if record.colors is None:
+                continue
+            colored |= 1 << key_num
+            offset = key_num * 3
+            for state in (STATE_DEFAULT, STATE_PRESSED, STATE_HELD):
+                frames[state][offset:offset + 3] = scaled[record.colors[state]]
+        self.frames[layer] = frames
+        self.colored[layer] = colored
+        self._forget_diffs(layer)
+
+    def drop(self, layer):
+        self.frames.pop(layer, None)
+        self.colored.pop(layer, None)
+        self._forget_diffs(layer)
+
+    def _forget_diffs(self, layer):
+        for pair in [pair for pair in self._diffs if layer in pair]:
+            del self._diffs[pair]
+
+    def diff(self, a, b):
+        """Bit mask of keys whose default-state LED differs between layers a and b."""
+        mask = self._diffs.get((a, b))
+        if mask is not None:
+            return mask
+        frame_a = self.frames[a][STATE_DEFAULT]
+        frame_b = self.frames[b][STATE_DEFAULT]
+        lit_a = self.colored[a]
+        lit_b = self.colored[b]
+        # Lit in one layer only, or lit in both with different colors; unlit in both stays off
+        mask = lit_a ^ lit_b
+        both = lit_a & lit_b
+        for key_num in range(NUM_KEYS):
+            if both & (1 << key_num):
+                offset = key_num * 3
+                if frame_a[offset:offset + 3] != frame_b[offset:offset + 3]:
+                    mask |= 1 << key_num
+        self._diffs[(a, b)] = mask
+        self._diffs[(b, a)] = mask
+        return mask
@@ -0,0 +1,119 @@
+"""
+KeybowFlow logging
+Leveled serial logging with lazy formatting and an optional in-RAM ring buffer.
+
+Messages use str.format placeholders and are only formatted when their level is
+enabled:
+
+    log_debug("key {} pressed, kind {}", key_num, record.kind)
+
+With a ring buffer configured, messages are queued instead of printed and
+drain() writes a few of them to serial when the scan loop is idle. For shipped
+builds, `python scripts/deploy.py --strip-logs debug` removes the calls entirely.
+"""
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+_LEVELS_BY_NAME = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+
+level = INFO
+
+# Ring buffer state (None when messages print straight to serial)
+_ring = None
+_head = 0
+_count = 0
+dropped = 0
+
+
+def configure(config):
+    """Apply 'log_level', 'debug' and 'log_buffer' from a keymap CONFIG dict."""
+    name = config.get('log_level')
+    if name is not None:
+        set_level(_LEVELS_BY_NAME.get(str(name).lower(), INFO))
+    elif config.get('debug', False):
+        set_level(DEBUG)
+    set_buffer(config.get('log_buffer', 0))
+
+
+def set_level(new_level):
+    global level
+    level = new_level
+
+
+def set_buffer(size):
+    """Queue up to `size` messages in RAM instead of printing them; 0 disables."""
+    global _ring, _head, _count, dropped
+    flush()
+    _ring = [None] * size if size > 0 else None
+    _head = 0
+    _count = 0
+    dropped = 0
+
+
+def _emit(msg_level, msg, args):
+    global _head, _count, dropped
+    if args:
+        msg = msg.format(*args)
+    if _ring is None:
+        print("[" + LEVEL_NAMES[msg_level] + "]", msg)
+        return
+    size = len(_ring)
+    _ring[(_head + _count) % size] = (msg_level, msg)
+    if _count < size:
+        _count += 1
+    else:
+        _head = (_head + 1) % size
+        dropped += 1
+
+
+def log_debug(msg, *args):
+    if level <= DEBUG:
+        _emit(DEBUG, msg, args)
+
+
+def log_info(msg, *args):
+    if level <= INFO:
+        _emit(INFO, msg, args)
+
+
+def log_warning(msg, *args):
+    if level <= WARNING:
+        _emit(WARNING, msg, args)
+
+
+def log_error(msg, *args):
+    if level <= ERROR:
+        _emit(ERROR, msg, args)
+
+
+def pending():
+    return _count
+
+
+def drain(max_messages=4):
+    """Print up to `max_messages` buffered messages; returns how many were printed."""
+    global _head, _count, dropped
+    if _ring is None:
+        return 0
+    printed = 0
+    if dropped:
+        print("[WARNING]", "{} log messages dropped".format(dropped))
+        dropped = 0
+    while _count and printed < max_messages:
+        msg_level, msg = _ring[_head]
+        _ring[_head] = None
+        _head = (_head + 1) % len(_ring)
+        _count -= 1
+        print("[" + LEVEL_NAMES[msg_level] + "]", msg)
+        printed += 1
+    return printed
+
+
+def flush():
+    while drain(len(_ring) if _ring else 0):
+        pass
@@ -0,0 +1,70 @@
+"""
+KeybowFlow scan pacer
+Backs the scan loop off when the keypad is idle while bounding how long a key
+press can go unnoticed.
+"""
+
+import time
+
+MODE_ACTIVE = 0
+MODE_IDLE = 1
+MODE_SLEEP = 2
+
+MODE_NAMES = ('active', 'idle', 'sleep')
+
+
+class ScanPacer:
+    """Chooses a scan interval from the time since the last key activity.
+
+    active: scan flat out (keys down, macro playing, or recent activity)
+    idle:   after `idle_after` seconds, sleep `idle_interval` between scans
+    sleep:  after `sleep_after` seconds, sleep `sleep_interval` between scans
+
+    No interval is ever longer than `max_wake_latency`, which bounds the extra
+    delay before a press on an idle keypad is seen.
+    """
+
+    def __init__(self, idle_after=5.0, sleep_after=30.0, idle_interval=0.002,
+                 sleep_interval=0.02, max_wake_latency=0.02):
+        self.idle_after = idle_after
+        self.sleep_after = max(sleep_after, idle_after)
+        self.idle_interval = min(idle_interval, max_wake_latency)
+        self.sleep_interval = min(sleep_interval, max_wake_latency)
+        self.max_wake_latency = max_wake_latency
+        self.mode = MODE_ACTIVE
+        self.mode_changes = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a pacer from CONFIG; times are in seconds, intervals in milliseconds."""
+        sleep_after = config.get('scan_sleep_after', config.get('led_sleep_time', 30))
+        return cls(
+            idle_after=config.get('scan_idle_after', min(5, sleep_after)),
+            sleep_after=sleep_after,
+            idle_interval=config.get('scan_idle_interval', 2) / 1000,
+            sleep_interval=config.get('scan_sleep_interval', 20) / 1000,
+            max_wake_latency=config.get('max_wake_latency', 20) / 1000,
+        )
+
+    @property
+    def mode_name(self):
+        return MODE_NAMES[self.mode]
+
+    def update(self, idle_for):
+        """Pick the mode for `idle_for` seconds without activity; returns the sleep interval."""
+        if idle_for < self.idle_after:
+            mode, interval = MODE_ACTIVE, 0
+        elif idle_for < self.sleep_after:
+            mode, interval = MODE_IDLE, self.idle_interval
+        else:
+            mode, interval = MODE_SLEEP, self.sleep_interval
+        if mode != self.mode:
+            self.mode = mode
+            self.mode_changes += 1
+        return interval
+
+    def pace(self, idle_for):
+        interval = self.update(idle_for)
+        if interval:
+            time.sleep(interval)
+        return interval
@@ -0,0 +1,107 @@
+"""
+KeybowFlow timing probes
+Times hot-path calls with time.monotonic_ns into preallocated arrays: count,
+min, max and total per probe, plus a histogram of power-of-two microsecond
+buckets. Probes are installed by wrapping the timed callables, so with
+timing_probes off the hot path runs exactly as without them.
+"""
+
+import time
+from array import array
+
+# Histogram buckets per probe: bucket 0 is under 1 µs, bucket b (b > 0) is
+# 2**(b-1) to 2**b µs, and the last bucket takes everything longer
+DEFAULT_BUCKETS = 16
+
+# Largest value an 'L' item holds on CircuitPython; times and sums saturate there
+_MAX_L = 0xFFFFFFFF
+
+
+def bucket_floor_us(bucket):
+    """Lower edge of a histogram bucket in µs."""
+    return 1 << (bucket - 1) if bucket else 0
+
+
+class Probes:
+    """Timing statistics for each name in `names`, addressed by index."""
+
+    def __init__(self, names, buckets=DEFAULT_BUCKETS):
+        count = len(names)
+        self.names = names
+        self.buckets = buckets
+        self.counts = array('L', [0] * count)
+        self.min_ns = array('L', [_MAX_L] * count)
+        self.max_ns = array('L', [0] * count)
+        self.total_us = array('L', [0] * count)   # µs; stops at _MAX_L after about 71 minutes of timed work
+        self.histogram = array('L', [0] * (count * buckets))
+
+    def record(self, probe, elapsed_ns):
+        if elapsed_ns > _MAX_L:
+            elapsed_ns = _MAX_L
+        self.counts[probe] += 1
+        if elapsed_ns < self.min_ns[probe]:
+            self.min_ns[probe] = elapsed_ns
+        if elapsed_ns > self.max_ns[probe]:
+            self.max_ns[probe] = elapsed_ns
+        us = (elapsed_ns + 500) // 1000
+        total = self.total_us[probe] + us
+        self.total_us[probe] = total if total < _MAX_L else _MAX_L
+        bucket = 0
+        last = self.buckets - 1
+        while us and bucket < last:
+            us >>= 1
+            bucket += 1
+        self.histogram[probe * self.buckets + bucket] += 1
+
+    def wrap(self, probe, func, args=1):
+        """`func` timed under `probe`; `func` takes `args` positional arguments (0 or 1).
+
+        The wrapper has the same fixed arity, so a call allocates no argument tuple.
+        """
+        record = self.record
+        monotonic_ns = time.monotonic_ns
+
+        if args == 0:
+            def timed():
+                start = monotonic_ns()
+                result = func()
+                record(probe, monotonic_ns() - start)
+                return result
+        else:
+            def timed(arg):
+                start = monotonic_ns()
+                result = func(arg)
+                record(probe, monotonic_ns() - start)
+                return result
+
+        return timed
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+            self.min_ns[i] = _MAX_L
+            self.max_ns[i] = 0
+            self.total_us[i] = 0
+        for i in range(len(self.histogram)):
+            self.histogram[i] = 0
+
+    def dump(self, write=print):
+        """Write one line per probe that ran: count, min/mean/max µs and the histogram.
+
+        The histogram lists the non-empty buckets as <lower edge µs>:<count>. A mean
+        marked + is a lower bound: the probe's total has saturated.
+        """
+        write("timings v1 (us)")
+        for probe in range(len(self.names)):
+            n = self.counts[probe]
+            if not n:
+                continue
+            start = probe * self.buckets
+            total = self.total_us[probe]
+            write("{} n={} min={:.1f} mean={:.1f}{} max={:.1f} hist {}".format(
+                self.names[probe], n, self.min_ns[probe] / 1000, total / n,
+                "+" if total == _MAX_L else "", self.max_ns[probe] / 1000, " ".join(
+                    "{}:{}".format(bucket_floor_us(b), self.histogram[start + b])
+                    for b in range(self.buckets) if self.histogram[start + b]
+                ),
+            ))
@@ -0,0 +1,178 @@
+"""
+KeybowFlow macro recorder
+Records the keycodes the pad's KEY actions press and release, binds the result
+to a key on the current layer, and plays it back through the action scheduler.
+
+Events are (keycode, edge, ms since the previous event) in preallocated arrays.
+Bound macros are saved to MACRO_FILE on CIRCUITPY (little-endian):
+
+    header  magic "KBMC", version, macro count (u16)
+    macro   layer, key, event count (u16), then that many keycodes, edges and
+            u16 delays
+"""
+
+import struct
+import time
+from array import array
+
+from scheduler import OP_CHORD, RELEASED
+
+MACRO_FILE = "macros.kbm"
+MAGIC = b"KBMC"
+VERSION = 1
+
+HEADER = "<4sBH"
+MACRO = "<BBH"
+
+DEFAULT_MAX_EVENTS = 256
+MAX_DELAY_MS = 0xFFFF
+
+_FIRST_MODIFIER = 0xE0
+
+
+class Macro:
+    """One recorded macro: parallel keycode, edge (1 = press) and delay arrays."""
+
+    __slots__ = ('codes', 'edges', 'delays', '_plan', '_speed')
+
+    def __init__(self, codes, edges, delays):
+        self.codes = codes
+        self.edges = edges
+        self.delays = delays
+        self._plan = None
+        self._speed = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def plan(self, speed=1.0):
+        """Scheduler OP_CHORD steps replaying the macro, delays divided by `speed`.
+
+        The wait before the first event is dropped; events recorded in the same
+        millisecond share one report. Whatever is still held at the end is released.
+        """
+        if self._plan is not None and self._speed == speed:
+            return self._plan
+        steps = []
+        modifiers = 0
+        keys = []
+        count = len(self.codes)
+        for i in range(count):
+            code = self.codes[i]
+            if code >= _FIRST_MODIFIER:
+                bit = 1 << (code - _FIRST_MODIFIER)
+                modifiers = modifiers | bit if self.edges[i] else modifiers & ~bit
+            elif self.edges[i]:
+                if code not in keys:
+                    keys.append(code)
+            elif code in keys:
+                keys.remove(code)
+            delay_ms = self.delays[i + 1] if i + 1 < count else 0
+            if delay_ms or i + 1 == count:
+                steps.append((OP_CHORD, (modifiers, tuple(keys)), int(delay_ms * 1000000 / speed)))
+        if modifiers or keys:
+            steps.append((OP_CHORD, RELEASED, 0))
+        self._plan = tuple(steps)
+        self._speed = speed
+        return self._plan
+
+
+class MacroRecorder:
+    """Recording buffer plus the macros bound to (layer, key) pairs.
+
+    start()/stop() bracket a recording; after stop() `binding` is set until bind()
+    or cancel() decides what happens to it. The buffers are allocated on the first
+    recording.
+    """
+
+    def __init__(self, max_events=DEFAULT_MAX_EVENTS, path=MACRO_FILE):
+        self.max_events = max_events
+        self.path = path
+        self.macros = {}         # (layer, key) -> Macro
+        self.codes = None
+        self.edges = None
+        self.delays = None
+        self.count = 0
+        self.dropped = 0         # events that did not fit the buffer
+        self.recording = False
+        self.binding = False
+        self._last_ms = 0
+
+    def start(self):
+        if self.codes is None:
+            self.codes = bytearray(self.max_events)
+            self.edges = bytearray(self.max_events)
+            self.delays = array('H', [0] * self.max_events)
+        self.count = 0
+        self.dropped = 0
+        self.recording = True
+        self.binding = False
+        self._last_ms = time.monotonic_ns() // 1000000
+
+    def record(self, codes, pressed):
+        now_ms = time.monotonic_ns() // 1000000
+        delay = min(now_ms - self._last_ms, MAX_DELAY_MS)
+        self._last_ms = now_ms
+        for code in codes:
+            if self.count == self.max_events:
+                self.dropped += 1
+                continue
+            self.codes[self.count] = code
+            self.edges[self.count] = 1 if pressed else 0
+            self.delays[self.count] = delay
+            self.count += 1
+            delay = 0
+
+    def stop(self):
+        self.recording = False
+        self.binding = True
+
+    def cancel(self):
+        self.recording = False
+        self.binding = False
+
+    def bind(self, layer, key_num):
+        """Bind the recording to a key, or unbind the key if nothing was recorded.
+
+        Returns the bound Macro, or None when the key was unbound.
+        """
+        self.binding = False
+        n = self.count
+        if not n:
+            self.macros.pop((layer, key_num), None)
+            return None
+        macro = Macro(bytes(self.codes[:n]), bytes(self.edges[:n]), array('H', self.delays[:n]))
+        self.macros[(layer, key_num)] = macro
+        return macro
+
+    def save(self):
+        """Write every bound macro to `path`; raises OSError if CIRCUITPY is read-only."""
+        with open(self.path, "wb") as f:
+            f.write(struct.pack(HEADER, MAGIC, VERSION, len(self.macros)))
+            for (layer, key_num), macro in self.macros.items():
+                f.write(struct.pack(MACRO, layer, key_num, len(macro)))
+                f.write(macro.codes)
+                f.write(macro.edges)
+                f.write(struct.pack("<" + "H" * len(macro), *macro.delays))
+
+    def load(self):
+        """Read the macros saved at `path`; returns how many were loaded (0 if there is no file)."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return 0
+        magic, version, count = struct.unpack_from(HEADER, data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a version {} macro file".format(VERSION))
+        offset = struct.calcsize(HEADER)
+        view = memoryview(data)
+        for _ in range(count):
+            layer, key_num, n = struct.unpack_from(MACRO, data, offset)
+            offset += struct.calcsize(MACRO)
+            codes = bytes(view[offset:offset + n])
+            edges = bytes(view[offset + n:offset + 2 * n])
+            delays = array('H', struct.unpack_from("<" + "H" * n, data, offset + 2 * n))
+            offset += 4 * n
+            self.macros[(layer, key_num)] = Macro(codes, edges, delays)
+        return count
@@ -0,0 +1,85 @@
+"""
+KeybowFlow keymap reload
+Watches keymap.py and keymap.kbf so a saved keymap can be swapped into the
+running controller (KeybowController.reload_keymap) instead of CircuitPython
+restarting code.py and re-enumerating USB.
+
+A file's signature is its size and modification time from os.stat, or with
+'hash' a CRC of its contents (FAT timestamps only have 2 s resolution, so two
+saves of the same size within that window look alike by stat). A change is
+reported once the new signature has been seen on two checks in a row, so a
+keymap still being written is not loaded half-saved.
+"""
+
+import os
+from binascii import crc32
+
+# Seconds between checks while the keypad is idle
+DEFAULT_INTERVAL = 1.0
+
+_CHUNK = 512
+
+
+def disable_autoreload():
+    """Stop CircuitPython restarting code.py when CIRCUITPY changes; False off-device."""
+    try:
+        import supervisor
+    except ImportError:
+        return False
+    try:
+        supervisor.runtime.autoreload = False
+    except AttributeError:
+        supervisor.disable_autoreload()   # CircuitPython 7
+    return True
+
+
+def stat_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st[6], st[8])   # size, mtime
+
+
+def crc_signature(path):
+    try:
+        with open(path, 'rb') as f:
+            buf = bytearray(_CHUNK)
+            crc = 0
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    return crc
+                crc = crc32(memoryview(buf)[:n], crc)
+    except OSError:
+        return None
+
+
+class KeymapWatcher:
+    """Polls the signatures of `paths` at most every `interval` seconds."""
+
+    def __init__(self, paths, interval=DEFAULT_INTERVAL, use_hash=False):
+        self.paths = paths
+        self.interval = interval
+        self._signature = crc_signature if use_hash else stat_signature
+        self.applied = self.read()    # signatures of the keymap now running
+        self._seen = self.applied     # signatures found by the last check
+        self.next_check = 0
+        self.checks = 0
+
+    def read(self):
+        return tuple(self._signature(path) for path in self.paths)
+
+    def changed(self, now):
+        """True when the files differ from the running keymap and have stopped changing."""
+        if now < self.next_check:
+            return False
+        self.next_check = now + self.interval
+        self.checks += 1
+        seen = self.read()
+        settled = seen == self._seen
+        self._seen = seen
+        if not settled or seen == self.applied:
+            return False
+        self.applied = seen
+        return True
@@ -0,0 +1,223 @@
+"""
+KeybowFlow action scheduler
+Queues sequences, strings and consumer codes as timed HID steps and plays them
+back a few steps per scan, so macros never block keybow.update().
+"""
+
+import time
+
+from keytable import KIND_KEY, KIND_SEQUENCE, KIND_STRING, KIND_CONSUMER, KIND_DELAY
+from log import log_error
+
+# Step operations
+OP_CHORD = 0     # arg: (modifier bits, keycodes) the macro holds after this report
+OP_CONSUMER = 1  # arg: consumer control code
+OP_TYPE = 2      # arg: compiled text from textreports, one press/release per pair
+
+# Steps executed per poll() when several are due at once
+DEFAULT_STEPS_PER_POLL = 4
+
+_FIRST_MODIFIER = 0xE0
+
+RELEASED = (0, ())
+
+
+def _chord(keycodes):
+    modifiers = 0
+    keys = []
+    for keycode in keycodes:
+        if keycode >= _FIRST_MODIFIER:
+            modifiers |= 1 << (keycode - _FIRST_MODIFIER)
+        elif keycode not in keys:
+            keys.append(keycode)
+    return modifiers, tuple(keys)
+
+
+def _flatten(steps):
+    for step in steps:
+        if step.kind == KIND_SEQUENCE:
+            yield from _flatten(step.payload)
+        else:
+            yield step
+
+
+def plan_sequence(steps, text_reports, delay_ns=0, string_delay_ns=0):
+    """Plan SEQUENCE step records as the fewest HID reports that replay them.
+
+    Each KEY step becomes one report holding its chord for `delay_ns`. Consecutive
+    chords go straight from one to the next, so shared modifiers stay down; a
+    release report is only sent when a key repeats or the modifiers change under
+    held keys. STRING and CONSUMER steps play after everything is released; other
+    kinds cannot run inside a sequence and are skipped. A DELAY step replaces the
+    wait after the step before it (consecutive DELAY steps add up).
+    `text_reports(text)` returns the compiled report pairs of a STRING step (e.g.
+    TextReportCache.get).
+    """
+    plan = []
+    held = RELEASED
+    paused = -1      # plan entry whose wait a DELAY step has set
+    for step in _flatten(steps):
+        kind = step.kind
+        if kind == KIND_DELAY:
+            pause_ns = step.payload * 1000000
+            last = len(plan) - 1
+            if last >= 0 and plan[last][0] != OP_TYPE:
+                # An OP_TYPE delay is its per-character pace, so it gets an entry of its own
+                op, arg, delay = plan[last]
+                plan[last] = (op, arg, delay + pause_ns if paused == last else pause_ns)
+            else:
+                plan.append((OP_CHORD, held, pause_ns))
+                last += 1
+            paused = last
+            continue
+        if kind == KIND_KEY:
+            chord = _chord(step.payload)
+            if held is not RELEASED:
+                repeats = chord == held or any(key in held[1] for key in chord[1])
+                if repeats or (held[1] and held[0] != chord[0]):
+                    gap = (held[0] & chord[0], ())
+                    plan.append((OP_CHORD, RELEASED if gap == held else gap, 0))
+            plan.append((OP_CHORD, chord, delay_ns))
+            held = chord
+            continue
+        if kind != KIND_STRING and kind != KIND_CONSUMER:
+            continue
+        if held is not RELEASED:
+            plan.append((OP_CHORD, RELEASED, 0))
+            held = RELEASED
+        if kind == KIND_STRING:
+            compiled = text_reports(step.payload)
+            if compiled:
+                plan.append((OP_TYPE, compiled, string_delay_ns))
+        else:
+            plan.append((OP_CONSUMER, step.payload, delay_ns))
+    if held is not RELEASED:
+        plan.append((OP_CHORD, RELEASED, 0))
+    return tuple(plan)
+
+
+class ActionScheduler:
+    """FIFO of (op, arg, delay_ns) steps with monotonic_ns deadlines.
+
+    Each step sends one HID report; its delay is how long to wait before the next
+    step may run. An OP_TYPE step plays a whole compiled string, one report per
+    poll iteration. Chords and typed characters are the macro's source in the
+    ReportBuilder (hidreport.py), so keys held on the pad stay down and each step
+    is sent as one report. Macros queued back to back play one after the other.
+    """
+
+    def __init__(self, reports, consumer_control=None, steps_per_poll=DEFAULT_STEPS_PER_POLL):
+        self.reports = reports
+        self.consumer_control = consumer_control
+        self.steps_per_poll = steps_per_poll
+        self._steps = []
+        self._pos = 0
+        self._next_ns = 0
+        # (modifier bits, keycodes) of the current chord
+        self._chord = RELEASED
+        # OP_TYPE cursor: byte offset into the compiled text, and the modifier bits and
+        # keycode of the character currently down (_typing False between characters)
+        self._type_offset = 0
+        self._typing = False
+        self._type_modifiers = 0
+        self._type_keycode = 0
+
+    @property
+    def busy(self):
+        return self._pos < len(self._steps)
+
+    def pending(self):
+        return len(self._steps) - self._pos
+
+    def queue(self, steps):
+        if not self.busy:
+            self._steps = []
+            self._pos = 0
+            self._next_ns = time.monotonic_ns()
+        self._steps.extend(steps)
+
+    def queue_text(self, compiled, delay_ns=0):
+        """Queue text compiled by textreports.compile_text; `delay_ns` follows each character."""
+        if compiled:
+            self.queue(((OP_TYPE, compiled, delay_ns),))
+
+    def queue_consumer(self, code, delay_ns=0):
+        self.queue(((OP_CONSUMER, code, delay_ns),))
+
+    def poll(self, now_ns=None):
+        """Run the steps that are due; returns the number of reports sent."""
+        if self._pos >= len(self._steps):
+            return 0
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        ran = 0
+        while ran < self.steps_per_poll and self._pos < len(self._steps) and now_ns >= self._next_ns:
+            op, arg, delay_ns = self._steps[self._pos]
+            ran += 1
+            try:
+                if op == OP_TYPE:
+                    if not self._typing:
+                        self._type_press(arg)
+                        continue
+                    self._type_release()
+                    self._type_offset += 2
+                    if self._type_offset < len(arg):
+                        if delay_ns:
+                            self._next_ns = now_ns + delay_ns
+                        continue
+                    self._type_offset = 0
+                self._pos += 1
+                if op == OP_CHORD:
+                    self._set_chord(arg)
+                elif op == OP_CONSUMER:
+                    self.consumer_control.send(arg)
+            except Exception as e:
+                log_error("Macro step failed, cancelling: {}", e)
+                self.cancel()
+                return ran
+            if delay_ns:
+                self._next_ns = now_ns + delay_ns
+        if self._pos >= len(self._steps):
+            self._steps = []
+            self._pos = 0
+        return ran
+
+    def cancel(self):
+        """Drop all queued steps, releasing anything a half-played step left down."""
+        cancelled = self.pending()
+        self._steps = []
+        self._pos = 0
+        if self._chord is not RELEASED or self._typing:
+            self._chord = RELEASED
+            self._typing = False
+            self._send()
+        self._type_offset = 0
+        return cancelled
+
+    def _set_chord(self, chord):
+        if not self.reports.fits(chord[1]):
+            raise ValueError("No free key slot for chord")
+        self._chord = RELEASED if chord == RELEASED else chord
+        self._send()
+
+    def _type_press(self, compiled):
+        keycode = compiled[self._type_offset + 1]
+        if keycode and not self.reports.fits(self._chord[1] + (keycode,)):
+            raise ValueError("No free key slot to type into")
+        self._type_modifiers = compiled[self._type_offset]
+        self._type_keycode = keycode
+        self._typing = True
+        self._send()
+
+    def _type_release(self):
+        self._typing = False
+        self._send()
+
+    def _send(self):
+        modifiers, keys = self._chord
+        if self._typing:
+            modifiers |= self._type_modifiers
+            if self._type_keycode:
+                keys = keys + (self._type_keycode,)
+        self.reports.set_macro(modifiers, keys)
+        self.reports.flush()
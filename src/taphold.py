@@ -0,0 +1,126 @@
+"""
+KeybowFlow tap-hold
+Keys configured with 'tap' and 'hold' actions decide between them after they are
+pressed:
+
+    tap   the key is released within its tapping term
+    hold  the tapping term runs out with the key still down, or
+          - hold_on_other_key_press: another key is pressed before then
+          - permissive_hold: another key is pressed and released before then
+
+While a decision is pending, presses of other keys (and their releases) are
+buffered and replayed once it is made, so they reach the host after the tap or
+hold action. One tap-hold key is pending at a time; its tapping term is an entry
+in the controller's deadline queue, polled from the scan loop.
+"""
+
+import time
+
+DEFAULT_TAPPING_TERM = 200   # ms
+MAX_TAPPING_TERM = 5000      # ms
+
+
+def valid_term(term):
+    return isinstance(term, int) and not isinstance(term, bool) and 0 < term <= MAX_TAPPING_TERM
+
+
+class TapHold:
+    """The pending tap-hold decision and decision statistics.
+
+    decide(key, record, hold) performs the chosen branch; press(key) and
+    release(key) replay buffered events through the controller's handlers.
+    """
+
+    def __init__(self, deadlines, decide, press, release, config):
+        self.deadlines = deadlines
+        self._decide = decide
+        self._press = press
+        self._release = release
+        term = config.get('tapping_term', DEFAULT_TAPPING_TERM)
+        self.tapping_term = term if valid_term(term) else DEFAULT_TAPPING_TERM
+        self.permissive_hold = config.get('permissive_hold', False)
+        self.hold_on_other_key_press = config.get('hold_on_other_key_press', False)
+        self.key = None              # pending tap-hold key, or None
+        self.record = None
+        self.started_ns = 0
+        self.events = []             # (pressed, key) buffered while pending
+        self.pressed_after = 0       # keys pressed while pending (bit n = key n)
+        self._permissive = False
+        self._hold_on_other = False
+        self.taps = 0
+        self.holds = 0
+        self.late_max_ns = 0         # how far past the tapping term a timeout was noticed
+        self.late_total_ns = 0
+        self.timeouts = 0
+
+    def start(self, key, record):
+        """Begin deciding for `key`, whose record is KIND_TAP_HOLD."""
+        term, permissive, hold_on_other = record.payload
+        if term is None:
+            term = self.tapping_term
+        self.key = key
+        self.record = record
+        self._permissive = self.permissive_hold if permissive is None else permissive
+        self._hold_on_other = self.hold_on_other_key_press if hold_on_other is None else hold_on_other
+        self.started_ns = time.monotonic_ns()
+        self.deadlines.schedule(self.started_ns + term * 1000000, self._expired, key.number)
+
+    def intercept(self, key, pressed):
+        """Handle an edge while a decision is pending; True if it was buffered.
+
+        The pending key's own release decides 'tap' and returns False, so the
+        controller goes on to release it normally.
+        """
+        if key is self.key:
+            if not pressed:
+                self.resolve(False)
+            return False
+        bit = 1 << key.number
+        if pressed:
+            self.events.append((True, key))
+            self.pressed_after |= bit
+            if self._hold_on_other:
+                self.resolve(True)
+            return True
+        if self.pressed_after & bit:
+            self.events.append((False, key))
+            if self._permissive:
+                self.resolve(True)
+            return True
+        # A key that was already down before the tap-hold key
+        return False
+
+    def _expired(self, key_num, late_ns):
+        self.timeouts += 1
+        self.late_total_ns += late_ns
+        if late_ns > self.late_max_ns:
+            self.late_max_ns = late_ns
+        self.resolve(True)
+
+    def resolve(self, hold):
+        """Perform the tap or hold action, then replay the buffered events."""
+        key, record, events = self.key, self.record, self.events
+        self.deadlines.cancel(key.number)
+        self.key = None
+        self.record = None
+        self.events = []
+        self.pressed_after = 0
+        if hold:
+            self.holds += 1
+        else:
+            self.taps += 1
+        self._decide(key, record, hold)
+        for pressed, other in events:
+            if pressed:
+                self._press(other)
+            else:
+                self._release(other)
+
+    def reset(self):
+        """Drop the pending decision and its buffered events without acting."""
+        if self.key is not None:
+            self.deadlines.cancel(self.key.number)
+        self.key = None
+        self.record = None
+        self.events = []
+        self.pressed_after = 0
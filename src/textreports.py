@@ -0,0 +1,58 @@
+"""
+KeybowFlow text reports
+Compiles STRING actions once into packed (modifier, keycode) report pairs and
+keeps them in a small LRU cache, so typing never goes back through the layout.
+"""
+
+# Compiled strings kept by default
+DEFAULT_CACHE_SIZE = 16
+
+_FIRST_MODIFIER = 0xE0
+
+
+def compile_text(layout, text):
+    """Return bytes of (modifier bits, keycode) pairs, one pair per key stroke."""
+    data = bytearray()
+    for char in text:
+        modifiers = 0
+        keys = []
+        for keycode in layout.keycodes(char):
+            if keycode >= _FIRST_MODIFIER:
+                modifiers |= 1 << (keycode - _FIRST_MODIFIER)
+            else:
+                keys.append(keycode)
+        for keycode in keys or (0,):
+            data.append(modifiers)
+            data.append(keycode)
+    return bytes(data)
+
+
+class TextReportCache:
+    """Bounded least-recently-used cache of compiled strings."""
+
+    def __init__(self, layout, size=DEFAULT_CACHE_SIZE):
+        self.layout = layout
+        self.size = max(1, size)
+        self._compiled = {}
+        self._order = []  # least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        data = self._compiled.get(text)
+        if data is not None:
+            self.hits += 1
+            if self._order[-1] != text:
+                self._order.remove(text)
+                self._order.append(text)
+            return data
+        self.misses += 1
+        data = compile_text(self.layout, text)
+        if len(self._order) >= self.size:
+            del self._compiled[self._order.pop(0)]
+        self._compiled[text] = data
+        self._order.append(text)
+        return data
+
+    def __len__(self):
+        return len(self._order)
@@ -0,0 +1,127 @@
+"""
+KeybowFlow usage counters
+Press and hold counts for every layer x key, and how often each layer was
+switched to, kept in fixed arrays so counting a key is one indexed increment.
+
+The counters are saved to microcontroller.nvm at most every save interval
+(flash wears with every write, and a write stalls the scan loop), as:
+
+    header  magic "KBUC", version, layer count
+    body    u32 presses[layers * 16], u16 holds[layers * 16], u32 switches[layers]
+"""
+
+import struct
+from array import array
+
+from keytable import NUM_KEYS
+
+MAGIC = b"KBUC"
+VERSION = 1
+HEADER = "<4sBB"
+
+# Seconds between saves while there are new counts
+DEFAULT_SAVE_INTERVAL = 600
+
+MAX_HOLDS = 0xFFFF
+
+# Bytes per 'L' item: 4 on CircuitPython, 8 on 64-bit CPython (the simulator)
+_LONG_SIZE = len(bytes(array('L', [0])))
+
+
+def nvm_store():
+    """microcontroller.nvm, or None off-device and on boards without NVM."""
+    try:
+        import microcontroller
+    except ImportError:
+        return None
+    return microcontroller.nvm
+
+
+class UsageCounters:
+    """Counters for layers 0..layers-1; counts for other layer numbers are ignored."""
+
+    def __init__(self, layers, save_interval=DEFAULT_SAVE_INTERVAL):
+        self.layers = layers
+        self.presses = array('L', [0] * (layers * NUM_KEYS))
+        self.holds = array('H', [0] * (layers * NUM_KEYS))
+        self.switches = array('L', [0] * layers)
+        self.save_interval = save_interval
+        self.dirty = False
+        self.next_save = 0
+        self.saves = 0           # writes that changed the store
+
+    def copy_from(self, other):
+        """Take over `other`'s counts for the layers both cover (after a keymap reload)."""
+        for i in range(min(self.layers, other.layers) * NUM_KEYS):
+            self.presses[i] = other.presses[i]
+            self.holds[i] = other.holds[i]
+        for layer in range(min(self.layers, other.layers)):
+            self.switches[layer] = other.switches[layer]
+        self.dirty = other.dirty
+        self.next_save = other.next_save
+        self.saves = other.saves
+
+    def count_press(self, layer, key_num):
+        if layer < self.layers:
+            self.presses[layer * NUM_KEYS + key_num] += 1
+            self.dirty = True
+
+    def count_hold(self, layer, key_num):
+        if layer < self.layers:
+            i = layer * NUM_KEYS + key_num
+            if self.holds[i] < MAX_HOLDS:
+                self.holds[i] += 1
+                self.dirty = True
+
+    def count_switch(self, layer):
+        if layer < self.layers:
+            self.switches[layer] += 1
+            self.dirty = True
+
+    def size(self):
+        return struct.calcsize(HEADER) + self.layers * ((NUM_KEYS + 1) * _LONG_SIZE + NUM_KEYS * 2)
+
+    def save(self, store, now=0):
+        """Write the counters to the start of `store` (e.g. microcontroller.nvm)."""
+        size = self.size()
+        if size > len(store):
+            raise ValueError("Usage counters need {} bytes, NVM has {}".format(size, len(store)))
+        data = bytearray(size)
+        struct.pack_into(HEADER, data, 0, MAGIC, VERSION, self.layers)
+        offset = struct.calcsize(HEADER)
+        for counts in (self.presses, self.holds, self.switches):
+            raw = bytes(counts)
+            data[offset:offset + len(raw)] = raw
+            offset += len(raw)
+        if store[0:size] != data:
+            store[0:size] = data
+            self.saves += 1
+        self.dirty = False
+        self.next_save = now + self.save_interval
+
+    def load(self, store):
+        """Read counters saved by save(); returns False if `store` holds none for this layer count."""
+        if store is None or len(store) < struct.calcsize(HEADER):
+            return False
+        magic, version, layers = struct.unpack(HEADER, bytes(store[0:struct.calcsize(HEADER)]))
+        if magic != MAGIC or version != VERSION or layers != self.layers or len(store) < self.size():
+            return False
+        offset = struct.calcsize(HEADER)
+        end = offset + len(self.presses) * _LONG_SIZE
+        self.presses = array('L', bytes(store[offset:end]))
+        offset, end = end, end + len(self.holds) * 2
+        self.holds = array('H', bytes(store[offset:end]))
+        offset, end = end, end + len(self.switches) * _LONG_SIZE
+        self.switches = array('L', bytes(store[offset:end]))
+        return True
+
+    def dump(self, write=print):
+        """Write the counters as text: one line of presses and one of holds per used layer."""
+        write("usage v{} layers {}".format(VERSION, self.layers))
+        for layer in range(self.layers):
+            start = layer * NUM_KEYS
+            presses = self.presses[start:start + NUM_KEYS]
+            if any(presses):
+                write("P{} {}".format(layer, " ".join(str(n) for n in presses)))
+                write("H{} {}".format(layer, " ".join(str(n) for n in self.holds[start:start + NUM_KEYS])))
+        write("S {}".format(" ".join(str(n) for n in self.switches)))
@@ -0,0 +1,23 @@
+# Chords that share Ctrl, used by tests/test_reports.py
+
+from adafruit_hid.keycode import Keycode
+
+from constants import ActionType
+
+LAYERS = {
+    0: {
+        'name': 'Chords',
+        'keys': {
+            0: {'action_type': ActionType.KEY, 'action': [Keycode.CONTROL, Keycode.C]},
+            1: {'action_type': ActionType.SEQUENCE, 'action': [[Keycode.CONTROL, Keycode.V]]},
+            2: {'action_type': ActionType.KEY, 'action': Keycode.V},
+            3: {'action_type': ActionType.STRING, 'action': 'v'},
+            4: {'action_type': ActionType.KEY, 'action': [Keycode.CONTROL, Keycode.V]},
+        }
+    }
+}
+
+CONFIG = {
+    'default_layer': 0,
+    'sequence_delay': 20,
+}
@@ -0,0 +1,70 @@
+"""Shared helpers for the simulator-driven behaviour tests.
+
+Each test builds a fresh scripts/simulator.py Simulator around a keymap and checks
+the HID reports it produced. Reports are compared as (modifier bits, keycodes) so a
+failing assertion reads like the report rather than a hex dump.
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, os.path.join(REPO_ROOT, "scripts"))
+
+from simulator import Simulator  # noqa: E402
+
+# Modifier bits of byte 0 of a boot keyboard report
+CTRL = 0x01
+SHIFT = 0x02
+ALT = 0x04
+
+# Keycodes used by the fixtures
+C = 0x06
+V = 0x19
+ENTER = 0x28
+ESCAPE = 0x29
+TAB = 0x2B
+SPACE = 0x2C
+UP_ARROW = 0x52
+
+
+def example(name):
+    """Path of a keymap in examples/configs."""
+    return os.path.join(REPO_ROOT, "examples", "configs", name)
+
+
+def fixture(name):
+    """Path of a keymap in tests/keymaps."""
+    return os.path.join(TESTS_DIR, "keymaps", name)
+
+
+def simulate(keymap, **config):
+    """Start a quiet Simulator for `keymap` with `config` merged into its CONFIG."""
+    config.setdefault("log_level", "off")
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulator(keymap, config=config)
+    sim.clear_reports()
+    return sim
+
+
+def report(modifiers=0, *keys):
+    return (modifiers, tuple(sorted(keys)))
+
+
+def reports(sim, clear=True):
+    """Keyboard reports sent so far as report() tuples; clears them unless told not to."""
+    decoded = [report(data[0], *[code for code in data[2:] if code])
+               for _, data in sim.keyboard_reports()]
+    if clear:
+        sim.clear_reports()
+    return decoded
+
+
+def timed_reports(sim, since_ns=0):
+    """Like reports(), paired with milliseconds since `since_ns` on the simulation clock."""
+    return [((stamp - since_ns) // 1000000, report(data[0], *[code for code in data[2:] if code]))
+            for stamp, data in sim.keyboard_reports()]
@@ -0,0 +1,114 @@
+"""The event queue (src/eventqueue.py) and debouncer (src/debounce.py) under load."""
+
+import random
+import unittest
+
+from simulation import example, report, reports, simulate
+
+NUMPAD = example("simple_numpad.py")
+
+
+def mash(sim, rnd, rounds, scans=(1, 1, 2), on_scan=None):
+    """Flip random switches between scans, keeping at most three keys down."""
+    switches = sim.hardware.switches
+    for _ in range(rounds):
+        for key in rnd.sample(range(16), rnd.randint(1, 5)):
+            if switches[key] or sum(switches) < 3:
+                switches[key] = not switches[key]
+        sim.scan(rnd.choice(scans))
+        if on_scan:
+            on_scan()
+
+
+def release_all(sim):
+    for key in range(16):
+        sim.hardware.switches[key] = False
+    sim.scan(40)
+
+
+def switch_mask(sim):
+    return sum(1 << key for key, down in enumerate(sim.hardware.switches) if down)
+
+
+class EventQueueTest(unittest.TestCase):
+
+    def check_overflow(self, policy, size):
+        sim = simulate(NUMPAD, event_queue_size=size, event_overflow=policy,
+                       dispatch_budget_us=0)
+        controller = sim.controller
+        mismatches = []
+
+        def check_resync():
+            # Once the queue drains, every drop must have been resynced to the switches
+            if not controller.events.count and controller.down_mask != switch_mask(sim):
+                mismatches.append((controller.down_mask, switch_mask(sim)))
+
+        mash(sim, random.Random(1), 300, on_scan=check_resync)
+        release_all(sim)
+
+        self.assertEqual(mismatches, [])
+        self.assertEqual(reports(sim)[-1], report())
+        self.assertEqual(controller.down_mask, 0)
+        return controller.events
+
+    def test_drop_resyncs_after_overflow(self):
+        for size in (1, 2, 4):
+            with self.subTest(size=size):
+                self.assertGreater(self.check_overflow("drop", size).dropped, 0)
+
+    def test_coalesce_resyncs_after_overflow(self):
+        for size in (1, 2, 4):
+            with self.subTest(size=size):
+                events = self.check_overflow("coalesce", size)
+                self.assertGreater(events.dropped + events.coalesced, 0)
+
+    def test_large_queue_does_not_drop(self):
+        self.assertEqual(self.check_overflow("drop", 32).dropped, 0)
+
+    def test_queue_is_off_by_default(self):
+        self.assertIsNone(simulate(NUMPAD).controller.events)
+
+
+class DebounceTest(unittest.TestCase):
+
+    def chatter(self, **config):
+        """Bounce key 0 for a few scans on press and release; return the reports."""
+        sim = simulate(NUMPAD, **config)
+        for pressed in (True, False, True, False, True):
+            sim.hardware.switches[0] = pressed
+            sim.scan()
+        sim.run_for(20)
+        for pressed in (False, True, False, True, False):
+            sim.hardware.switches[0] = pressed
+            sim.scan()
+        sim.run_for(20)
+        return reports(sim)
+
+    def test_chatter_is_filtered(self):
+        for mode in ("eager", "deferred"):
+            with self.subTest(mode=mode):
+                sent = self.chatter(debounce=mode, debounce_ms=5)
+                self.assertEqual(len(sent), 2)
+                self.assertNotEqual(sent[0], report())
+                self.assertEqual(sent[1], report())
+
+    def test_chatter_passes_without_debounce(self):
+        self.assertGreater(len(self.chatter(debounce="off")), 2)
+
+    def test_queue_overflow_behind_debouncer(self):
+        for mode in ("eager", "deferred"):
+            for size in (2, 32):
+                with self.subTest(mode=mode, size=size):
+                    sim = simulate(NUMPAD, event_queue_size=size, event_overflow="drop",
+                                   dispatch_budget_us=0, debounce=mode, debounce_ms=5)
+                    mash(sim, random.Random(2), 300, scans=(1, 2, 8))
+                    release_all(sim)
+                    sim.scan(40)
+
+                    self.assertEqual(reports(sim)[-1], report())
+                    self.assertEqual(sim.controller.debouncer.reported, 0)
+                    self.assertEqual(sim.controller.down_mask, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
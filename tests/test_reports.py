@@ -0,0 +1,74 @@
+"""Shared modifiers across chords, macros and typed text (src/hidreport.py)."""
+
+import unittest
+
+from simulation import CTRL, C, V, fixture, report, reports, simulate
+
+CHORDS = fixture("chords.py")
+
+CTRL_C, CTRL_V_SEQUENCE, PLAIN_V, TYPE_V, CTRL_V = 0, 1, 2, 3, 4
+
+
+class SharedModifierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = simulate(CHORDS)
+        self.switches = self.sim.hardware.switches
+
+    def test_releasing_one_chord_keeps_shared_ctrl(self):
+        sim, switches = self.sim, self.switches
+        switches[CTRL_C] = True
+        sim.scan()
+        switches[CTRL_V] = True
+        sim.scan()
+        switches[CTRL_C] = False
+        sim.scan()
+        self.assertEqual(reports(sim),
+                         [report(CTRL, C), report(CTRL, C, V), report(CTRL, V)])
+        switches[CTRL_V] = False
+        sim.scan()
+        self.assertEqual(reports(sim), [report()])
+
+    def test_sequence_keeps_ctrl_of_held_chord(self):
+        sim, switches = self.sim, self.switches
+        switches[CTRL_C] = True
+        sim.scan()
+        switches[CTRL_V_SEQUENCE] = True
+        sim.scan()
+        switches[CTRL_V_SEQUENCE] = False
+        sim.run_for(100)
+        self.assertEqual(reports(sim),
+                         [report(CTRL, C), report(CTRL, C, V), report(CTRL, C)])
+        switches[CTRL_C] = False
+        sim.scan()
+        self.assertEqual(reports(sim), [report()])
+
+    def test_chord_pressed_during_sequence(self):
+        sim, switches = self.sim, self.switches
+        switches[CTRL_V_SEQUENCE] = True
+        sim.scan()
+        switches[CTRL_C] = True
+        sim.scan()
+        sim.run_for(100)
+        switches[CTRL_C] = False
+        switches[CTRL_V_SEQUENCE] = False
+        sim.run_for(50)
+        self.assertEqual(reports(sim),
+                         [report(CTRL, V), report(CTRL, C, V), report(CTRL, C), report()])
+
+    def test_typed_text_keeps_held_key(self):
+        sim, switches = self.sim, self.switches
+        switches[PLAIN_V] = True
+        sim.scan()
+        switches[TYPE_V] = True
+        sim.scan()
+        sim.run_for(100)
+        self.assertEqual(reports(sim), [report(0, V)])
+        switches[PLAIN_V] = False
+        switches[TYPE_V] = False
+        sim.run_for(50)
+        self.assertEqual(reports(sim), [report()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tap-hold keys (src/taphold.py) driven through examples/configs/tap_hold.py."""
+
+import unittest
+
+from simulation import (ALT, CTRL, ENTER, ESCAPE, SHIFT, SPACE, TAB, UP_ARROW, C,
+                        example, report, simulate, timed_reports)
+
+TAP_HOLD = example("tap_hold.py")
+
+# Key numbers on the Keybow 2040 (column-major, R3C0 is bottom-left)
+NAV, CTL, SFT, ALT_TAB = 0, 4, 8, 12
+R0C0, R0C1 = 3, 7
+
+
+class TapHoldTest(unittest.TestCase):
+
+    def play(self, script, settle_ms=400):
+        """Replay `script` and return [(ms, report)] relative to its first event."""
+        sim = simulate(TAP_HOLD)
+        start = sim.clock.monotonic_ns()
+        sim.play(script)
+        sim.run_for(settle_ms)
+        self.sim = sim
+        return timed_reports(sim, start)
+
+    def test_quick_release_taps(self):
+        self.assertEqual(self.play([(0, CTL, 1), (50, CTL, 0)]),
+                         [(50, report(0, ESCAPE)), (50, report())])
+        self.assertEqual(self.sim.controller.tap_hold.taps, 1)
+
+    def test_tapping_term_holds(self):
+        self.assertEqual(self.play([(0, CTL, 1), (300, CTL, 0)]),
+                         [(200, report(CTRL)), (300, report())])
+        self.assertEqual(self.sim.controller.tap_hold.holds, 1)
+
+    def test_per_key_tapping_term(self):
+        self.assertEqual(self.play([(0, ALT_TAB, 1), (250, ALT_TAB, 0)]),
+                         [(250, report(0, TAB)), (250, report())])
+        self.assertEqual(self.play([(0, ALT_TAB, 1), (350, ALT_TAB, 0)]),
+                         [(300, report(ALT)), (350, report())])
+
+    def test_hold_on_other_key_press(self):
+        script = [(0, CTL, 1), (20, R0C0, 1), (40, R0C0, 0), (60, CTL, 0)]
+        self.assertEqual(self.play(script),
+                         [(20, report(CTRL, C)), (40, report(CTRL)), (60, report())])
+
+    def test_permissive_hold(self):
+        script = [(0, SFT, 1), (20, R0C0, 1), (40, R0C0, 0), (60, SFT, 0)]
+        self.assertEqual(self.play(script),
+                         [(40, report(SHIFT, C)), (40, report(SHIFT)), (60, report())])
+
+    def test_roll_stays_a_tap(self):
+        # The other key is still down when the tap-hold key comes up: a fast roll
+        script = [(0, SFT, 1), (20, R0C0, 1), (60, SFT, 0), (80, R0C0, 0)]
+        self.assertEqual(self.play(script),
+                         [(60, report(0, ENTER, C)), (60, report(0, C)), (80, report())])
+        self.assertEqual(self.sim.controller.tap_hold.taps, 1)
+
+    def test_buffered_key_replays_after_timeout(self):
+        script = [(0, SFT, 1), (20, R0C0, 1), (250, R0C0, 0), (260, SFT, 0)]
+        self.assertEqual(self.play(script),
+                         [(200, report(SHIFT, C)), (250, report(SHIFT)), (260, report())])
+
+    def test_layer_hold(self):
+        sim = simulate(TAP_HOLD)
+        sim.hold(NAV, 250)
+        self.assertEqual(timed_reports(sim), [])
+        self.assertEqual(sim.controller.current_layer, 1)
+
+        sim.tap(R0C1)
+        self.assertEqual(timed_reports(sim)[0][1], report(0, UP_ARROW))
+        sim.release(NAV)
+        sim.run_for(50)
+        self.assertEqual(sim.controller.current_layer, 0)
+
+        sim.clear_reports()
+        sim.tap(NAV)
+        sim.run_for(50)
+        self.assertEqual([entry for _, entry in timed_reports(sim)],
+                         [report(0, SPACE), report()])
+
+if __name__ == "__main__":
+    unittest.main()